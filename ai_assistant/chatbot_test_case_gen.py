@@ -1,12 +1,14 @@
 import os
-import pypdf
 import streamlit as st
-import pandas as pd
-import docx
-from io import StringIO, BytesIO
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
-from openpyxl import load_workbook
+
+from ai_assistant.test_case_dedup import DuplicateTestCaseIndex
+from ai_assistant.requirement_store import RequirementStore, DEFAULT_MAX_PROMPT_TOKENS
+from ai_assistant.structured_test_cases import generate_structured_test_cases, format_test_cases
+from ai_assistant.test_case_export import CachedTestCaseExport, EXPORT_FORMATS
+from ai_assistant.test_case_generation import SUPPORTED_FILE_TYPES, extract_text_from_file, \
+    build_test_case_prompt, parse_test_cases
 
 # Set up OpenAI API key
 os.environ["OPENAI_API_KEY"] = st.secrets["OPENAI_API_KEY"]
@@ -18,71 +20,24 @@ st.caption("Bot can make mistakes. Review the response before using.")
 
 # Initialize the model
 llm = ChatOpenAI(model="gpt-4o")
+json_llm = llm.bind(response_format={"type": "json_object"})  # Used by the structured output mode
 
 # Initialize session state
 if "conversation_history" not in st.session_state:
     st.session_state.conversation_history = []
-if "test_cases" not in st.session_state:
-    st.session_state.test_cases = []  # Store structured test cases
-
-
-# Function to extract text from files
-def extract_text_from_file(uploaded_file):
-    file_type = uploaded_file.name.split(".")[-1].lower()
-
-    if file_type == "docx":
-        doc = docx.Document(uploaded_file)
-        return "\n".join([para.text for para in doc.paragraphs]).strip()
-
-    elif file_type == "pdf":
-        pdf_reader = pypdf.PdfReader(uploaded_file)
-        return "\n".join([page.extract_text() for page in pdf_reader.pages if page.extract_text()]).strip()
-
-    elif file_type == "txt":
-        return StringIO(uploaded_file.getvalue().decode("utf-8")).read().strip()
-
-    elif file_type == "csv":
-        csv_data = pd.read_csv(uploaded_file)
-        return csv_data.to_string(index=False).strip()
-
-    elif file_type == "xlsx":
-        wb = load_workbook(uploaded_file, data_only=True)
-        sheet = wb.active
-        return "\n".join(["\t".join([str(cell.value) for cell in row]) for row in sheet.iter_rows()]).strip()
-
-    else:
-        return "Unsupported file format!"
-
-
-# Function to parse test cases from bot response
-def parse_test_cases(response_text):
-    test_cases = []
-    test_case_blocks = response_text.strip().split("\n\n")  # Splitting based on blank lines
-
-    for block in test_case_blocks:
-        lines = block.split("\n")
-        test_case = {}
-        key = None
-
-        for line in lines:
-            if ":" in line:  # Identify key-value pairs
-                parts = line.split(":", 1)
-                key, value = parts[0].strip(), parts[1].strip()
-                test_case[key] = value
-            elif key:  # Handle multi-line values (e.g., Test Steps, Test Data)
-                test_case[key] += f"\n{line.strip()}"
-
-        # Ensure all required fields are captured
-        required_fields = ["Test Case ID", "Test Case Title", "Pre-conditions", "Test Data", "Test Steps",
-                           "Expected Result", "Priority"]
-        if all(k in test_case for k in required_fields):
-            test_cases.append(test_case)
-
-    return test_cases
+if "test_case_index" not in st.session_state:
+    # Store structured test cases, flagging the ones repeated across regenerations and overlapping requirements
+    st.session_state.test_case_index = DuplicateTestCaseIndex(mode="flag")
+if "requirement_store" not in st.session_state:
+    # Earlier requirement documents are only referenced in the prompt, not re-sent in full
+    st.session_state.requirement_store = RequirementStore(
+        max_prompt_tokens=int(st.secrets.get("MAX_PROMPT_TOKENS", DEFAULT_MAX_PROMPT_TOKENS)))
+if "test_case_export" not in st.session_state:
+    st.session_state.test_case_export = CachedTestCaseExport()  # Rebuilt only when the test cases change
 
 
 # Function to handle input
-def handle_input(input_text, uploaded_file):
+def handle_input(input_text, uploaded_file, structured_output=False):
     if uploaded_file:
         input_text = extract_text_from_file(uploaded_file)
 
@@ -90,34 +45,34 @@ def handle_input(input_text, uploaded_file):
         st.session_state.conversation_history.append(("user", input_text))
         actual_requirement = input_text
 
-        test_case_format = """
-        Test Case ID: (Unique identifier, e.g., TC_01)
-        Test Case Title: (Briefly describe what the test case validates)
-        Pre-conditions: (Any setup or pre-requirements before executing the test case)
-        Test Data: (Data used in the test case)
-        Test Steps: (Step-by-step actions to execute the test case)
-        Expected Result: (The expected outcome after executing the steps)
-        Priority: (Low/Medium/High based on impact)
-        """
-
-        if not input_text.lower().startswith("generate test cases"):
-            input_text = (f"You are a manual software tester. Please review the given requirements carefully and write "
-                          f"detailed manual test cases for {input_text} in the format {test_case_format}. Ensure "
-                          f"comprehensive coverage, including positive, negative, boundary, and edge cases where "
-                          f"applicable.")
-
-        chat_history = [
-                           ("system",
-                            f"You are a manual software tester. Please review the given requirements carefully and "
-                            f"write detailed manual test cases for {input_text} in the format {test_case_format}. "
-                            f"Ensure comprehensive coverage, including positive, negative, boundary, and edge cases "
-                            f"where applicable."),
-                       ] + [(role, msg) for role, msg in st.session_state.conversation_history if role == "user"]
+        requirement_store = st.session_state.requirement_store
+        doc_id = requirement_store.add(input_text)
+        chat_history = requirement_store.build_messages(
+            doc_id, build_test_case_prompt("the requirements given by the user"))
+        st.session_state.last_prompt_tokens = requirement_store.count_message_tokens(chat_history)
+
+        if structured_output:
+            try:
+                test_cases, report = generate_structured_test_cases(json_llm, chat_history)
+                st.session_state.last_structured_report = report
+                if test_cases:
+                    formatted_content = (f"Generated test cases for **{actual_requirement}**\n\n"
+                                         f"{format_test_cases(test_cases)}")
+                    st.session_state.conversation_history.append(("assistant", formatted_content))
+                    st.session_state.test_case_index.extend(test_cases)
+                else:
+                    st.session_state.conversation_history.append(("assistant", "No valid response received."))
+            except Exception as e:
+                st.session_state.conversation_history.append(("assistant", f"Error: {e}"))
+            return
+
+        # Escape the braces of the requirement text, they are not template variables
+        chat_history = [(role, msg.replace("{", "{{").replace("}", "}}")) for role, msg in chat_history]
 
         try:
             modified_prompt = ChatPromptTemplate.from_messages(chat_history)
             modified_chain = modified_prompt | llm
-            response = modified_chain.invoke({"question": input_text})
+            response = modified_chain.invoke({})
             content = getattr(response, "content", None) or response.get("content", None)
 
             if content:
@@ -126,7 +81,7 @@ def handle_input(input_text, uploaded_file):
 
                 # Parse and store test cases
                 test_cases = parse_test_cases(content)
-                st.session_state.test_cases.extend(test_cases)
+                st.session_state.test_case_index.extend(test_cases)
 
             else:
                 st.session_state.conversation_history.append(("assistant", "No valid response received."))
@@ -136,11 +91,13 @@ def handle_input(input_text, uploaded_file):
 
 # User Input & File Upload
 user_input = st.chat_input(placeholder="Describe requirement here", accept_file=True, file_type=None)
-uploaded_file = st.file_uploader("Upload the requirement file", type=["docx", "pdf", "txt", "csv", "xlsx"])
+uploaded_file = st.file_uploader("Upload the requirement file", type=SUPPORTED_FILE_TYPES)
+structured_output = st.toggle("Structured output", help="Generate JSON records validated against the test case "
+                                                        "schema, re-requesting only the invalid ones")
 
 # Process input or file
 if user_input or uploaded_file:
-    handle_input(user_input, uploaded_file)
+    handle_input(user_input, uploaded_file, structured_output)
 
 # Display conversation history
 if st.session_state.conversation_history:
@@ -148,18 +105,28 @@ if st.session_state.conversation_history:
         with st.chat_message(role):
             st.markdown(message)
 
-# Export test cases to Excel
-if st.session_state.test_cases:
-    df = pd.DataFrame(st.session_state.test_cases)
-
-    # Save DataFrame to Excel
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="Test Cases")
+if "last_prompt_tokens" in st.session_state:
+    st.caption(f"Prompt tokens of the last request: {st.session_state.last_prompt_tokens}")
+if structured_output and "last_structured_report" in st.session_state:
+    report = st.session_state.last_structured_report
+    st.caption(f"Structured output: {report['valid_first_pass']} of {report['generated']} record(s) valid on the "
+               f"first pass, {report['repaired']} repaired with {report['repair_requests']} repair request(s) "
+               f"({report['repair_tokens']} tokens), {report['dropped']} dropped. The free-text parser would have "
+               f"discarded {report['salvaged_tokens']} tokens of salvaged test cases, and regenerating the batch "
+               f"would have cost about {report['regeneration_tokens_avoided']} more tokens.")
+
+# Export test cases
+if st.session_state.test_case_index.test_cases:
+    if st.session_state.test_case_index.duplicates_found:
+        st.caption(f"{st.session_state.test_case_index.duplicates_found} possible duplicate test case(s) flagged "
+                   f"in the 'Duplicate Of' column.")
+
+    export_format = st.selectbox("Export format", list(EXPORT_FORMATS))
+    export_file_name, export_mime = EXPORT_FORMATS[export_format]
 
     st.download_button(
         label="Download Test Cases",
-        data=output.getvalue(),
-        file_name="test_cases.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        data=st.session_state.test_case_export.get(st.session_state.test_case_index, export_format),
+        file_name=export_file_name,
+        mime=export_mime,
     )
@@ -0,0 +1,118 @@
+import hashlib
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken ships with langchain_openai, fall back to a rough estimate without it
+    tiktoken = None
+
+DEFAULT_MAX_PROMPT_TOKENS = 8000
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model):
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # The encoding files are downloaded on first use, which fails on offline machines
+        print(f"Token counting falls back to an estimate: {e}")
+        return None
+
+
+def count_tokens(text, model="gpt-4o"):
+    """
+    Count the tokens of a text for the given OpenAI model.
+    :param text: Text to count
+    :param model: OpenAI model name
+    :return: Number of tokens
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+class RequirementStore:
+    """
+    Requirement documents of a session, keyed by the hash of their content.
+
+    Only the current document is sent in full; documents uploaded earlier are referenced by their short id and
+    a summary line, so the prompt size of a request does not grow with the number of documents in the session.
+    """
+
+    def __init__(self, max_prompt_tokens=DEFAULT_MAX_PROMPT_TOKENS, summary_chars=200, max_references=10,
+                 model="gpt-4o"):
+        """
+        :param max_prompt_tokens: Token ceiling of the messages built for one request
+        :param summary_chars: Length of the summary kept for each document
+        :param max_references: Maximum number of earlier documents referenced, the most recent ones are kept
+        :param model: OpenAI model used to count tokens
+        """
+        self.max_prompt_tokens = max_prompt_tokens
+        self.summary_chars = summary_chars
+        self.max_references = max_references
+        self.model = model
+        self.documents = {}
+
+    @staticmethod
+    def document_id(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+    def add(self, text):
+        """
+        Store a requirement document; adding the same text again keeps a single copy.
+        :param text: Requirement text
+        :return: Document id
+        """
+        doc_id = self.document_id(text)
+        if doc_id in self.documents:
+            # Move it to the end so it counts as the most recent document
+            self.documents[doc_id] = self.documents.pop(doc_id)
+        else:
+            summary = " ".join(text.split())
+            if len(summary) > self.summary_chars:
+                summary = summary[:self.summary_chars].rsplit(" ", 1)[0] + "..."
+            self.documents[doc_id] = {"text": text, "summary": summary}
+        return doc_id
+
+    def build_messages(self, doc_id, instruction):
+        """
+        Build the messages of a request for one document within the token ceiling.
+
+        References to earlier documents are dropped oldest first and the current document is truncated only when
+        it does not fit the ceiling on its own.
+        :param doc_id: Id of the current document
+        :param instruction: System instruction
+        :return: List of (role, message) tuples
+        """
+        text = self.documents[doc_id]["text"]
+        references = [f"- [{other_id}] {document['summary']}" for other_id, document in self.documents.items()
+                      if other_id != doc_id][-self.max_references:] if self.max_references else []
+
+        budget = self.max_prompt_tokens - count_tokens(instruction, self.model)
+        text_tokens = count_tokens(text, self.model)
+        while text and text_tokens > budget:
+            # Keep the beginning of the document, cut proportionally to the token overflow
+            text = text[:int(len(text) * min(0.95, max(0.0, budget / text_tokens)))]
+            text_tokens = count_tokens(text, self.model)
+            references = []
+
+        reference_header = ("Requirement documents already covered earlier in this session, for reference only, "
+                            "do not write test cases for them again:")
+        while references and count_tokens("\n".join([reference_header] + references), self.model) > \
+                budget - text_tokens:
+            references.pop(0)
+
+        messages = [("system", instruction)]
+        if references:
+            messages.append(("user", "\n".join([reference_header] + references)))
+        messages.append(("user", text))
+        return messages
+
+    def count_message_tokens(self, messages):
+        return sum(count_tokens(message, self.model) for _, message in messages)
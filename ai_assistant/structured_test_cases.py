@@ -0,0 +1,168 @@
+import json
+import re
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+from ai_assistant.requirement_store import count_tokens
+
+STRUCTURED_OUTPUT_INSTRUCTION = """
+Return the test cases as a JSON object of the form {"test_cases": [...]}, where every item has exactly the keys
+"Test Case ID", "Test Case Title", "Pre-conditions", "Test Data", "Test Steps", "Expected Result" and "Priority".
+All values are strings; "Priority" is one of "Low", "Medium" or "High". Do not add any text outside the JSON.
+"""
+
+REPAIR_INSTRUCTION = """
+The following test case records failed validation. Fix only these records, keeping their content, and return them
+as a JSON object of the form {"test_cases": [...]} with the keys "Test Case ID", "Test Case Title", "Pre-conditions",
+"Test Data", "Test Steps", "Expected Result" and "Priority" (one of "Low", "Medium" or "High"). Every returned record
+also keeps the "Repair Index" of the record it fixes.
+"""
+
+REPAIR_INDEX = "Repair Index"
+
+
+class ManualTestCase(BaseModel):
+    """
+    Schema of a generated manual test case, the fields parse_test_cases requires.
+    """
+    model_config = ConfigDict(populate_by_name=True, extra="ignore", str_strip_whitespace=True)
+
+    test_case_id: str = Field(alias="Test Case ID", min_length=1)
+    test_case_title: str = Field(alias="Test Case Title", min_length=1)
+    pre_conditions: str = Field(alias="Pre-conditions")
+    test_data: str = Field(alias="Test Data")
+    test_steps: str = Field(alias="Test Steps", min_length=1)
+    expected_result: str = Field(alias="Expected Result", min_length=1)
+    priority: Literal["Low", "Medium", "High"] = Field(alias="Priority")
+
+    @field_validator("pre_conditions", "test_data", "test_steps", mode="before")
+    @classmethod
+    def join_lists(cls, value):
+        # Models often return steps and data as lists, keep them one per line as the free-text format does
+        if isinstance(value, list):
+            return "\n".join(str(item) for item in value)
+        return "None" if value is None else value
+
+    @field_validator("priority", mode="before")
+    @classmethod
+    def normalize_priority(cls, value):
+        return value.strip().capitalize() if isinstance(value, str) else value
+
+    def to_record(self):
+        return self.model_dump(by_alias=True)
+
+
+def load_json_records(content):
+    """
+    Load the test case records of a JSON response.
+    :param content: Response text
+    :return: List of records, or None if the response holds no JSON
+    """
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        match = re.search(r"[\[{].*[\]}]", content, re.DOTALL)
+        if not match:
+            return None
+        try:
+            data = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return None
+    if isinstance(data, dict):
+        data = data.get("test_cases", [data])
+    return data if isinstance(data, list) else None
+
+
+def validate_records(records):
+    """
+    Validate records one by one, so one bad record does not invalidate the others.
+    :param records: List of records
+    :return: Tuple of the valid test cases and the (record, error) pairs of the invalid ones
+    """
+    valid, failed = [], []
+    for record in records:
+        try:
+            valid.append(ManualTestCase.model_validate(record).to_record())
+        except ValidationError as e:
+            errors = "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                               for error in e.errors())
+            failed.append((record, errors))
+    return valid, failed
+
+
+def _usage(response):
+    usage = getattr(response, "usage_metadata", None) or {}
+    return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+
+def generate_structured_test_cases(llm, messages, max_repairs=2):
+    """
+    Generate test cases as schema-validated JSON records, re-requesting only the records that fail validation.
+    :param llm: LangChain chat model, ideally bound to a JSON response format
+    :param messages: List of (role, message) tuples of the request, the last one being the requirement
+    :param max_repairs: Maximum number of repair requests
+    :return: Tuple of the list of test case dictionaries and a report dictionary
+    """
+    system_role, system_message = messages[0]
+    messages = [(system_role, system_message + STRUCTURED_OUTPUT_INSTRUCTION)] + list(messages[1:])
+    response = llm.invoke(messages)
+    input_tokens, output_tokens = _usage(response)
+    records = load_json_records(getattr(response, "content", None) or "") or []
+
+    test_cases, failed = validate_records(records)
+    report = {
+        "generated": len(records),
+        "valid_first_pass": len(test_cases),
+        "repaired": 0,
+        "dropped": 0,
+        "repair_requests": 0,
+        "generation_tokens": input_tokens + output_tokens,
+        "repair_tokens": 0,
+        "salvaged_tokens": 0,
+    }
+
+    # Failed records by repair index, the model returns the index with each record so the order does not matter
+    failed = dict(enumerate(failed))
+    for _ in range(max_repairs):
+        if not failed:
+            break
+        failed_records = [{REPAIR_INDEX: index, "record": record, "errors": errors}
+                          for index, (record, errors) in failed.items()]
+        response = llm.invoke([("system", REPAIR_INSTRUCTION), ("user", json.dumps(failed_records, indent=1))])
+        repair_input_tokens, repair_output_tokens = _usage(response)
+        report["repair_requests"] += 1
+        report["repair_tokens"] += repair_input_tokens + repair_output_tokens
+
+        for record in load_json_records(getattr(response, "content", None) or "") or []:
+            index = record.pop(REPAIR_INDEX, None) if isinstance(record, dict) else None
+            # Records without a known index cannot be tied to a failed record and are ignored
+            if index not in failed:
+                continue
+            repaired, failed_again = validate_records([record])
+            if repaired:
+                test_cases.extend(repaired)
+                report["repaired"] += 1
+                # Without repair this record was lost, and the whole batch had to be generated again
+                report["salvaged_tokens"] += count_tokens(json.dumps(repaired[0]))
+                del failed[index]
+            else:
+                failed[index] = failed_again[0]
+        # Records the model left out are retried unchanged
+
+    report["dropped"] = len(failed)
+    if report["repaired"]:
+        # The free-text parser drops these records, recovering them meant generating the whole batch again
+        report["regeneration_tokens_avoided"] = max(0, report["generation_tokens"] - report["repair_tokens"])
+    else:
+        report["regeneration_tokens_avoided"] = 0
+    return test_cases, report
+
+
+def format_test_cases(test_cases):
+    """
+    Render test cases in the free-text format of the generator, for display.
+    :param test_cases: List of test case dictionaries
+    :return: Text with one block per test case
+    """
+    return "\n\n".join("\n".join(f"{key}: {value}" for key, value in test_case.items()) for test_case in test_cases)
@@ -0,0 +1,214 @@
+"""
+Headless batch generation of manual test cases over a directory of requirement files.
+
+Usage:
+    python -m ai_assistant.test_case_batch <requirements_dir> --output <output_dir>
+
+The OpenAI API key is read from the OPENAI_API_KEY environment variable. Text extraction runs in a process pool
+and the LLM calls in a bounded thread pool. Every processed file gets a JSONL file of its test cases and an entry
+in manifest.jsonl, so an interrupted run picks up where it stopped when started again with the same output
+directory. All test cases are finally merged into test_cases.xlsx.
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from io import BytesIO
+
+from ai_assistant.structured_test_cases import generate_structured_test_cases
+from ai_assistant.test_case_dedup import DuplicateTestCaseIndex
+from ai_assistant.test_case_export import write_test_cases_xlsx
+from ai_assistant.test_case_generation import SUPPORTED_FILE_TYPES, extract_text_from_file, \
+    build_test_case_prompt, parse_test_cases
+
+MANIFEST_FILE_NAME = "manifest.jsonl"
+MERGED_WORKBOOK_NAME = "test_cases.xlsx"
+
+
+def find_requirement_files(input_dir):
+    """
+    List the supported requirement files under a directory.
+    :param input_dir: Directory to scan recursively
+    :return: Sorted list of file paths relative to input_dir
+    """
+    requirement_files = []
+    for root, _, file_names in os.walk(input_dir):
+        for file_name in file_names:
+            if file_name.split(".")[-1].lower() in SUPPORTED_FILE_TYPES:
+                requirement_files.append(os.path.relpath(os.path.join(root, file_name), input_dir))
+    return sorted(requirement_files)
+
+
+def load_manifest(output_dir):
+    """
+    Load the completed files of a previous run.
+    :param output_dir: Output directory of the run
+    :return: Dictionary of relative path to the latest manifest entry
+    """
+    manifest = {}
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            for line in manifest_file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partially written line of a crashed run
+                manifest[entry["file"]] = entry
+    return manifest
+
+
+def file_sha256(file_path):
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as requirement_file:
+        for block in iter(lambda: requirement_file.read(1 << 20), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def extract_requirement_file(input_dir, relative_path):
+    """
+    Read and extract the text of a requirement file; runs in a worker process.
+    :param input_dir: Requirements directory
+    :param relative_path: Path of the file relative to input_dir
+    :return: Tuple of relative path, SHA-256 of the file content and extracted text
+    """
+    with open(os.path.join(input_dir, relative_path), "rb") as requirement_file:
+        content = requirement_file.read()
+    file_object = BytesIO(content)
+    file_object.name = relative_path
+    return relative_path, hashlib.sha256(content).hexdigest(), extract_text_from_file(file_object)
+
+
+def jsonl_file_name(relative_path):
+    return relative_path.replace(os.sep, "__") + ".jsonl"
+
+
+def generate_test_cases(llm, requirement, structured_output=False):
+    """
+    Generate and parse the test cases of one requirement, the way the Streamlit page does for a single upload.
+    :param llm: LangChain chat model
+    :param requirement: Requirement text
+    :param structured_output: Generate schema-validated JSON records instead of free text
+    :return: List of test case dictionaries
+    """
+    messages = [("system", build_test_case_prompt("the requirements given by the user")), ("user", requirement)]
+    if structured_output:
+        return generate_structured_test_cases(llm, messages)[0]
+    response = llm.invoke(messages)
+    content = getattr(response, "content", None) or ""
+    return parse_test_cases(content)
+
+
+def run_batch(input_dir, output_dir, llm, extract_workers=None, llm_workers=4, structured_output=False):
+    """
+    Generate test cases for every requirement file of a directory, skipping the ones completed by earlier runs.
+    :param input_dir: Requirements directory
+    :param output_dir: Directory receiving the per-file JSONL, the manifest and the merged workbook
+    :param llm: LangChain chat model
+    :param extract_workers: Number of extraction processes, defaults to the CPU count
+    :param llm_workers: Maximum number of concurrent LLM calls
+    :param structured_output: Generate schema-validated JSON records instead of free text
+    :return: Dictionary with the run statistics
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    requirement_files = find_requirement_files(input_dir)
+    # Files completed by an earlier run are skipped unless their content changed since
+    pending_files = [relative_path for relative_path in requirement_files
+                     if manifest.get(relative_path, {}).get("status") != "done"
+                     or manifest[relative_path].get("sha256") != file_sha256(os.path.join(input_dir, relative_path))]
+
+    manifest_lock = threading.Lock()
+    manifest_file = open(os.path.join(output_dir, MANIFEST_FILE_NAME), "a", encoding="utf-8")
+
+    def record(entry):
+        with manifest_lock:
+            manifest[entry["file"]] = entry
+            manifest_file.write(json.dumps(entry) + "\n")
+            manifest_file.flush()
+            os.fsync(manifest_file.fileno())
+
+    def process(relative_path, file_hash, text):
+        try:
+            test_cases = generate_test_cases(llm, text, structured_output)
+            with open(os.path.join(output_dir, jsonl_file_name(relative_path)), "w", encoding="utf-8") as jsonl_file:
+                for test_case in test_cases:
+                    jsonl_file.write(json.dumps(test_case) + "\n")
+            record({"file": relative_path, "sha256": file_hash, "status": "done", "test_cases": len(test_cases)})
+        except Exception as e:
+            record({"file": relative_path, "sha256": file_hash, "status": "failed", "error": str(e)})
+
+    start_time = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=extract_workers) as extract_pool, \
+                ThreadPoolExecutor(max_workers=llm_workers) as llm_pool:
+            extract_futures = {extract_pool.submit(extract_requirement_file, input_dir, relative_path): relative_path
+                               for relative_path in pending_files}
+            llm_futures = []
+            for future in as_completed(extract_futures):
+                try:
+                    relative_path, file_hash, text = future.result()
+                except Exception as e:
+                    record({"file": extract_futures[future], "status": "failed", "error": str(e)})
+                    continue
+                if not text:
+                    record({"file": relative_path, "sha256": file_hash, "status": "failed",
+                            "error": "No text could be extracted."})
+                    continue
+                llm_futures.append(llm_pool.submit(process, relative_path, file_hash, text))
+            for future in llm_futures:
+                future.result()
+    finally:
+        manifest_file.close()
+    elapsed_minutes = (time.perf_counter() - start_time) / 60
+
+    # Merge the test cases of every completed file, in file order, into one workbook
+    test_case_index = DuplicateTestCaseIndex(mode="flag")
+    for relative_path in requirement_files:
+        if manifest.get(relative_path, {}).get("status") != "done":
+            continue
+        with open(os.path.join(output_dir, jsonl_file_name(relative_path)), encoding="utf-8") as jsonl_file:
+            for line in jsonl_file:
+                test_case_index.add(dict(json.loads(line), **{"Source File": relative_path}))
+    write_test_cases_xlsx(test_case_index.test_cases, os.path.join(output_dir, MERGED_WORKBOOK_NAME))
+
+    processed = sum(1 for relative_path in pending_files if manifest[relative_path]["status"] == "done")
+    return {
+        "files": len(requirement_files),
+        "skipped": len(requirement_files) - len(pending_files),
+        "processed": processed,
+        "failed": len(pending_files) - processed,
+        "test_cases": len(test_case_index),
+        "files_per_minute": processed / elapsed_minutes if elapsed_minutes else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate manual test cases for a directory of requirement files.")
+    parser.add_argument("input_dir", help="Directory containing the requirement files")
+    parser.add_argument("--output", required=True, help="Output directory, reused to resume an interrupted run")
+    parser.add_argument("--model", default="gpt-4o", help="OpenAI chat model")
+    parser.add_argument("--extract-workers", type=int, default=None, help="Number of text extraction processes")
+    parser.add_argument("--llm-workers", type=int, default=4, help="Maximum number of concurrent LLM calls")
+    parser.add_argument("--structured", action="store_true", help="Generate schema-validated JSON test cases")
+    args = parser.parse_args()
+
+    from langchain_openai import ChatOpenAI
+
+    llm = ChatOpenAI(model=args.model)
+    if args.structured:
+        llm = llm.bind(response_format={"type": "json_object"})
+    stats = run_batch(args.input_dir, args.output, llm, extract_workers=args.extract_workers,
+                      llm_workers=args.llm_workers, structured_output=args.structured)
+    print(f"Processed {stats['processed']} file(s), skipped {stats['skipped']} already done, "
+          f"{stats['failed']} failed, {stats['test_cases']} test case(s) written to "
+          f"{os.path.join(args.output, MERGED_WORKBOOK_NAME)}")
+    print(f"Throughput: {stats['files_per_minute']:.1f} files/minute")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import re
+from collections import defaultdict, deque
+from itertools import combinations
+
+from rapidfuzz import fuzz
+
+# Words that carry no meaning in a test case title and would only inflate the blocks
+TITLE_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "check", "for", "from", "if", "in", "is", "it", "of", "on",
+    "or", "that", "the", "to", "user", "validate", "verify", "when", "with",
+}
+
+# Fields compared one by one, a duplicate has to match on every one of them
+COMPARED_FIELDS = ["Test Case Title", "Pre-conditions", "Test Data", "Test Steps", "Expected Result"]
+
+# Number of title tokens used to build the token pair blocks
+MAX_PAIR_TOKENS = 8
+
+
+def normalize_title_tokens(title):
+    """
+    Normalize a test case title into the set of tokens used for blocking.
+    :param title: Test case title
+    :return: Set of lower-cased, de-pluralised tokens without stopwords
+    """
+    tokens = set()
+    for token in re.findall(r"[a-z0-9]+", str(title or "").lower()):
+        if token in TITLE_STOPWORDS or len(token) < 2:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.add(token)
+    return tokens
+
+
+def normalize_field(value):
+    """
+    Normalize a test case field for comparison: lower case, punctuation removed, whitespace collapsed.
+    :param value: Field value
+    :return: Normalized text
+    """
+    return " ".join(re.findall(r"[a-z0-9]+", str(value or "").lower()))
+
+
+class DuplicateTestCaseIndex:
+    """
+    Incremental near-duplicate index for generated test cases.
+
+    A new test case is only compared against the test cases sharing a blocking key with it, never against the
+    whole set. The blocking keys are the normalized title tokens; a token shared by ``max_block_size`` test cases
+    is too common to discriminate, so from then on the pairs of title tokens are used instead, and the exact
+    normalized title is always a key of its own.
+
+    Two test cases are duplicates only when every compared field has a ``fuzz.ratio`` of at least ``threshold``
+    on normalized text and the fields contain the same numbers, so boundary, negative and extended variants
+    of a test case are kept.
+    """
+
+    def __init__(self, threshold=92, mode="flag", max_block_size=500):
+        """
+        :param threshold: Similarity score (0-100) every compared field must reach
+        :param mode: "flag" keeps duplicates and fills their "Duplicate Of" field, "merge" drops them and records
+                     their Test Case ID in the "Merged Test Case IDs" field of the kept test case
+        :param max_block_size: Maximum number of test cases a blocking key may point to
+        """
+        if mode not in ("merge", "flag"):
+            raise ValueError("mode must be either 'merge' or 'flag'.")
+        self.threshold = threshold
+        self.mode = mode
+        self.max_block_size = max_block_size
+        self.test_cases = []
+        self.duplicates_found = 0
+        self.last_comparisons = 0
+        self.version = 0  # Bumped on every change of the test case set, exports are rebuilt from it
+        self._fields = []
+        self._blocks = defaultdict(list)
+        self._title_blocks = defaultdict(lambda: deque(maxlen=max_block_size))
+
+    def __len__(self):
+        return len(self.test_cases)
+
+    @staticmethod
+    def _normalized_fields(test_case):
+        fields = [normalize_field(test_case.get(field)) for field in COMPARED_FIELDS]
+        numbers = [re.findall(r"\d+", field) for field in fields]
+        return fields, numbers
+
+    def _blocking_keys(self, tokens):
+        single_keys = sorted(tokens)
+        pair_keys = list(combinations(single_keys[:MAX_PAIR_TOKENS], 2))
+        return single_keys, pair_keys
+
+    def _is_full(self, key):
+        return len(self._blocks.get(key, ())) >= self.max_block_size
+
+    def _candidates(self, tokens, title_key):
+        single_keys, pair_keys = self._blocking_keys(tokens)
+        candidates = set(self._title_blocks.get(title_key, ()))
+        full_tokens = set()
+        for key in single_keys:
+            if self._is_full(key):
+                full_tokens.add(key)
+            else:
+                candidates.update(self._blocks.get(key, ()))
+        # Common tokens no longer discriminate, fall back to the more specific token pairs
+        for key in pair_keys:
+            if (key[0] in full_tokens or key[1] in full_tokens) and not self._is_full(key):
+                candidates.update(self._blocks.get(key, ()))
+        return candidates
+
+    def _is_duplicate(self, fields, numbers, position):
+        other_fields, other_numbers = self._fields[position]
+        if numbers != other_numbers:
+            return False
+        return all(fuzz.ratio(field, other_field) >= self.threshold
+                   for field, other_field in zip(fields, other_fields))
+
+    def describe(self, position):
+        """
+        Session-unique reference to an indexed test case; Test Case IDs restart at TC_01 on every generation.
+        :param position: Position of the test case in ``test_cases``
+        :return: Reference such as "TC_01 (row 3)"
+        """
+        return f"{self.test_cases[position].get('Test Case ID', '')} (row {position + 1})".strip()
+
+    def find_duplicate(self, test_case):
+        """
+        Find the already indexed test case the given one duplicates.
+        :param test_case: Test case dictionary as returned by parse_test_cases
+        :return: Position of the duplicated test case in ``test_cases``, or None
+        """
+        tokens = normalize_title_tokens(test_case.get("Test Case Title"))
+        fields, numbers = self._normalized_fields(test_case)
+        candidates = self._candidates(tokens, fields[0])
+        self.last_comparisons = len(candidates)
+        for position in sorted(candidates):
+            if self._is_duplicate(fields, numbers, position):
+                return position
+        return None
+
+    def add(self, test_case):
+        """
+        Insert a test case, merging or flagging it if it duplicates an indexed one.
+        :param test_case: Test case dictionary as returned by parse_test_cases
+        :return: True if the test case was stored, False if it was merged into an existing one
+        """
+        duplicate_position = self.find_duplicate(test_case)
+        if duplicate_position is not None:
+            self.duplicates_found += 1
+            if self.mode == "merge":
+                kept = self.test_cases[duplicate_position]
+                merged_ids = [merged_id for merged_id in kept.get("Merged Test Case IDs", "").split(", ") if merged_id]
+                kept["Merged Test Case IDs"] = ", ".join(merged_ids + [test_case.get("Test Case ID", "")])
+                self.version += 1
+                return False
+            test_case = dict(test_case, **{"Duplicate Of": self.describe(duplicate_position)})
+
+        position = len(self.test_cases)
+        self.test_cases.append(test_case)
+        self.version += 1
+        fields, numbers = self._normalized_fields(test_case)
+        self._fields.append((fields, numbers))
+        self._title_blocks[fields[0]].append(position)
+        single_keys, pair_keys = self._blocking_keys(normalize_title_tokens(test_case.get("Test Case Title")))
+        for key in single_keys + pair_keys:
+            if not self._is_full(key):
+                self._blocks[key].append(position)
+        return True
+
+    def extend(self, test_cases):
+        """
+        Insert several test cases.
+        :param test_cases: Iterable of test case dictionaries
+        :return: Number of test cases stored
+        """
+        return sum(1 for test_case in test_cases if self.add(test_case))
@@ -0,0 +1,124 @@
+import csv
+from io import BytesIO, StringIO
+
+import xlsxwriter
+
+EXPORT_FORMATS = {
+    "Excel": ("test_cases.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV": ("test_cases.csv", "text/csv"),
+    "Parquet": ("test_cases.parquet", "application/vnd.apache.parquet"),
+}
+
+
+def export_columns(test_cases):
+    """
+    Collect the column names of the test cases, keeping their first-seen order.
+    :param test_cases: List of test case dictionaries
+    :return: List of column names
+    """
+    columns = {}
+    for test_case in test_cases:
+        for key in test_case:
+            columns.setdefault(key, None)
+    return list(columns)
+
+
+def write_test_cases_xlsx(test_cases, output, sheet_name="Test Cases"):
+    """
+    Write the test cases to an xlsx workbook in xlsxwriter constant_memory mode, so only the current row is
+    held in memory however many test cases there are.
+    :param test_cases: List of test case dictionaries
+    :param output: File path or binary file object
+    :param sheet_name: Worksheet name
+    :return: None
+    """
+    columns = export_columns(test_cases)
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    header_format = workbook.add_format({"bold": True})
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, columns, header_format)
+    for row_number, test_case in enumerate(test_cases, start=1):
+        worksheet.write_row(row_number, 0, [test_case.get(column, "") for column in columns])
+    workbook.close()
+
+
+def write_test_cases_csv(test_cases, output):
+    """
+    Write the test cases as CSV.
+    :param test_cases: List of test case dictionaries
+    :param output: Text file object
+    :return: None
+    """
+    writer = csv.DictWriter(output, fieldnames=export_columns(test_cases), restval="")
+    writer.writeheader()
+    writer.writerows(test_cases)
+
+
+def write_test_cases_parquet(test_cases, output):
+    """
+    Write the test cases as Parquet (requires pyarrow).
+    :param test_cases: List of test case dictionaries
+    :param output: File path or binary file object
+    :return: None
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = export_columns(test_cases)
+    table = pa.table({column: pa.array([None if test_case.get(column) is None else str(test_case[column])
+                                         for test_case in test_cases], type=pa.string())
+                      for column in columns})
+    pq.write_table(table, output)
+
+
+class CachedTestCaseExport:
+    """
+    Serialized exports of the generated test cases, rebuilt only when the test case set changes.
+
+    ``get`` compares the ``version`` of the DuplicateTestCaseIndex holding the test cases with the version the
+    cached export was built from, so a Streamlit rerun without new test cases costs a dictionary lookup.
+    The serialized bytes of each requested format are kept in memory for the download button; xlsxwriter's
+    constant_memory mode only bounds the memory used while the rows are being written.
+    """
+
+    def __init__(self):
+        self._exports = {}
+        self.builds = 0
+
+    def invalidate(self):
+        """
+        Drop the cached exports so the next ``get`` rebuilds them.
+        :return: None
+        """
+        self._exports.clear()
+
+    def get(self, test_case_index, export_format="Excel"):
+        """
+        Get the serialized test cases for the given format.
+        :param test_case_index: DuplicateTestCaseIndex holding the test cases
+        :param export_format: One of EXPORT_FORMATS
+        :return: Bytes of the export file
+        """
+        cached = self._exports.get(export_format)
+        if cached and cached[0] == test_case_index.version:
+            return cached[1]
+
+        test_cases = test_case_index.test_cases
+        if export_format == "Excel":
+            output = BytesIO()
+            write_test_cases_xlsx(test_cases, output)
+            data = output.getvalue()
+        elif export_format == "CSV":
+            output = StringIO()
+            write_test_cases_csv(test_cases, output)
+            data = output.getvalue().encode("utf-8")
+        elif export_format == "Parquet":
+            output = BytesIO()
+            write_test_cases_parquet(test_cases, output)
+            data = output.getvalue()
+        else:
+            raise ValueError(f"Unsupported export format: {export_format}")
+
+        self.builds += 1
+        self._exports[export_format] = (test_case_index.version, data)
+        return data
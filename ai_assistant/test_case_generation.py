@@ -0,0 +1,81 @@
+import pypdf
+import pandas as pd
+import docx
+from io import StringIO
+from openpyxl import load_workbook
+
+SUPPORTED_FILE_TYPES = ["docx", "pdf", "txt", "csv", "xlsx"]
+
+REQUIRED_FIELDS = ["Test Case ID", "Test Case Title", "Pre-conditions", "Test Data", "Test Steps",
+                   "Expected Result", "Priority"]
+
+TEST_CASE_FORMAT = """
+        Test Case ID: (Unique identifier, e.g., TC_01)
+        Test Case Title: (Briefly describe what the test case validates)
+        Pre-conditions: (Any setup or pre-requirements before executing the test case)
+        Test Data: (Data used in the test case)
+        Test Steps: (Step-by-step actions to execute the test case)
+        Expected Result: (The expected outcome after executing the steps)
+        Priority: (Low/Medium/High based on impact)
+        """
+
+
+# Function to extract text from files
+def extract_text_from_file(uploaded_file):
+    file_type = uploaded_file.name.split(".")[-1].lower()
+
+    if file_type == "docx":
+        doc = docx.Document(uploaded_file)
+        return "\n".join([para.text for para in doc.paragraphs]).strip()
+
+    elif file_type == "pdf":
+        pdf_reader = pypdf.PdfReader(uploaded_file)
+        return "\n".join([page.extract_text() for page in pdf_reader.pages if page.extract_text()]).strip()
+
+    elif file_type == "txt":
+        return StringIO(uploaded_file.getvalue().decode("utf-8")).read().strip()
+
+    elif file_type == "csv":
+        csv_data = pd.read_csv(uploaded_file)
+        return csv_data.to_string(index=False).strip()
+
+    elif file_type == "xlsx":
+        wb = load_workbook(uploaded_file, data_only=True)
+        sheet = wb.active
+        return "\n".join(["\t".join([str(cell.value) for cell in row]) for row in sheet.iter_rows()]).strip()
+
+    else:
+        return "Unsupported file format!"
+
+
+# Function to build the test case generation instruction for a requirement
+def build_test_case_prompt(requirement):
+    return (f"You are a manual software tester. Please review the given requirements carefully and write "
+            f"detailed manual test cases for {requirement} in the format {TEST_CASE_FORMAT}. Ensure "
+            f"comprehensive coverage, including positive, negative, boundary, and edge cases where "
+            f"applicable.")
+
+
+# Function to parse test cases from bot response
+def parse_test_cases(response_text):
+    test_cases = []
+    test_case_blocks = response_text.strip().split("\n\n")  # Splitting based on blank lines
+
+    for block in test_case_blocks:
+        lines = block.split("\n")
+        test_case = {}
+        key = None
+
+        for line in lines:
+            if ":" in line:  # Identify key-value pairs
+                parts = line.split(":", 1)
+                key, value = parts[0].strip(), parts[1].strip()
+                test_case[key] = value
+            elif key:  # Handle multi-line values (e.g., Test Steps, Test Data)
+                test_case[key] += f"\n{line.strip()}"
+
+        # Ensure all required fields are captured
+        if all(k in test_case for k in REQUIRED_FIELDS):
+            test_cases.append(test_case)
+
+    return test_cases
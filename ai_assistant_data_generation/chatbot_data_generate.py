@@ -1,28 +1,159 @@
 import streamlit as st
 import os
-import tempfile
-from langchain_community.document_loaders import (
-    WebBaseLoader,
-    UnstructuredExcelLoader,
-    UnstructuredWordDocumentLoader,
-    UnstructuredPowerPointLoader,
-    UnstructuredHTMLLoader,
-    UnstructuredCSVLoader,
-    PyPDFLoader,
-)
+import time
+
+import pandas as pd
 from ragas.testset import TestsetGenerator
-from ragas.llms import LangchainLLMWrapper
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from ragas.embeddings import LangchainEmbeddingsWrapper
+from ragas.run_config import RunConfig
+
+from ai_assistant_data_generation.document_cache import DocumentCache
+from ai_assistant_data_generation.embedding_cache import CachedEmbeddingsWrapper
+from ai_assistant_data_generation.generation_estimate import (
+    CallStats,
+    EstimateLog,
+    RecordingLLMWrapper,
+    estimate_generation,
+)
+from ai_assistant_data_generation.knowledge_graph_cache import (
+    KnowledgeGraphCache,
+    document_set_hash,
+    prepare_generator,
+)
+from ai_assistant_data_generation.near_duplicates import remove_near_duplicates
+from ai_assistant_data_generation.rate_limiting import RateLimitController
+from ai_assistant_data_generation.testset_checkpoint import TestsetCheckpoint, checkpoint_path, generate_in_batches
+from ai_assistant_data_generation.web_crawler import HttpCache, crawl_urls
+from ai_assistant_data_generation.document_loading import SUPPORTED_FILE_TYPES, load_uploaded_files
 
 # Set OpenAI API Key
 os.environ["OPENAI_API_KEY"] = st.secrets["OPENAI_API_KEY"]
 
-# Initialize Ragas components
-generator_llm = LangchainLLMWrapper(ChatOpenAI(model="gpt-4o"))
-generator_embeddings = LangchainEmbeddingsWrapper(OpenAIEmbeddings())
+# Latency and token usage of the generation calls, the basis of the cost and time estimates
+call_stats = CallStats()
+estimate_log = EstimateLog()
+
+# Upper bound of the concurrent generation calls, the rate limit controllers find the sustainable concurrency below it
+MAX_CONCURRENCY = int(st.secrets.get("OPENAI_MAX_CONCURRENCY", 32))
+run_config = RunConfig(max_workers=MAX_CONCURRENCY)
+
+# Kept across reruns, so each generation starts from the concurrency the provider sustained before
+if "llm_controller" not in st.session_state:
+    st.session_state.llm_controller = RateLimitController(
+        requests_per_minute=int(st.secrets.get("OPENAI_LLM_REQUESTS_PER_MINUTE", 500)),
+        tokens_per_minute=int(st.secrets.get("OPENAI_LLM_TOKENS_PER_MINUTE", 30000)),
+        max_concurrency=MAX_CONCURRENCY,
+    )
+if "embedding_controller" not in st.session_state:
+    st.session_state.embedding_controller = RateLimitController(
+        requests_per_minute=int(st.secrets.get("OPENAI_EMBEDDING_REQUESTS_PER_MINUTE", 3000)),
+        tokens_per_minute=int(st.secrets.get("OPENAI_EMBEDDING_TOKENS_PER_MINUTE", 1000000)),
+        max_concurrency=MAX_CONCURRENCY,
+    )
+llm_controller = st.session_state.llm_controller
+embedding_controller = st.session_state.embedding_controller
+
+# Initialize Ragas components; 429s are retried by ragas rather than inside the OpenAI client, so the
+# controllers see them
+generator_llm = RecordingLLMWrapper(ChatOpenAI(model="gpt-4o", max_retries=0), call_stats, run_config=run_config,
+                                    controller=llm_controller)
+# Chunks embedded in earlier runs are read from the on-disk cache instead of being embedded again
+generator_embeddings = CachedEmbeddingsWrapper(OpenAIEmbeddings(max_retries=0), run_config=run_config,
+                                               call_stats=call_stats, controller=embedding_controller)
 generator = TestsetGenerator(llm=generator_llm, embedding_model=generator_embeddings)
 
+# Parsed documents of files processed before
+document_cache = DocumentCache()
+
+# Knowledge graphs built from document sets processed before
+knowledge_graph_cache = KnowledgeGraphCache()
+
+# Samples generated per call, each batch is checkpointed and shown as soon as it is ready
+TESTSET_BATCH_SIZE = 10
+
+# Fetched web pages, revalidated with conditional requests so unchanged pages are not downloaded again
+http_cache = HttpCache()
+
+
+def show_embedding_cache_stats():
+    stats = generator_embeddings.stats()
+    st.caption(f"Embedding cache: {stats['hit_ratio']:.0%} hit ratio ({stats['hits']} hits, {stats['misses']} misses), "
+               f"{stats['embedding_calls']} embedding calls, {stats['bytes_on_disk'] / 1024 / 1024:.1f} MB on disk")
+
+
+def show_estimate(estimate):
+    columns = st.columns(4)
+    columns[0].metric("Document tokens", f"{estimate['document_tokens']:,}")
+    columns[1].metric("LLM / embedding calls", f"{estimate['llm_calls']:,} / {estimate['embedding_calls']:,}")
+    columns[2].metric("Estimated time", f"{estimate['seconds'] / 60:.1f} min")
+    columns[3].metric("Estimated cost", f"${estimate['cost']:.2f}")
+
+
+def generate_dataset(documents, testset_size, estimate_only=False):
+    if drop_near_duplicates:
+        documents, report = remove_near_duplicates(documents, threshold=near_duplicate_threshold)
+        if report["dropped"]:
+            st.caption(f"Dropped {report['dropped']} of {report['documents']} documents as near-duplicates, "
+                       f"saving about {report['llm_calls_saved']} LLM calls ({report['dropped_tokens']} tokens)")
+
+    cache = knowledge_graph_cache if reuse_knowledge_graph else None
+    key = document_set_hash(documents, generator)
+    samples_done = len(TestsetCheckpoint(checkpoint_path(key)).load()[:testset_size]) if resume_generation else 0
+    estimate = estimate_generation(documents, testset_size, call_stats,
+                                   embedding_model=generator_embeddings.embeddings.model,
+                                   knowledge_graph_cached=cache is not None and cache.contains(key),
+                                   samples_done=samples_done, concurrency=int(llm_controller.concurrency.peak))
+    show_estimate(estimate)
+    if estimate_only:
+        return None
+
+    start_time = time.perf_counter()
+    call_stats.reset_calls()
+    llm_controller.reset_stats()
+    key, reused = prepare_generator(generator, documents, cache, run_config=run_config)
+    if reused:
+        st.caption(f"Knowledge graph reused from an earlier run, ready in {time.perf_counter() - start_time:.1f}s")
+
+    progress_bar = st.progress(0.0, text="Generating test data...")
+    preview = st.empty()
+    samples = []
+    for samples in generate_in_batches(generator, key, testset_size, batch_size=TESTSET_BATCH_SIZE, cache=cache,
+                                       resume=resume_generation, run_config=run_config):
+        progress_bar.progress(len(samples) / testset_size, text=f"{len(samples)} of {testset_size} samples")
+        if samples:
+            preview.dataframe(pd.DataFrame(samples))
+
+    seconds = time.perf_counter() - start_time
+    error = estimate_log.record(estimate, seconds, call_stats.calls["llm"], call_stats.calls["embedding"])
+    call_stats.save()
+    mean_error = estimate_log.mean_absolute_error()
+    st.caption(f"Took {seconds / 60:.1f} min for an estimate of {estimate['seconds'] / 60:.1f} min ({error:+.0%}), "
+               f"{call_stats.calls['llm']} LLM and {call_stats.calls['embedding']} embedding calls; "
+               f"mean estimate error over recent runs {mean_error:.0%}")
+    return pd.DataFrame(samples)
+
+
+def show_rate_limit_stats():
+    stats = llm_controller.stats()
+    st.caption(f"LLM calls: {stats['calls_per_minute']:.0f} per minute at a concurrency of {stats['concurrency']} "
+               f"(peak {stats['peak_concurrency']}), {stats['rate_limited']} rate limited")
+
+
+def show_generated_dataset(df):
+    st.success("Test data generated successfully!")
+    show_embedding_cache_stats()
+    show_rate_limit_stats()
+
+    # Download CSV
+    csv_file = df.to_csv(index=False).encode("utf-8")
+    st.download_button(
+        label="Download Test Data as CSV",
+        data=csv_file,
+        file_name="test_llm_apps_data.csv",
+        mime="text/csv",
+    )
+
+
 # Streamlit UI
 st.logo("./bot.png")
 st.title("Test Datasets Generator")
@@ -31,12 +162,29 @@ st.caption("To generate synthetic test datasets for evaluating your Chatbot AI a
 # Option to choose input method
 input_method = st.radio("Choose your input method:", ("Enter URL", "Upload Files"))
 
+reuse_knowledge_graph = st.checkbox(
+    "Reuse the knowledge graph of the same sources", value=True,
+    help="Skip extraction, embeddings and relationship building when the same documents were processed before"
+)
+drop_near_duplicates = st.checkbox(
+    "Drop near-duplicate pages", value=True,
+    help="Pages nearly identical to an earlier one, e.g. versioned copies, are not sent to the generator"
+)
+near_duplicate_threshold = st.slider(
+    "Near-duplicate similarity threshold:", min_value=0.5, max_value=1.0, value=0.8, step=0.05,
+    disabled=not drop_near_duplicates
+)
+resume_generation = st.checkbox(
+    "Resume from the last checkpoint", value=True,
+    help="Keep the samples of an interrupted run on the same sources and only generate the missing ones"
+)
+
 if input_method == "Enter URL":
     # Add a border to the URL input field using custom CSS
     st.markdown("""
         <style>
             /* Make the input field stand out with a border */
-            .stTextInput div>input {
+            .stTextInput div>input, .stTextArea textarea {
                 border: 2px solid #4CAF50;  /* Green border color */
                 border-radius: 5px;         /* Rounded corners */
                 padding: 10px;
@@ -45,49 +193,50 @@ if input_method == "Enter URL":
             }
 
             /* Add a box-shadow effect when input is focused */
-            .stTextInput div>input:focus {
+            .stTextInput div>input:focus, .stTextArea textarea:focus {
                 box-shadow: 0 0 5px 2px rgba(76, 175, 80, 0.5);  /* Green shadow */
                 border-color: #388E3C;  /* Darker green */
             }
         </style>
     """, unsafe_allow_html=True)
 
-    # URL input field
-    url = st.text_input("Enter the URL:")
+    # URL input field, one URL per line
+    urls = [url.strip() for url in st.text_area("Enter the URLs (one per line):").splitlines() if url.strip()]
+    same_site = st.checkbox("Follow links to other pages of the same site")
+    max_pages = st.number_input("Maximum number of pages:", min_value=1, max_value=200, value=20, step=1,
+                                disabled=not same_site)
 
     # Add the slider to select the number of test datasets
     num_test_datasets = st.slider(
         "Select the number of test datasets:", min_value=1, max_value=100, value=5, step=1
     )
 
-    if st.button("Generate Test Data"):
-        if url:
+    estimate_only = st.button("Estimate Cost and Time")
+    if st.button("Generate Test Data") or estimate_only:
+        if urls:
             try:
-                loader = WebBaseLoader(url)
-                documents = loader.load()
-                dataset = generator.generate_with_langchain_docs(documents, testset_size=num_test_datasets)
-                df = dataset.to_pandas()
-
-                st.success("Test data generated successfully!")
-                st.dataframe(df)
-
-                # Download CSV
-                csv_file = df.to_csv(index=False).encode("utf-8")
-                st.download_button(
-                    label="Download Test Data as CSV",
-                    data=csv_file,
-                    file_name="test_llm_apps_data.csv",
-                    mime="text/csv",
-                )
+                # Pages are fetched concurrently, a few at a time per host
+                documents, crawl_stats = crawl_urls(urls, same_site=same_site,
+                                                    max_pages=max_pages if same_site else len(urls),
+                                                    cache=http_cache)
+                for failed_url, error in crawl_stats["errors"]:
+                    st.error(f"{failed_url}: {error}")
+                st.caption(f"{len(documents)} pages loaded: {crawl_stats['fetched']} downloaded, "
+                           f"{crawl_stats['not_modified']} unchanged since the last run")
+                if not documents:
+                    raise ValueError("No page could be loaded from the given URLs.")
+                df = generate_dataset(documents, num_test_datasets, estimate_only)
+                if df is not None:
+                    show_generated_dataset(df)
             except Exception as e:
                 st.error(f"Error: {e}")
         else:
-            st.error("Please enter a valid URL.")
+            st.error("Please enter at least one valid URL.")
 
 elif input_method == "Upload Files":
     uploaded_files = st.file_uploader(
         "Upload files (docx, xlsx, pptx, pdf, csv, html):", 
-        type=["docx", "xlsx", "pptx", "pdf", "csv", "html"], 
+        type=SUPPORTED_FILE_TYPES,
         accept_multiple_files=True
     )
 
@@ -96,55 +245,28 @@ elif input_method == "Upload Files":
         "Select the number of test datasets:", min_value=1, max_value=100, value=5, step=1
     )
 
-    if st.button("Generate Test Data"):
+    estimate_only = st.button("Estimate Cost and Time")
+    if st.button("Generate Test Data") or estimate_only:
         if uploaded_files:
             documents = []
             try:
-                for uploaded_file in uploaded_files:
-                    # Save uploaded file to a temporary location
-                    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                        temp_file.write(uploaded_file.read())
-                        temp_file_path = temp_file.name
-
-                    # Determine file type and use the appropriate loader
-                    file_extension = uploaded_file.name.split(".")[-1].lower()
-                    if file_extension == "docx":
-                        loader = UnstructuredWordDocumentLoader(temp_file_path)
-                    elif file_extension == "xlsx":
-                        loader = UnstructuredExcelLoader(temp_file_path)
-                    elif file_extension == "pptx":
-                        loader = UnstructuredPowerPointLoader(temp_file_path)
-                    elif file_extension == "pdf":
-                        loader = PyPDFLoader(temp_file_path)
-                    elif file_extension == "csv":
-                        loader = UnstructuredCSVLoader(temp_file_path)
-                    elif file_extension == "html":
-                        loader = UnstructuredHTMLLoader(temp_file_path)
-                    else:
-                        st.error("Unsupported file format.")
+                # Parse the files in parallel, each one in its own worker process
+                parse_times = []
+                for file_name, file_documents, parse_time, error, cached in load_uploaded_files(
+                        uploaded_files, cache=document_cache):
+                    if error:
+                        st.error(f"{file_name}: {error}")
                         continue
-
-                    documents.extend(loader.load())
-
-                    # Clean up temporary file
-                    if os.path.exists(temp_file_path):
-                        os.remove(temp_file_path)
+                    documents.extend(file_documents)
+                    parse_times.append({"File": file_name, "Documents": len(file_documents),
+                                        "Parse Time (s)": round(parse_time, 2), "Cached": cached})
+                if parse_times:
+                    st.dataframe(parse_times)
 
                 if documents:
-                    dataset = generator.generate_with_langchain_docs(documents, testset_size=num_test_datasets)
-                    df = dataset.to_pandas()
-
-                    st.success("Test data generated successfully!")
-                    st.dataframe(df)
-
-                    # Download CSV
-                    csv_file = df.to_csv(index=False).encode("utf-8")
-                    st.download_button(
-                        label="Download Test Data as CSV",
-                        data=csv_file,
-                        file_name="test_llm_apps_data.csv",
-                        mime="text/csv",
-                    )
+                    df = generate_dataset(documents, num_test_datasets, estimate_only)
+                    if df is not None:
+                        show_generated_dataset(df)
                 else:
                     st.error("No documents could be loaded from the uploaded files.")
             except Exception as e:
@@ -0,0 +1,255 @@
+"""
+Headless, sharded generation of synthetic test datasets from a directory of documents or a list of URLs.
+
+Usage:
+    python -m ai_assistant_data_generation.dataset_batch --source-dir <docs_dir> --samples 10000 --output <output_dir>
+    python -m ai_assistant_data_generation.dataset_batch --urls <urls.txt> --samples 500 --output <output_dir>
+
+The OpenAI API key is read from the OPENAI_API_KEY environment variable. The knowledge graph of the sources is
+built once and cached; the samples are then generated by worker processes, each with its own seed, and every
+shard checkpoints its samples, so an interrupted run continues where it stopped when started again with the
+same output directory. The shards are merged, questions asked twice are dropped, and new shards make up for
+them until the sample count is reached; the dataset is written as Parquet, JSONL and CSV.
+"""
+import argparse
+import math
+import os
+import random
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+from ragas.run_config import RunConfig
+
+from ai_assistant_data_generation.document_loading import SUPPORTED_FILE_TYPES, get_file_type, load_file
+from ai_assistant_data_generation.knowledge_graph_cache import DEFAULT_CACHE_DIR, KnowledgeGraphCache, \
+    prepare_generator
+from ai_assistant_data_generation.near_duplicates import remove_near_duplicates
+from ai_assistant_data_generation.testset_checkpoint import TestsetCheckpoint, checkpoint_path, generate_in_batches
+
+DATASET_FILE_NAME = "test_dataset"
+CHECKPOINT_DIR_NAME = "shards"
+
+
+def create_generator(model="gpt-4o", embedding_model="text-embedding-ada-002"):
+    """
+    Create the ragas TestsetGenerator of the Streamlit page, with the on-disk embedding cache.
+    :param model: OpenAI chat model
+    :param embedding_model: OpenAI embedding model
+    :return: TestsetGenerator
+    """
+    from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+    from ragas.llms import LangchainLLMWrapper
+    from ragas.testset import TestsetGenerator
+
+    from ai_assistant_data_generation.embedding_cache import CachedEmbeddingsWrapper
+
+    return TestsetGenerator(llm=LangchainLLMWrapper(ChatOpenAI(model=model)),
+                            embedding_model=CachedEmbeddingsWrapper(OpenAIEmbeddings(model=embedding_model)))
+
+
+def load_source_dir(source_dir, max_workers=None):
+    """
+    Parse the supported files under a directory in a process pool.
+    :param source_dir: Directory to scan recursively
+    :param max_workers: Number of worker processes, defaults to the CPU count
+    :return: Tuple of the list of documents and the list of (file, error) pairs of the files that failed
+    """
+    files = sorted(os.path.join(root, file_name) for root, _, file_names in os.walk(source_dir)
+                   for file_name in file_names if get_file_type(file_name) in SUPPORTED_FILE_TYPES)
+
+    def read(path):
+        with open(path, "rb") as source_file:
+            return source_file.read()
+
+    documents, errors = [], []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(load_file, os.path.relpath(path, source_dir), read(path)) for path in files]
+        for future in futures:
+            file_name, file_documents, _, error = future.result()
+            if error:
+                errors.append((file_name, error))
+            documents.extend(file_documents)
+    return documents, errors
+
+
+def shard_sizes(samples, shards):
+    """
+    Split a sample count as evenly as possible over shards.
+    :param samples: Number of samples
+    :param shards: Number of shards
+    :return: List of the sample count of every shard
+    """
+    return [samples // shards + (1 if shard < samples % shards else 0) for shard in range(shards)]
+
+
+def generate_shard(make_generator, cache_dir, key, shard, samples, seed, checkpoint_dir, batch_size=10):
+    """
+    Generate the samples of one shard from the cached knowledge graph; runs in a worker process.
+    :param make_generator: Picklable function returning a TestsetGenerator
+    :param cache_dir: Directory of the KnowledgeGraphCache holding the graph of the sources
+    :param key: Document set hash of the sources
+    :param shard: Shard number
+    :param samples: Number of samples of the shard
+    :param seed: Seed of the shard, the ragas scenario and persona sampling depends on it
+    :param checkpoint_dir: Directory of the shard checkpoints
+    :param batch_size: Number of samples generated per call
+    :return: Number of samples in the shard checkpoint
+    """
+    random.seed(seed)
+    generator = make_generator()
+    cached = KnowledgeGraphCache(cache_dir).load(key)
+    if cached is None:
+        raise ValueError(f"The knowledge graph {key} is not in the cache.")
+    generator.knowledge_graph, generator.persona_list = cached
+    samples_done = []
+    # The shard checkpoints are merged into the dataset, they are kept once complete
+    for samples_done in generate_in_batches(generator, f"{key}-shard{shard}", samples, batch_size=batch_size,
+                                            checkpoint_dir=checkpoint_dir, clear_on_complete=False,
+                                            run_config=RunConfig(seed=seed)):
+        pass
+    return len(samples_done)
+
+
+def question_key(sample):
+    return " ".join(re.findall(r"\w+", str(sample.get("user_input", "")).lower()))
+
+
+def merge_shards(checkpoint_paths, samples):
+    """
+    Merge the samples of the shard checkpoints, dropping questions asked before in other words only by case,
+    spacing or punctuation.
+    :param checkpoint_paths: List of shard checkpoint paths, in shard order
+    :param samples: Maximum number of samples kept
+    :return: Tuple of the DataFrame of the samples and the number of duplicates dropped
+    """
+    seen = set()
+    merged = []
+    duplicates = 0
+    for path in checkpoint_paths:
+        for sample in TestsetCheckpoint(path).load():
+            key = question_key(sample)
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            merged.append(sample)
+    return pd.DataFrame(merged[:samples]), duplicates
+
+
+def write_dataset(df, output_dir):
+    """
+    Write the dataset as Parquet, JSONL and CSV.
+    :param df: DataFrame of the samples
+    :param output_dir: Output directory
+    :return: List of the written paths
+    """
+    base_path = os.path.join(output_dir, DATASET_FILE_NAME)
+    df.to_parquet(f"{base_path}.parquet", index=False)
+    df.to_json(f"{base_path}.jsonl", orient="records", lines=True, force_ascii=False)
+    df.to_csv(f"{base_path}.csv", index=False)
+    return [f"{base_path}.parquet", f"{base_path}.jsonl", f"{base_path}.csv"]
+
+
+def run_generation(documents, output_dir, samples, make_generator, shards=4, seed=42, oversample=0.1,
+                   batch_size=10, near_duplicate_threshold=0.8, cache_dir=DEFAULT_CACHE_DIR, max_rounds=3):
+    """
+    Generate a test dataset from documents with sharded worker processes. When more questions than the oversample
+    are dropped as duplicates, further rounds of new shards, with new seeds, generate the missing samples.
+    :param documents: List of LangChain documents
+    :param output_dir: Directory receiving the shard checkpoints and the dataset files
+    :param samples: Number of samples of the dataset
+    :param make_generator: Picklable function returning a TestsetGenerator, called once per process
+    :param shards: Number of worker processes
+    :param seed: Base seed, shard n uses seed + n
+    :param oversample: Share of extra samples generated to make up for the duplicates dropped at merge time
+    :param batch_size: Number of samples generated per call
+    :param near_duplicate_threshold: Jaccard threshold of near-duplicate documents, None to keep them all
+    :param cache_dir: Directory of the KnowledgeGraphCache
+    :param max_rounds: Maximum number of generation rounds, the first one included
+    :return: Dictionary with the run statistics; shortfall is the number of samples still missing after the last
+        round
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    start_time = time.perf_counter()
+    if near_duplicate_threshold is not None:
+        documents, _ = remove_near_duplicates(documents, threshold=near_duplicate_threshold)
+    # The graph is built once here, the shards read it from the cache
+    key, _ = prepare_generator(make_generator(), documents, KnowledgeGraphCache(cache_dir))
+
+    checkpoint_dir = os.path.join(output_dir, CHECKPOINT_DIR_NAME)
+    df, duplicates = pd.DataFrame(), 0
+    generated = rounds = 0
+    # Round r runs shards r * shards to (r + 1) * shards - 1; the sizes of a round only depend on the samples
+    # merged before it, so a resumed run finds the same shards in their checkpoints
+    while len(df) < samples and rounds < max_rounds:
+        first_shard = rounds * shards
+        sizes = shard_sizes(math.ceil((samples - len(df)) * (1 + oversample)), shards)
+        with ProcessPoolExecutor(max_workers=shards) as executor:
+            futures = [executor.submit(generate_shard, make_generator, cache_dir, key, first_shard + shard, size,
+                                       seed + first_shard + shard, checkpoint_dir, batch_size)
+                       for shard, size in enumerate(sizes) if size]
+            generated += sum(future.result() for future in futures)
+        rounds += 1
+        df, duplicates = merge_shards([checkpoint_path(f"{key}-shard{shard}", checkpoint_dir)
+                                       for shard in range(rounds * shards)], samples)
+    paths = write_dataset(df, output_dir)
+    elapsed_minutes = (time.perf_counter() - start_time) / 60
+    return {
+        "documents": len(documents),
+        "generated": generated,
+        "duplicates": duplicates,
+        "samples": len(df),
+        "rounds": rounds,
+        "shortfall": samples - len(df),
+        "paths": paths,
+        "samples_per_minute": len(df) / elapsed_minutes if elapsed_minutes else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic test dataset from documents or web pages.")
+    sources = parser.add_mutually_exclusive_group(required=True)
+    sources.add_argument("--source-dir", help="Directory containing the source documents")
+    sources.add_argument("--urls", help="Text file with one URL per line")
+    parser.add_argument("--same-site", action="store_true", help="Follow links to other pages of the same site")
+    parser.add_argument("--max-pages", type=int, default=200, help="Maximum number of pages crawled")
+    parser.add_argument("--samples", type=int, required=True, help="Number of samples of the dataset")
+    parser.add_argument("--output", required=True, help="Output directory, reused to resume an interrupted run")
+    parser.add_argument("--shards", type=int, default=4, help="Number of generation processes")
+    parser.add_argument("--seed", type=int, default=42, help="Base seed, shard n uses seed + n")
+    parser.add_argument("--model", default="gpt-4o", help="OpenAI chat model")
+    parser.add_argument("--embedding-model", default="text-embedding-ada-002", help="OpenAI embedding model")
+    args = parser.parse_args()
+
+    if args.source_dir:
+        documents, errors = load_source_dir(args.source_dir)
+    else:
+        from ai_assistant_data_generation.web_crawler import HttpCache, crawl_urls
+
+        with open(args.urls, encoding="utf-8") as urls_file:
+            urls = [line.strip() for line in urls_file if line.strip()]
+        documents, crawl_stats = crawl_urls(urls, same_site=args.same_site,
+                                            max_pages=args.max_pages if args.same_site else len(urls),
+                                            cache=HttpCache())
+        errors = crawl_stats["errors"]
+    for source, error in errors:
+        print(f"Skipped {source}: {error}")
+    if not documents:
+        parser.error("No documents could be loaded from the sources.")
+
+    stats = run_generation(documents, args.output, args.samples,
+                           partial(create_generator, args.model, args.embedding_model), shards=args.shards,
+                           seed=args.seed)
+    print(f"{stats['samples']} sample(s) from {stats['documents']} document(s), {stats['duplicates']} duplicate "
+          f"question(s) dropped, written to {', '.join(stats['paths'])}")
+    if stats["shortfall"]:
+        print(f"Warning: {stats['shortfall']} sample(s) short of {args.samples} after {stats['rounds']} round(s), "
+              f"the sources yield too many duplicate questions")
+    print(f"Throughput: {stats['samples_per_minute']:.1f} samples/minute")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from importlib import metadata
+
+from langchain_core.documents import Document
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "documents")
+
+# Bump when the stored format or the loading code changes
+CACHE_FORMAT_VERSION = 1
+
+# Upgrading any of these packages may change the parsed documents, so their versions are part of the key
+LOADER_PACKAGES = ["langchain-community", "unstructured", "pypdf"]
+
+
+def loader_version():
+    """
+    Version string of the document loading stack.
+    :return: Cache format version and installed loader package versions
+    """
+    versions = [f"format={CACHE_FORMAT_VERSION}"]
+    for package in LOADER_PACKAGES:
+        try:
+            versions.append(f"{package}={metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            versions.append(f"{package}=none")
+    return ";".join(versions)
+
+
+class DocumentCache:
+    """
+    On-disk cache of parsed LangChain documents, keyed by the hash of the source content, the loader type and
+    the loader version. Entries are gzipped JSON files; a hit refreshes the file modification time, and the
+    least recently used entries are evicted once the cache grows beyond ``max_bytes``. Entries written by another
+    loader version are never hit again and age out the same way.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=512 * 1024 * 1024, version=None):
+        """
+        :param cache_dir: Cache directory
+        :param max_bytes: Maximum total size of the cache entries
+        :param version: Loader version, defaults to loader_version()
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = version or loader_version()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, content, loader_type):
+        content_hash = hashlib.sha256(content).hexdigest()
+        key = hashlib.sha256(f"{self.version}|{loader_type}|{content_hash}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json.gz")
+
+    def get(self, content, loader_type, max_age=None):
+        """
+        Get the cached documents of a source.
+        :param content: Bytes of the source (file content, or the URL for web pages)
+        :param loader_type: Loader type, e.g. the file extension or "web"
+        :param max_age: Maximum age in seconds of the entry, for sources that can change behind the same key
+        :return: List of documents, or None on a miss
+        """
+        entry_path = self._entry_path(content, loader_type)
+        try:
+            with gzip.open(entry_path, "rt", encoding="utf-8") as entry_file:
+                entry = json.load(entry_file)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if max_age is not None and time.time() - entry["created"] > max_age:
+            self.misses += 1
+            return None
+        try:
+            os.utime(entry_path)  # Mark as recently used
+        except FileNotFoundError:
+            pass  # Evicted meanwhile by another session
+        self.hits += 1
+        return [Document(page_content=document["page_content"], metadata=document["metadata"])
+                for document in entry["documents"]]
+
+    def put(self, content, loader_type, documents):
+        """
+        Store the parsed documents of a source and evict the least recently used entries beyond the size limit.
+        :param content: Bytes of the source
+        :param loader_type: Loader type
+        :param documents: List of documents
+        :return: None
+        """
+        entry_path = self._entry_path(content, loader_type)
+        entry = {
+            "version": self.version,
+            "loader_type": loader_type,
+            "created": time.time(),
+            "documents": [{"page_content": document.page_content, "metadata": document.metadata}
+                          for document in documents],
+        }
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as entry_file:
+            json.dump(entry, entry_file, default=str)
+        os.replace(temp_path, entry_path)
+        self.evict()
+
+    def size(self):
+        return sum(entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json.gz"))
+
+    def evict(self):
+        """
+        Delete the least recently used entries until the cache fits in ``max_bytes``.
+        :return: Number of entries deleted
+        """
+        entries = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                         for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json.gz"))
+        total_size = sum(size for _, size, _ in entries)
+        deleted = 0
+        for _, size, path in entries:
+            if total_size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+            deleted += 1
+        return deleted
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from langchain_community.document_loaders import (
+    UnstructuredExcelLoader,
+    UnstructuredWordDocumentLoader,
+    UnstructuredPowerPointLoader,
+    UnstructuredHTMLLoader,
+    UnstructuredCSVLoader,
+    UnstructuredFileIOLoader,
+    PyPDFLoader,
+)
+from langchain_community.document_loaders.parsers.pdf import PyPDFParser
+from langchain_core.documents.base import Blob
+
+# Path based loaders, used when a file cannot be parsed from memory
+FILE_LOADERS = {
+    "docx": UnstructuredWordDocumentLoader,
+    "xlsx": UnstructuredExcelLoader,
+    "pptx": UnstructuredPowerPointLoader,
+    "pdf": PyPDFLoader,
+    "csv": UnstructuredCSVLoader,
+    "html": UnstructuredHTMLLoader,
+}
+
+SUPPORTED_FILE_TYPES = list(FILE_LOADERS)
+
+
+def get_file_type(file_name):
+    return file_name.split(".")[-1].lower()
+
+
+def _load_from_memory(file_name, content):
+    if get_file_type(file_name) == "pdf":
+        # Same parser and metadata as PyPDFLoader, without the file on disk
+        return list(PyPDFParser().lazy_parse(Blob.from_data(content, path=file_name)))
+    documents = UnstructuredFileIOLoader(BytesIO(content), mode="single", metadata_filename=file_name).load()
+    for document in documents:
+        document.metadata.setdefault("source", file_name)
+    return documents
+
+
+def _load_from_temp_file(file_name, content):
+    # The temporary directory is removed even when the loader raises
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_file_path = os.path.join(temp_dir, os.path.basename(file_name))
+        with open(temp_file_path, "wb") as temp_file:
+            temp_file.write(content)
+        documents = FILE_LOADERS[get_file_type(file_name)](temp_file_path).load()
+    for document in documents:
+        document.metadata["source"] = file_name
+    return documents
+
+
+def load_file(file_name, content):
+    """
+    Parse one uploaded file into LangChain documents; runs in a worker process.
+    :param file_name: Name of the uploaded file, its extension selects the loader
+    :param content: Bytes of the file
+    :return: Tuple of the file name, list of documents, parse time in seconds and error message (None on success)
+    """
+    start_time = time.perf_counter()
+    if get_file_type(file_name) not in FILE_LOADERS:
+        return file_name, [], 0.0, "Unsupported file format."
+    try:
+        try:
+            documents = _load_from_memory(file_name, content)
+        except Exception:
+            # File type detection from a stream is not always possible, fall back to the loader of the extension
+            documents = _load_from_temp_file(file_name, content)
+        return file_name, documents, time.perf_counter() - start_time, None
+    except Exception as e:
+        return file_name, [], time.perf_counter() - start_time, str(e)
+
+
+def load_uploaded_files(uploaded_files, max_workers=None, cache=None):
+    """
+    Parse uploaded files in parallel in a process pool, so several files take about as long as the slowest one.
+    :param uploaded_files: Streamlit uploaded files (anything with a name and getvalue)
+    :param max_workers: Number of worker processes, defaults to one per file up to the CPU count
+    :param cache: Optional DocumentCache, files parsed before are not parsed again
+    :return: List of (file name, documents, parse time in seconds, error message, cached) tuples in upload order
+    """
+    files = [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files]
+    results = [None] * len(files)
+    pending = []
+    for position, (file_name, content) in enumerate(files):
+        start_time = time.perf_counter()
+        documents = cache.get(content, get_file_type(file_name)) if cache is not None else None
+        if documents is not None:
+            results[position] = (file_name, documents, time.perf_counter() - start_time, None, True)
+        else:
+            pending.append(position)
+
+    if len(pending) == 1:
+        loaded = [load_file(*files[pending[0]])]
+    elif pending:
+        max_workers = max_workers or min(len(pending), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            loaded = list(executor.map(load_file, *zip(*[files[position] for position in pending])))
+    else:
+        loaded = []
+
+    for position, (file_name, documents, parse_time, error) in zip(pending, loaded):
+        if cache is not None and error is None:
+            cache.put(files[position][1], get_file_type(file_name), documents)
+        results[position] = (file_name, documents, parse_time, error, False)
+    return results
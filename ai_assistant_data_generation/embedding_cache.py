@@ -0,0 +1,225 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from ragas.embeddings import LangchainEmbeddingsWrapper
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "embeddings")
+
+# SQLite limits the number of bound parameters of a statement
+LOOKUP_CHUNK_SIZE = 900
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Persistent embedding vectors of one embedding model: a memory-mapped float32 matrix, one row per text, and
+    a SQLite index from the text hash to its row. The matrix grows by doubling its capacity.
+    """
+
+    def __init__(self, cache_dir, initial_capacity=1024):
+        """
+        :param cache_dir: Directory of the store, one per embedding model
+        :param initial_capacity: Number of rows allocated when the matrix is created
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.vectors_path = os.path.join(cache_dir, "vectors.f32")
+        self.index_path = os.path.join(cache_dir, "index.sqlite")
+        self.initial_capacity = initial_capacity
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS rows (hash TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._connection.commit()
+        meta = dict(self._connection.execute("SELECT key, value FROM meta"))
+        self.dimension = meta.get("dimension")
+        self.capacity = meta.get("capacity", 0)
+        self.count = self._connection.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+        self._matrix = None
+        if self.dimension:
+            self._open_matrix()
+
+    def _open_matrix(self):
+        self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(self.capacity,
+                                                                                       self.dimension))
+
+    def _reserve(self, rows):
+        # Grow the file, the memmap has to be re-opened to see the new size
+        if self.count + rows <= self.capacity:
+            return
+        capacity = max(self.capacity, self.initial_capacity)
+        while capacity < self.count + rows:
+            capacity *= 2
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self.vectors_path, "ab") as vectors_file:
+            vectors_file.truncate(capacity * self.dimension * 4)
+        self.capacity = capacity
+        self._connection.execute("INSERT OR REPLACE INTO meta VALUES ('capacity', ?)", (capacity,))
+        self._open_matrix()
+
+    def lookup(self, hashes):
+        """
+        Find the rows of the given text hashes.
+        :param hashes: List of text hashes
+        :return: Dictionary of text hash to row, for the cached ones
+        """
+        rows = {}
+        unique_hashes = list(dict.fromkeys(hashes))
+        with self._lock:
+            for start in range(0, len(unique_hashes), LOOKUP_CHUNK_SIZE):
+                chunk = unique_hashes[start:start + LOOKUP_CHUNK_SIZE]
+                rows.update(self._connection.execute(
+                    f"SELECT hash, row FROM rows WHERE hash IN ({','.join('?' * len(chunk))})", chunk))
+        return rows
+
+    def get(self, rows):
+        """
+        Read vectors by row.
+        :param rows: List of rows
+        :return: List of vectors as lists of floats
+        """
+        if not rows:
+            return []
+        with self._lock:
+            return self._matrix[rows].tolist()
+
+    def add(self, hashes, vectors):
+        """
+        Append the vectors of new texts; the index is committed only after the vectors are flushed to disk.
+        :param hashes: List of text hashes
+        :param vectors: List of vectors
+        :return: None
+        """
+        if not hashes:
+            return
+        with self._lock:
+            known = self.lookup(hashes)
+            new_items = [(text_hash_value, vector) for text_hash_value, vector in zip(hashes, vectors)
+                         if text_hash_value not in known]
+            new_items = list(dict(new_items).items())
+            if not new_items:
+                return
+            if self.dimension is None:
+                self.dimension = len(new_items[0][1])
+                self._connection.execute("INSERT OR REPLACE INTO meta VALUES ('dimension', ?)", (self.dimension,))
+            self._reserve(len(new_items))
+            first_row = self.count
+            self._matrix[first_row:first_row + len(new_items)] = np.asarray([vector for _, vector in new_items],
+                                                                            dtype=np.float32)
+            self._matrix.flush()
+            self._connection.executemany("INSERT INTO rows VALUES (?, ?)",
+                                         [(text_hash_value, first_row + offset)
+                                          for offset, (text_hash_value, _) in enumerate(new_items)])
+            self._connection.commit()
+            self.count += len(new_items)
+
+    def bytes_on_disk(self):
+        return sum(os.path.getsize(path) for path in (self.vectors_path, self.index_path) if os.path.exists(path))
+
+    def close(self):
+        if self._matrix is not None:
+            self._matrix.flush()
+        self._connection.close()
+
+
+class CachedEmbeddingsWrapper(LangchainEmbeddingsWrapper):
+    """
+    Ragas embeddings wrapper backed by a persistent EmbeddingStore: cached texts are looked up in one batch and
+    only the missing ones are sent to the embedding model, in batches. A run over an already embedded corpus
+    makes no embedding calls.
+    """
+
+    def __init__(self, embeddings, cache_dir=DEFAULT_CACHE_DIR, batch_size=256, run_config=None, call_stats=None,
+                 controller=None):
+        """
+        :param embeddings: LangChain embeddings, e.g. OpenAIEmbeddings()
+        :param cache_dir: Root cache directory, a store is kept per embedding model
+        :param batch_size: Maximum number of texts per embedding call
+        :param run_config: Ragas run configuration
+        :param call_stats: Optional CallStats recording the latency of the embedding calls
+        :param controller: Optional RateLimitController of the embedding provider, for the asynchronous calls
+        """
+        super().__init__(embeddings, run_config=run_config)
+        self.call_stats = call_stats
+        self.controller = controller
+        model_name = getattr(embeddings, "model", None) or embeddings.__class__.__name__
+        namespace = hashlib.sha256(f"{embeddings.__class__.__name__}|{model_name}".encode("utf-8")).hexdigest()[:16]
+        self.store = EmbeddingStore(os.path.join(cache_dir, namespace))
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self.embedding_calls = 0
+
+    def _split(self, texts):
+        hashes = [text_hash(text) for text in texts]
+        rows = self.store.lookup(hashes)
+        missing = list(dict.fromkeys(text for text, text_hash_value in zip(texts, hashes)
+                                     if text_hash_value not in rows))
+        hits = sum(1 for text_hash_value in hashes if text_hash_value in rows)
+        self.hits += hits
+        self.misses += len(texts) - hits
+        return hashes, missing
+
+    def _record_call(self, batch, seconds):
+        self.embedding_calls += 1
+        if self.call_stats is not None:
+            # Rough token count, the exact one is not worth a tokenizer pass over every chunk
+            self.call_stats.record("embedding", seconds, sum(len(text) for text in batch) // 4)
+
+    def _result(self, hashes):
+        rows = self.store.lookup(hashes)
+        return self.store.get([rows[text_hash_value] for text_hash_value in hashes])
+
+    def embed_documents(self, texts):
+        hashes, missing = self._split(texts)
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            start_time = time.perf_counter()
+            vectors = self.embeddings.embed_documents(batch)
+            self._record_call(batch, time.perf_counter() - start_time)
+            self.store.add([text_hash(text) for text in batch], vectors)
+        return self._result(hashes)
+
+    async def aembed_documents(self, texts):
+        hashes, missing = self._split(texts)
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            if self.controller is None:
+                start_time = time.perf_counter()
+                vectors = await self.embeddings.aembed_documents(batch)
+                self._record_call(batch, time.perf_counter() - start_time)
+            else:
+                async with self.controller.slot(sum(len(text) for text in batch) // 4):
+                    start_time = time.perf_counter()
+                    vectors = await self.embeddings.aembed_documents(batch)
+                    self._record_call(batch, time.perf_counter() - start_time)
+            self.store.add([text_hash(text) for text in batch], vectors)
+        return self._result(hashes)
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
+
+    def stats(self):
+        """
+        Cache statistics of this wrapper.
+        :return: Dictionary with hits, misses, hit ratio, embedding calls and bytes on disk
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "embedding_calls": self.embedding_calls,
+            "bytes_on_disk": self.store.bytes_on_disk(),
+        }
@@ -0,0 +1,234 @@
+import json
+import math
+import os
+import threading
+import time
+
+from ragas.llms import LangchainLLMWrapper
+
+from ai_assistant.requirement_store import count_tokens
+from ai_assistant_data_generation.near_duplicates import RAGAS_CHUNK_TOKENS, estimate_extraction_calls
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache")
+DEFAULT_STATS_PATH = os.path.join(CACHE_DIR, "call_stats.json")
+DEFAULT_ESTIMATE_LOG_PATH = os.path.join(CACHE_DIR, "generation_estimates.jsonl")
+
+# Used until calls of the kind have been recorded
+DEFAULT_CALL_STATS = {
+    "llm": {"latency": 4.0, "input_tokens": 900, "output_tokens": 250},
+    "embedding": {"latency": 0.4, "input_tokens": 400, "output_tokens": 0},
+}
+
+# Weight of a new call in the running averages, recent calls count more as providers get faster or slower
+SMOOTHING = 0.05
+
+# USD per million input and output tokens
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4": (30.00, 60.00),
+    "text-embedding-ada-002": (0.10, 0.0),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+# Scenario, query and reference answer generation of one ragas sample
+SYNTHESIS_CALLS_PER_SAMPLE = 3
+
+
+class CallStats:
+    """
+    Running averages of the latency and token usage of LLM and embedding calls, kept on disk across runs, and
+    the number of calls made in the current run.
+    """
+
+    def __init__(self, path=DEFAULT_STATS_PATH):
+        """
+        :param path: JSON file of the averages
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as stats_file:
+                self.averages = json.load(stats_file)
+        except (OSError, ValueError):
+            self.averages = {}
+        self.calls = {"llm": 0, "embedding": 0}
+
+    def record(self, kind, seconds, input_tokens=0, output_tokens=0):
+        """
+        Record one call.
+        :param kind: "llm" or "embedding"
+        :param seconds: Latency of the call
+        :param input_tokens: Input tokens of the call
+        :param output_tokens: Output tokens of the call
+        :return: None
+        """
+        values = {"latency": seconds, "input_tokens": input_tokens, "output_tokens": output_tokens}
+        with self._lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+            averages = self.averages.get(kind)
+            if averages is None:
+                self.averages[kind] = dict(values, count=1)
+                return
+            for name, value in values.items():
+                averages[name] += SMOOTHING * (value - averages[name])
+            averages["count"] += 1
+
+    def mean(self, kind):
+        return self.averages.get(kind, DEFAULT_CALL_STATS[kind])
+
+    def reset_calls(self):
+        self.calls = {"llm": 0, "embedding": 0}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with self._lock, open(temp_path, "w", encoding="utf-8") as stats_file:
+            json.dump(self.averages, stats_file, indent=1)
+        os.replace(temp_path, self.path)
+
+
+def _token_usage(result):
+    usage = (result.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    input_tokens = output_tokens = 0
+    for generations in result.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            input_tokens += metadata.get("input_tokens", 0)
+            output_tokens += metadata.get("output_tokens", 0)
+    return input_tokens, output_tokens
+
+
+class RecordingLLMWrapper(LangchainLLMWrapper):
+    """
+    Ragas LLM wrapper recording the latency and token usage of every call in CallStats, and optionally passing
+    the asynchronous calls through a RateLimitController.
+    """
+
+    def __init__(self, langchain_llm, call_stats, run_config=None, controller=None):
+        """
+        :param langchain_llm: LangChain chat model
+        :param call_stats: CallStats receiving the calls
+        :param run_config: Ragas run configuration
+        :param controller: Optional RateLimitController of the LLM provider
+        """
+        super().__init__(langchain_llm, run_config=run_config)
+        self.call_stats = call_stats
+        self.controller = controller
+
+    def generate_text(self, prompt, n=1, temperature=None, stop=None, callbacks=None):
+        start_time = time.perf_counter()
+        result = super().generate_text(prompt, n=n, temperature=temperature, stop=stop, callbacks=callbacks)
+        self.call_stats.record("llm", time.perf_counter() - start_time, *_token_usage(result))
+        return result
+
+    async def agenerate_text(self, prompt, n=1, temperature=None, stop=None, callbacks=None):
+        if self.controller is None:
+            start_time = time.perf_counter()
+            result = await super().agenerate_text(prompt, n=n, temperature=temperature, stop=stop,
+                                                  callbacks=callbacks)
+            self.call_stats.record("llm", time.perf_counter() - start_time, *_token_usage(result))
+            return result
+
+        estimated_tokens = len(prompt.to_string()) // 4 + n * round(self.call_stats.mean("llm")["output_tokens"])
+        async with self.controller.slot(estimated_tokens):
+            start_time = time.perf_counter()
+            result = await super().agenerate_text(prompt, n=n, temperature=temperature, stop=stop,
+                                                  callbacks=callbacks)
+            seconds = time.perf_counter() - start_time
+        input_tokens, output_tokens = _token_usage(result)
+        self.call_stats.record("llm", seconds, input_tokens, output_tokens)
+        if input_tokens or output_tokens:
+            self.controller.tokens.adjust(input_tokens + output_tokens - estimated_tokens)
+        return result
+
+
+def estimate_generation(documents, testset_size, call_stats, llm_model="gpt-4o",
+                        embedding_model="text-embedding-ada-002", knowledge_graph_cached=False, samples_done=0,
+                        concurrency=16, num_personas=3):
+    """
+    Estimate the calls, wall time and cost of a test set generation without running it.
+
+    The knowledge graph costs the extraction calls of the ragas default transforms and one embedding per
+    summary and chunk; every sample costs SYNTHESIS_CALLS_PER_SAMPLE LLM calls. Latencies and tokens per call
+    are the averages recorded in earlier runs.
+    :param documents: List of LangChain documents
+    :param testset_size: Number of samples to generate
+    :param call_stats: CallStats of earlier runs
+    :param llm_model: Model name of the generator LLM, for the price
+    :param embedding_model: Model name of the embeddings, for the price
+    :param knowledge_graph_cached: The knowledge graph of the documents is cached and is not built again
+    :param samples_done: Samples already in the checkpoint, they are not generated again
+    :param concurrency: Number of concurrent calls, the ragas max_workers
+    :param num_personas: Number of personas generated with a new knowledge graph
+    :return: Dictionary with the document tokens, calls, tokens, seconds and cost of the run
+    """
+    document_tokens = [count_tokens(document.page_content, llm_model) for document in documents]
+    llm_calls = SYNTHESIS_CALLS_PER_SAMPLE * max(0, testset_size - samples_done)
+    embedding_calls = 0
+    if not knowledge_graph_cached:
+        llm_calls += sum(estimate_extraction_calls(tokens) for tokens in document_tokens) + num_personas
+        embedding_calls = sum(1 + math.ceil(tokens / RAGAS_CHUNK_TOKENS) for tokens in document_tokens
+                              if tokens > 100)
+
+    llm_stats, embedding_stats = call_stats.mean("llm"), call_stats.mean("embedding")
+    llm_input_tokens = llm_calls * llm_stats["input_tokens"]
+    llm_output_tokens = llm_calls * llm_stats["output_tokens"]
+    embedding_tokens = embedding_calls * embedding_stats["input_tokens"]
+    seconds = (llm_calls * llm_stats["latency"] + embedding_calls * embedding_stats["latency"]) / concurrency
+
+    llm_prices = MODEL_PRICES.get(llm_model, (0.0, 0.0))
+    embedding_prices = MODEL_PRICES.get(embedding_model, (0.0, 0.0))
+    cost = (llm_input_tokens * llm_prices[0] + llm_output_tokens * llm_prices[1]
+            + embedding_tokens * embedding_prices[0]) / 1_000_000
+    return {
+        "document_tokens": sum(document_tokens),
+        "llm_calls": llm_calls,
+        "embedding_calls": embedding_calls,
+        "llm_input_tokens": round(llm_input_tokens),
+        "llm_output_tokens": round(llm_output_tokens),
+        "embedding_tokens": round(embedding_tokens),
+        "seconds": seconds,
+        "cost": cost,
+    }
+
+
+class EstimateLog:
+    """
+    JSONL log of estimates and the actual runs they predicted, to track the prediction error.
+    """
+
+    def __init__(self, path=DEFAULT_ESTIMATE_LOG_PATH):
+        self.path = path
+
+    def record(self, estimate, seconds, llm_calls, embedding_calls):
+        """
+        Log the outcome of an estimated run.
+        :param estimate: Dictionary returned by estimate_generation
+        :param seconds: Actual wall time
+        :param llm_calls: Actual LLM calls
+        :param embedding_calls: Actual embedding calls
+        :return: Relative error of the wall time estimate, positive when the run took longer than estimated
+        """
+        error = (seconds - estimate["seconds"]) / seconds if seconds else 0.0
+        entry = {"time": time.time(), "estimate": estimate, "seconds": seconds, "llm_calls": llm_calls,
+                 "embedding_calls": embedding_calls, "error": error}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as log_file:
+            log_file.write(json.dumps(entry) + "\n")
+        return error
+
+    def mean_absolute_error(self, last=20):
+        """
+        :param last: Number of most recent runs considered
+        :return: Mean absolute relative error of the wall time estimates, or None without runs
+        """
+        try:
+            with open(self.path, encoding="utf-8") as log_file:
+                errors = [json.loads(line)["error"] for line in log_file if line.strip()][-last:]
+        except (OSError, ValueError):
+            return None
+        return sum(abs(error) for error in errors) / len(errors) if errors else None
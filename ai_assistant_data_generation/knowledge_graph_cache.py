@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from importlib import metadata
+
+from ragas.run_config import RunConfig
+from ragas.testset.graph import KnowledgeGraph, Node, NodeType
+from ragas.testset.persona import Persona
+from ragas.testset.transforms import apply_transforms, default_transforms
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "knowledge_graphs")
+
+# Bump when the way the knowledge graph is built changes
+CACHE_FORMAT_VERSION = 1
+
+
+def _model_name(wrapper):
+    # Ragas wrappers keep the LangChain model in .langchain_llm or .embeddings
+    model = getattr(wrapper, "langchain_llm", None) or getattr(wrapper, "embeddings", None)
+    return getattr(model, "model_name", None) or getattr(model, "model", None) or type(model).__name__
+
+
+def document_set_hash(documents, generator=None):
+    """
+    Hash of a set of documents, independent of their order, and of what the knowledge graph built from them
+    depends on: the ragas version and the generator models.
+    :param documents: List of LangChain documents
+    :param generator: Ragas TestsetGenerator, its LLM and embedding model are part of the hash
+    :return: Hex digest
+    """
+    document_hashes = sorted(
+        hashlib.sha256(json.dumps([document.page_content, document.metadata], sort_keys=True,
+                                  default=str).encode("utf-8")).hexdigest()
+        for document in documents)
+    key = [f"format={CACHE_FORMAT_VERSION}", f"ragas={metadata.version('ragas')}"]
+    if generator is not None:
+        key += [f"llm={_model_name(generator.llm)}", f"embeddings={_model_name(generator.embedding_model)}"]
+    return hashlib.sha256("|".join(key + document_hashes).encode("utf-8")).hexdigest()
+
+
+def build_knowledge_graph(generator, documents, run_config=None):
+    """
+    Build the knowledge graph of documents the way TestsetGenerator.generate_with_langchain_docs does:
+    extraction, embeddings and relationship building with the default transforms.
+    :param generator: Ragas TestsetGenerator
+    :param documents: List of LangChain documents
+    :param run_config: Optional ragas run configuration of the transforms, e.g. their number of workers
+    :return: Knowledge graph
+    """
+    nodes = [Node(type=NodeType.DOCUMENT, properties={"page_content": document.page_content,
+                                                      "document_metadata": document.metadata})
+             for document in documents]
+    knowledge_graph = KnowledgeGraph(nodes=nodes)
+    transforms = default_transforms(documents=list(documents), llm=generator.llm,
+                                    embedding_model=generator.embedding_model)
+    apply_transforms(knowledge_graph, transforms, run_config=run_config or RunConfig())
+    return knowledge_graph
+
+
+class KnowledgeGraphCache:
+    """
+    On-disk cache of the ragas knowledge graphs built for document sets, together with the personas generated
+    from them, so another test set from the same sources goes straight to synthesis.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        """
+        :param cache_dir: Cache directory, one sub directory per document set
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def contains(self, key):
+        return os.path.exists(os.path.join(self._entry_dir(key), "graph.json"))
+
+    def load(self, key):
+        """
+        Load the knowledge graph and personas of a document set.
+        :param key: Document set hash
+        :return: Tuple of the knowledge graph and the list of personas (None if not generated yet), or None on a miss
+        """
+        entry_dir = self._entry_dir(key)
+        try:
+            knowledge_graph = KnowledgeGraph.load(os.path.join(entry_dir, "graph.json"))
+        except (OSError, ValueError, KeyError):
+            return None
+        personas = None
+        try:
+            with open(os.path.join(entry_dir, "personas.json"), encoding="utf-8") as personas_file:
+                personas = [Persona(**persona) for persona in json.load(personas_file)]
+        except (OSError, ValueError):
+            pass
+        return knowledge_graph, personas
+
+    def save(self, key, knowledge_graph, personas=None):
+        """
+        Store the knowledge graph of a document set; the entry is written to a temporary directory first, so a
+        crash never leaves a half written graph behind.
+        :param key: Document set hash
+        :param knowledge_graph: Knowledge graph
+        :param personas: Optional list of personas generated from the graph
+        :return: None
+        """
+        temp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix=f".{key}.")
+        try:
+            knowledge_graph.save(os.path.join(temp_dir, "graph.json"))
+            if personas:
+                with open(os.path.join(temp_dir, "personas.json"), "w", encoding="utf-8") as personas_file:
+                    json.dump([persona.model_dump() for persona in personas], personas_file)
+            entry_dir = self._entry_dir(key)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(temp_dir, entry_dir)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def save_personas(self, key, personas):
+        entry_dir = self._entry_dir(key)
+        temp_path = os.path.join(entry_dir, f"personas.json.{os.getpid()}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as personas_file:
+            json.dump([persona.model_dump() for persona in personas], personas_file)
+        os.replace(temp_path, os.path.join(entry_dir, "personas.json"))
+
+
+def prepare_generator(generator, documents, cache=None, run_config=None):
+    """
+    Give the generator the knowledge graph of the documents, from the cache when the same document set was
+    processed before, and built and cached otherwise.
+    :param generator: Ragas TestsetGenerator
+    :param documents: List of LangChain documents
+    :param cache: Optional KnowledgeGraphCache
+    :param run_config: Optional ragas run configuration of the transforms
+    :return: Tuple of the document set hash and whether the knowledge graph came from the cache
+    """
+    key = document_set_hash(documents, generator)
+    cached = cache.load(key) if cache is not None else None
+    if cached is not None:
+        generator.knowledge_graph, generator.persona_list = cached
+        return key, True
+    generator.knowledge_graph = build_knowledge_graph(generator, documents, run_config)
+    generator.persona_list = None
+    if cache is not None:
+        cache.save(key, generator.knowledge_graph)
+    return key, False
+
+
+def generate_testset(generator, documents, testset_size, cache=None, **generate_kwargs):
+    """
+    Generate a test set from documents, reusing the cached knowledge graph and personas of the same document set.
+    :param generator: Ragas TestsetGenerator
+    :param documents: List of LangChain documents
+    :param testset_size: Number of samples to generate
+    :param cache: Optional KnowledgeGraphCache
+    :param generate_kwargs: Further arguments of TestsetGenerator.generate
+    :return: Tuple of the test set and whether the knowledge graph came from the cache
+    """
+    key, reused = prepare_generator(generator, documents, cache)
+    had_personas = generator.persona_list is not None
+    dataset = generator.generate(testset_size=testset_size, **generate_kwargs)
+    if cache is not None and not had_personas and generator.persona_list:
+        cache.save_personas(key, generator.persona_list)
+    return dataset, reused
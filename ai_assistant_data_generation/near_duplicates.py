@@ -0,0 +1,140 @@
+import hashlib
+import math
+import re
+
+import numpy as np
+
+from ai_assistant.requirement_store import count_tokens
+
+# Smallest prime above 2**32 (2**32 + 15), the permutations of the 32-bit shingle hashes are taken modulo it
+HASH_PRIME = 4294967311
+MAX_HASH = 2 ** 32 - 1
+
+# Chunk size of the ragas headline splitter, used to estimate the extraction calls of a document
+RAGAS_CHUNK_TOKENS = 500
+
+
+def shingles(text, size=5):
+    """
+    Word shingles of a text, after lower casing and dropping punctuation.
+    :param text: Text
+    :param size: Number of words per shingle
+    :return: Set of shingles
+    """
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[position:position + size]) for position in range(len(words) - size + 1)}
+
+
+def jaccard(first, second):
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+def lsh_params(threshold, num_perm):
+    """
+    Number of bands and rows per band of the LSH index, chosen so that the band collision probability
+    (1/bands) ** (1/rows) is closest to the threshold.
+    :param threshold: Jaccard similarity threshold
+    :param num_perm: Number of MinHash permutations
+    :return: Tuple of the number of bands and rows per band
+    """
+    candidates = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    return min(candidates, key=lambda params: abs((1 / params[0]) ** (1 / params[1]) - threshold))
+
+
+class MinHasher:
+    """
+    MinHash signatures of shingle sets, with num_perm random permutations of the form (a * x + b) mod p.
+    """
+
+    def __init__(self, num_perm=128, seed=1):
+        """
+        :param num_perm: Number of permutations, the length of the signatures
+        :param seed: Seed of the permutations, signatures of different seeds are not comparable
+        """
+        generator = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = generator.randint(1, MAX_HASH, size=num_perm, dtype=np.uint64)
+        self.b = generator.randint(0, MAX_HASH, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set):
+        """
+        :param shingle_set: Set of shingles
+        :return: Signature as an array of num_perm uint32 values
+        """
+        if not shingle_set:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        hashes = np.array([int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+                           for shingle in shingle_set], dtype=np.uint64)
+        # a * x + b stays below 2**64 for 32-bit a, x and b
+        permuted = (np.outer(hashes, self.a) + self.b) % np.uint64(HASH_PRIME)
+        return (permuted & np.uint64(MAX_HASH)).min(axis=0).astype(np.uint32)
+
+
+def estimate_extraction_calls(tokens):
+    """
+    Rough number of LLM calls the ragas default transforms spend on a document: headline and summary
+    extraction for the document, theme, entity and filter calls for each of its chunks.
+    :param tokens: Number of tokens of the document
+    :return: Number of LLM calls
+    """
+    if tokens > RAGAS_CHUNK_TOKENS:
+        return 2 + 3 * math.ceil(tokens / RAGAS_CHUNK_TOKENS)
+    return 4 if tokens > 100 else 0
+
+
+def remove_near_duplicates(documents, threshold=0.8, num_perm=128, shingle_size=5):
+    """
+    Drop documents that are near-duplicates of an earlier one before test set synthesis. Candidate pairs come
+    from MinHash LSH buckets and are confirmed with the exact Jaccard similarity of their shingles.
+    The unit is the loaded document, a PDF page or a web page, not the chunks ragas splits it into later: the
+    generator only takes whole documents, so a duplicate page is what can be kept out of the knowledge graph.
+    :param documents: List of LangChain documents
+    :param threshold: Jaccard similarity from which a document counts as a near-duplicate
+    :param num_perm: Number of MinHash permutations
+    :param shingle_size: Number of words per shingle
+    :return: Tuple of the documents kept, in their original order, and a report dictionary
+    """
+    bands, rows = lsh_params(threshold, num_perm)
+    hasher = MinHasher(num_perm)
+    buckets = [{} for _ in range(bands)]
+    kept, kept_shingles, duplicates = [], [], []
+    dropped_tokens = llm_calls_saved = comparisons = 0
+
+    for document in documents:
+        shingle_set = shingles(document.page_content, shingle_size)
+        signature = hasher.signature(shingle_set)
+        band_keys = [signature[band * rows:(band + 1) * rows].tobytes() for band in range(bands)]
+        candidates = {position for band, key in enumerate(band_keys) for position in buckets[band].get(key, [])}
+
+        duplicate_of = None
+        for position in sorted(candidates):
+            comparisons += 1
+            if jaccard(shingle_set, kept_shingles[position]) >= threshold:
+                duplicate_of = position
+                break
+        if duplicate_of is not None:
+            tokens = count_tokens(document.page_content)
+            dropped_tokens += tokens
+            llm_calls_saved += estimate_extraction_calls(tokens)
+            duplicates.append((document.metadata.get("source"), kept[duplicate_of].metadata.get("source")))
+            continue
+
+        for band, key in enumerate(band_keys):
+            buckets[band].setdefault(key, []).append(len(kept))
+        kept.append(document)
+        kept_shingles.append(shingle_set)
+
+    report = {
+        "documents": len(documents),
+        "kept": len(kept),
+        "dropped": len(documents) - len(kept),
+        "dropped_tokens": dropped_tokens,
+        "llm_calls_saved": llm_calls_saved,
+        "comparisons": comparisons,
+        "duplicates": duplicates,
+    }
+    return kept, report
@@ -0,0 +1,197 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+def is_rate_limit_error(error):
+    """
+    :param error: Exception raised by a provider call
+    :return: True if the provider rejected the call with a 429
+    """
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    return status == 429 or type(error).__name__ == "RateLimitError"
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute, holding at most one minute of tokens.
+    """
+
+    def __init__(self, rate_per_minute, clock=time.monotonic):
+        """
+        :param rate_per_minute: Tokens added per minute, e.g. the requests or tokens per minute of the provider
+        :param clock: Monotonic clock in seconds
+        """
+        self.rate = rate_per_minute / 60
+        self.capacity = rate_per_minute
+        self.clock = clock
+        self.available = float(rate_per_minute)
+        self.updated = clock()
+        self._lock = None
+        self._loop = None
+
+    def _refill(self):
+        now = self.clock()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        """
+        Wait until the bucket holds the amount and take it; amounts above the capacity take the full bucket.
+        :param amount: Number of tokens
+        :return: None
+        """
+        # Ragas runs each generation in its own event loop, asyncio primitives cannot be shared between loops
+        if self._loop is not asyncio.get_running_loop():
+            self._loop = asyncio.get_running_loop()
+            self._lock = asyncio.Lock()
+        amount = min(amount, self.capacity)
+        # Callers are served in order, a large request is not starved by small ones
+        async with self._lock:
+            self._refill()
+            while self.available < amount:
+                await asyncio.sleep((amount - self.available) / self.rate)
+                self._refill()
+            self.available -= amount
+
+    def adjust(self, amount):
+        """
+        Correct an earlier acquire once the actual amount is known; the bucket may go negative.
+        :param amount: Tokens used beyond the acquired amount, negative to give tokens back
+        :return: None
+        """
+        self._refill()
+        self.available = min(self.capacity, self.available - amount)
+
+
+class AdaptiveConcurrency:
+    """
+    Concurrency limit adjusted by AIMD: each successful call adds 1/limit, so the limit grows by one per round
+    of calls, and a 429 or a latency rising well above the lowest latency seen multiplies it by ``backoff``,
+    at most once per round trip.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, backoff=0.5, latency_tolerance=3.0, clock=time.monotonic):
+        """
+        :param initial: Initial number of concurrent calls
+        :param minimum: Lowest limit
+        :param maximum: Highest limit
+        :param backoff: Factor applied to the limit on congestion
+        :param latency_tolerance: Ratio of the average to the lowest latency taken as congestion
+        :param clock: Monotonic clock in seconds
+        """
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.clock = clock
+        self.active = 0
+        self.peak = self.limit
+        self.latency = None
+        self.base_latency = None
+        self.last_decrease = float("-inf")
+        self._condition = None
+        self._loop = None
+
+    async def acquire(self):
+        if self._loop is not asyncio.get_running_loop():
+            self._loop = asyncio.get_running_loop()
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+
+    async def release(self):
+        async with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    def _decrease(self):
+        # Calls already in flight were started under the old limit, their outcome says nothing new
+        now = self.clock()
+        if now - self.last_decrease < (self.latency or 1.0):
+            return
+        self.limit = max(self.minimum, self.limit * self.backoff)
+        self.last_decrease = now
+
+    def on_success(self, latency):
+        self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+        self.base_latency = latency if self.base_latency is None else min(self.base_latency, latency)
+        if self.latency > self.latency_tolerance * self.base_latency:
+            self._decrease()
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.peak = max(self.peak, self.limit)
+
+    def on_rate_limit(self):
+        self._decrease()
+
+
+class RateLimitController:
+    """
+    Gate of provider calls: token buckets on the requests and tokens per minute, and an adaptive concurrency
+    limit that finds the highest concurrency the provider sustains without 429s.
+    """
+
+    def __init__(self, requests_per_minute=500, tokens_per_minute=30000, initial_concurrency=4, max_concurrency=64,
+                 clock=time.monotonic):
+        """
+        :param requests_per_minute: Request limit of the provider
+        :param tokens_per_minute: Token limit of the provider
+        :param initial_concurrency: Concurrent calls at the start
+        :param max_concurrency: Highest number of concurrent calls
+        :param clock: Monotonic clock in seconds
+        """
+        self.requests = TokenBucket(requests_per_minute, clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock)
+        self.concurrency = AdaptiveConcurrency(initial_concurrency, maximum=max_concurrency, clock=clock)
+        self.clock = clock
+        self.completed = 0
+        self.rate_limited = 0
+        self.started = None
+
+    @asynccontextmanager
+    async def slot(self, tokens=0):
+        """
+        Wait for the rate limits and a concurrency slot, then run the call in the context.
+        :param tokens: Estimated tokens of the call, correct it with ``self.tokens.adjust`` once known
+        :return: Async context manager
+        """
+        await self.requests.acquire(1)
+        await self.tokens.acquire(tokens)
+        await self.concurrency.acquire()
+        if self.started is None:
+            self.started = self.clock()
+        start_time = self.clock()
+        try:
+            yield
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self.rate_limited += 1
+                self.concurrency.on_rate_limit()
+            raise
+        else:
+            self.completed += 1
+            self.concurrency.on_success(self.clock() - start_time)
+        finally:
+            await self.concurrency.release()
+
+    def reset_stats(self):
+        self.completed = 0
+        self.rate_limited = 0
+        self.started = None
+
+    def stats(self):
+        """
+        :return: Dictionary with the completed and rate limited calls, the throughput in calls per minute and the
+            current and peak concurrency limits
+        """
+        elapsed = self.clock() - self.started if self.started is not None else 0.0
+        return {
+            "completed": self.completed,
+            "rate_limited": self.rate_limited,
+            "calls_per_minute": self.completed * 60 / elapsed if elapsed else 0.0,
+            "concurrency": int(self.concurrency.limit),
+            "peak_concurrency": int(self.concurrency.peak),
+        }
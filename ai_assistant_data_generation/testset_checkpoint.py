@@ -0,0 +1,104 @@
+import json
+import os
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "testset_checkpoints")
+
+
+class TestsetCheckpoint:
+    """
+    JSONL checkpoint of the generated samples of one document set, one sample per line. Each batch is flushed
+    to disk before the next one starts, so a crash or a timeout loses at most the batch in progress.
+    """
+
+    __test__ = False  # Not a pytest test class
+
+    def __init__(self, path):
+        """
+        :param path: Path of the JSONL file
+        """
+        self.path = path
+
+    def load(self):
+        """
+        Read the samples generated so far; a line cut off by a crash is removed, so new batches are appended
+        after the last complete sample.
+        :return: List of sample dictionaries
+        """
+        samples = []
+        valid_size = 0
+        try:
+            with open(self.path, "rb") as checkpoint_file:
+                for line in checkpoint_file:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        samples.append(json.loads(line))
+                    except ValueError:
+                        break
+                    valid_size += len(line)
+        except FileNotFoundError:
+            return samples
+        if valid_size < os.path.getsize(self.path):
+            os.truncate(self.path, valid_size)
+        return samples
+
+    def append(self, samples):
+        """
+        Append samples and flush them to disk.
+        :param samples: List of sample dictionaries
+        :return: None
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as checkpoint_file:
+            for sample in samples:
+                checkpoint_file.write(json.dumps(sample, default=str) + "\n")
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def checkpoint_path(key, checkpoint_dir=DEFAULT_CHECKPOINT_DIR):
+    return os.path.join(checkpoint_dir, f"{key}.jsonl")
+
+
+def generate_in_batches(generator, key, testset_size, batch_size=10, cache=None,
+                        checkpoint_dir=DEFAULT_CHECKPOINT_DIR, resume=True, clear_on_complete=True, **generate_kwargs):
+    """
+    Generate a test set batch by batch, appending every batch to the checkpoint of the document set. Samples
+    already in the checkpoint of an interrupted run are not generated again; the checkpoint is cleared once the
+    test set is complete, so the next run on the same documents generates new samples.
+    :param generator: Ragas TestsetGenerator with the knowledge graph of the documents, see prepare_generator
+    :param key: Document set hash returned by prepare_generator
+    :param testset_size: Total number of samples
+    :param batch_size: Number of samples generated per call
+    :param cache: Optional KnowledgeGraphCache, the personas of the first batch are stored in it
+    :param checkpoint_dir: Directory of the checkpoints
+    :param resume: Continue from the checkpoint, otherwise start over
+    :param clear_on_complete: Clear the checkpoint once the test set is complete, False to keep it as the output
+    :param generate_kwargs: Further arguments of TestsetGenerator.generate, e.g. run_config
+    :return: Generator of the list of all samples so far, yielded once with the resumed samples and after each batch
+    """
+    checkpoint = TestsetCheckpoint(checkpoint_path(key, checkpoint_dir))
+    if not resume:
+        checkpoint.clear()
+    samples = checkpoint.load()[:testset_size]
+    yield samples
+
+    while len(samples) < testset_size:
+        had_personas = generator.persona_list is not None
+        dataset = generator.generate(testset_size=min(batch_size, testset_size - len(samples)), **generate_kwargs)
+        if cache is not None and not had_personas and generator.persona_list:
+            cache.save_personas(key, generator.persona_list)
+        batch = dataset.to_pandas().to_dict("records")
+        if not batch:
+            raise RuntimeError("The generator returned no samples.")
+        checkpoint.append(batch)
+        samples = samples + batch
+        yield samples
+    if clear_on_complete:
+        checkpoint.clear()
@@ -0,0 +1,199 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urldefrag, urljoin, urlparse
+
+import aiohttp
+from langchain_core.documents import Document
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "http")
+
+# Elements whose text is not part of the page content
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg", "head"}
+BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "table",
+              "pre", "blockquote", "ul", "ol", "header", "footer", "nav", "main"}
+
+
+class _PageParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.title = ""
+        self.links = []
+        self._skip_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        if tag == "title":
+            self._in_title = True
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        if tag == "title":
+            self._in_title = False
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth:
+            self.parts.append(data)
+
+
+def parse_page(url, html):
+    """
+    Extract the text, title and links of an HTML page; runs in a worker process.
+    :param url: URL of the page, relative links are resolved against it
+    :param html: HTML of the page
+    :return: Tuple of the text, title and list of absolute link URLs without fragments
+    """
+    parser = _PageParser()
+    parser.feed(html)
+    parser.close()
+    lines = (" ".join(line.split()) for line in "".join(parser.parts).splitlines())
+    text = "\n".join(line for line in lines if line)
+    links = [urldefrag(urljoin(url, link))[0] for link in parser.links]
+    return text, " ".join(parser.title.split()), [link for link in links if urlparse(link).scheme in ("http", "https")]
+
+
+class HttpCache:
+    """
+    Local cache of fetched pages with their ETag and Last-Modified validators, so a page that did not change
+    is answered with a 304 and read from disk.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        """
+        :param cache_dir: Cache directory
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, url):
+        return os.path.join(self.cache_dir, f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json.gz")
+
+    def get(self, url):
+        """
+        :param url: URL of the page
+        :return: Dictionary with the body, etag and last_modified of the page, or None if not cached
+        """
+        try:
+            with gzip.open(self._entry_path(url), "rt", encoding="utf-8") as entry_file:
+                return json.load(entry_file)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url, body, etag=None, last_modified=None):
+        entry_path = self._entry_path(url)
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as entry_file:
+            json.dump({"url": url, "body": body, "etag": etag, "last_modified": last_modified,
+                       "fetched": time.time()}, entry_file)
+        os.replace(temp_path, entry_path)
+
+
+async def _fetch(session, url, cache, stats):
+    cached = cache.get(url) if cache is not None else None
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    async with session.get(url, headers=headers) as response:
+        if response.status == 304 and cached:
+            stats["not_modified"] += 1
+            return cached["body"], True
+        response.raise_for_status()
+        if "html" not in response.headers.get("Content-Type", "text/html"):
+            raise ValueError(f"Unsupported content type {response.headers['Content-Type']}")
+        body = await response.text(errors="replace")
+        stats["fetched"] += 1
+        if cache is not None and (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+            cache.put(url, body, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return body, False
+
+
+async def crawl(urls, same_site=False, max_pages=20, max_depth=2, per_host_limit=4, total_limit=16, cache=None,
+                timeout=30, executor=None):
+    """
+    Fetch pages concurrently, optionally following the links that stay on the site of each start URL.
+    :param urls: List of start URLs
+    :param same_site: Follow links to other pages of the same host
+    :param max_pages: Maximum number of pages fetched
+    :param max_depth: Maximum number of links followed from a start URL
+    :param per_host_limit: Maximum number of concurrent requests to one host
+    :param total_limit: Maximum number of concurrent requests
+    :param cache: Optional HttpCache for conditional requests
+    :param timeout: Timeout in seconds of one request
+    :param executor: Executor of the HTML to text step, defaults to a process pool
+    :return: Tuple of the list of documents, in crawl order, and a stats dictionary
+    """
+    stats = {"fetched": 0, "not_modified": 0, "errors": []}
+    start_hosts = {urlparse(url).netloc for url in urls}
+    seen = set()
+    frontier = deque()
+    for url in urls:
+        url = urldefrag(url.strip())[0]
+        if url and url not in seen:
+            seen.add(url)
+            frontier.append((url, 0))
+
+    documents = []
+    own_executor = executor is None
+    executor = executor or ProcessPoolExecutor()
+    loop = asyncio.get_running_loop()
+    connector = aiohttp.TCPConnector(limit=total_limit, limit_per_host=per_host_limit)
+    try:
+        async with aiohttp.ClientSession(connector=connector,
+                                         timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+            async def process(url, depth):
+                try:
+                    body, cached = await _fetch(session, url, cache, stats)
+                    text, title, links = await loop.run_in_executor(executor, parse_page, url, body)
+                except Exception as e:
+                    stats["errors"].append((url, str(e)))
+                    return None, []
+                document = Document(page_content=text, metadata={"source": url, "title": title, "cached": cached})
+                return document, links if same_site and depth < max_depth else []
+
+            # Breadth first, one level at a time, so the page limit keeps the pages closest to the start URLs
+            while frontier and len(documents) < max_pages:
+                level = [frontier.popleft() for _ in range(min(len(frontier), max_pages - len(documents)))]
+                results = await asyncio.gather(*(process(url, depth) for url, depth in level))
+                for (url, depth), (document, links) in zip(level, results):
+                    if document is not None:
+                        documents.append(document)
+                    for link in links:
+                        if urlparse(link).netloc in start_hosts and link not in seen:
+                            seen.add(link)
+                            frontier.append((link, depth + 1))
+    finally:
+        if own_executor:
+            executor.shutdown()
+    return documents, stats
+
+
+def crawl_urls(urls, **kwargs):
+    """
+    Blocking version of crawl, for Streamlit pages.
+    :param urls: List of start URLs
+    :param kwargs: Arguments of crawl
+    :return: Tuple of the list of documents and a stats dictionary
+    """
+    return asyncio.run(crawl(urls, **kwargs))
@@ -0,0 +1,62 @@
+import asyncio
+from functools import partial
+
+DEFAULT_MAX_CONCURRENCY = 20
+
+
+async def _measure(metric, test_case, semaphore, cache, on_measured):
+    if cache is None or not cache.load(metric, test_case):
+        await _judge(metric, test_case, semaphore, cache)
+    if on_measured is not None:
+        on_measured(metric)
+    return metric
+
+
+async def _judge(metric, test_case, semaphore, cache):
+    async with semaphore:
+        if getattr(metric, "async_mode", False):
+            await metric.a_measure(test_case, _show_indicator=False)
+        else:
+            # Metrics without a real async path would block the event loop, they are measured in a thread
+            await asyncio.to_thread(metric.measure, test_case)
+    if cache is not None:
+        cache.save(metric, test_case)
+
+
+async def measure_pairs_async(metrics, test_cases, max_concurrency=DEFAULT_MAX_CONCURRENCY, cache=None,
+                              on_measured=None):
+    """
+    Measure each metric once on the test case at the same position, concurrently.
+    :param metrics: List of metric instances
+    :param test_cases: List of DeepEval test cases, as long as metrics
+    :param max_concurrency: Maximum number of measures running at the same time
+    :param cache: Optional JudgeCache, cached judgements are restored instead of measured
+    :param on_measured: Optional function called with the position and the metric once it is measured
+    :return: List of the measured metric instances, in order
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    tasks = [asyncio.ensure_future(_measure(metric, test_case, semaphore, cache,
+                                            None if on_measured is None else partial(on_measured, position)))
+             for position, (metric, test_case) in enumerate(zip(metrics, test_cases))]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        # Stop the measures still waiting when one fails; asyncio.run patched by nest_asyncio, which ragas
+        # applies on import, does not cancel them and they would keep running in the next run
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def measure_pairs(metrics, test_cases, max_concurrency=DEFAULT_MAX_CONCURRENCY, cache=None, on_measured=None):
+    """
+    Blocking version of measure_pairs_async.
+    :param metrics: List of metric instances
+    :param test_cases: List of DeepEval test cases, as long as metrics
+    :param max_concurrency: Maximum number of measures running at the same time
+    :param cache: Optional JudgeCache
+    :param on_measured: Optional function called with the position and the metric once it is measured
+    :return: List of the measured metric instances, in order
+    """
+    return asyncio.run(measure_pairs_async(metrics, test_cases, max_concurrency, cache, on_measured))
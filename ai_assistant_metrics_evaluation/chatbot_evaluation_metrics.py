@@ -1,24 +1,37 @@
-import configparser
 import os
 from datetime import datetime
+from functools import partial
 
-import deepeval
-from deepeval import assert_test
 from deepeval.metrics import FaithfulnessMetric, AnswerRelevancyMetric, SummarizationMetric, HallucinationMetric, \
     ContextualRelevancyMetric, ContextualRecallMetric, ContextualPrecisionMetric, BiasMetric, ToxicityMetric, GEval
 from deepeval.metrics.ragas import RAGASAnswerRelevancyMetric, RAGASFaithfulnessMetric, \
     RAGASContextualRecallMetric, RAGASContextualPrecisionMetric
 from deepeval.test_case import LLMTestCase, LLMTestCaseParams
-from openpyxl.workbook import Workbook
-from datasets import Dataset
+import numpy as np
+import pandas as pd
 from ragas import evaluate
 from ragas.metrics import faithfulness, answer_correctness, answer_similarity, context_precision, answer_relevancy, \
     context_recall, context_entity_recall
 
+from ai_assistant_metrics_evaluation.async_metrics import DEFAULT_MAX_CONCURRENCY, measure_pairs
+from ai_assistant_metrics_evaluation.feedback_sink import create_feedback_sink
+from ai_assistant_metrics_evaluation.judge_cache import JudgeCache
+from ai_assistant_metrics_evaluation.ragas_session import RagasSession, data_samples_hash
+from ai_assistant_metrics_evaluation.report_writer import ReportWriter
+from ai_assistant_metrics_evaluation.results_store import ResultsStore
+from ai_assistant_metrics_evaluation.run_journal import RunJournal, is_missing, new_run_id, record_metric, \
+    restore_metric
+from ai_assistant_metrics_evaluation.sampling import metric_intervals
+from ai_assistant_metrics_evaluation.tiered_evaluation import FAIL, JUDGE, LOCAL_METRICS, PASS, TierRules, \
+    compute_local_metrics, select_audit_rows, tier_agreement
+
+_judge_cache = None
+_ragas_session = None
+
 
 def evaluate_faithfulness_deepeval(user_input_data_list, retrieval_context_data_list, bot_response_data_list,
                                    threshold_value=0.5,
-                                   model_value="gpt-4"):
+                                   model_value="gpt-4", max_concurrency=DEFAULT_MAX_CONCURRENCY):
     """
     Evaluate the faithfulness of the bot's response to the user's input.
     @Author: Sanoj Swaminathan
@@ -28,65 +41,28 @@ def evaluate_faithfulness_deepeval(user_input_data_list, retrieval_context_data_
     :param bot_response_data_list: List of bot responses
     :param threshold_value: Threshold for relevancy
     :param model_value: Model to evaluate relevancy
+    :param max_concurrency: Maximum number of test cases measured at the same time
     :return: None
     """
     # Validate input lengths
     if not (len(user_input_data_list) == len(retrieval_context_data_list) == len(bot_response_data_list)):
         raise ValueError("All input lists must have the same length.")
 
-    # Initialize the metric
-    metric_faithfulness = FaithfulnessMetric(
-        threshold=threshold_value,
-        model=model_value,
-        include_reason=True
-    )
+    rows = list(zip(user_input_data_list, retrieval_context_data_list, bot_response_data_list))
+    test_cases = [LLMTestCase(input=user_input_data, actual_output=bot_response_data,
+                              retrieval_context=retrieval_context)
+                  for user_input_data, retrieval_context, bot_response_data in rows]
+    report_columns = [[user_input_data, __context_to_string(retrieval_context), bot_response_data]
+                      for user_input_data, retrieval_context, bot_response_data in rows]
 
-    report_folder_path = __get_deepeval_report_path()
-
-    # Prepare Excel file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_name = f"FaithfulnessReport_{timestamp}.xlsx"
-    file_path = os.path.join(report_folder_path, file_name)
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Results"
-
-    # Write header
-    sheet.append(["User Input", "Retrieval Context", "Actual Output", "Faithfulness Score", "Reason"])
-
-    # Evaluate each user input and bot response
-    for user_input_data, retrieval_context, bot_response_data in zip(user_input_data_list, retrieval_context_data_list,
-                                                                     bot_response_data_list):
-        # If retrieval_context is a list, convert it to a string
-        context_str = ', '.join(retrieval_context) if isinstance(retrieval_context, list) else retrieval_context
-
-        # Create the test case
-        test_case = LLMTestCase(input=user_input_data, actual_output=bot_response_data,
-                                retrieval_context=retrieval_context)
-        # Measure the metrics
-        metric_faithfulness.measure(test_case)
-
-        # Extract the score
-        score = metric_faithfulness.score
-        reason = metric_faithfulness.reason
-
-        # Append results to Excel sheet
-        sheet.append([user_input_data, context_str, bot_response_data, score, reason])
-
-        # Assert test for metrics
-        try:
-            assert_test(test_case, [metric_faithfulness])
-        except AssertionError:
-            print(f"Assertion failed for input: {user_input_data}\nBot response: {bot_response_data}")
-            continue
-
-    # Save the Excel file
-    workbook.save(file_path)
-    print(f"Report generated: {file_path}")
+    __evaluate_metric_deepeval(
+        partial(FaithfulnessMetric, threshold=threshold_value, model=model_value, include_reason=True), test_cases,
+        report_columns, ["User Input", "Retrieval Context", "Actual Output", "Faithfulness Score", "Reason"],
+        "FaithfulnessReport", max_concurrency=max_concurrency)
 
 
 def evaluate_answer_relevancy_deepeval(user_input_data_list, bot_response_data_list, threshold_value=0.5,
-                                       model_value="gpt-4"):
+                                       model_value="gpt-4", max_concurrency=DEFAULT_MAX_CONCURRENCY):
     """
     Evaluate the relevancy of the bot's responses to the user's inputs and generate a report.
     @Author: Sanoj Swaminathan
@@ -95,61 +71,27 @@ def evaluate_answer_relevancy_deepeval(user_input_data_list, bot_response_data_l
     :param bot_response_data_list: List of bot responses
     :param threshold_value: Threshold for relevancy
     :param model_value: Model to evaluate relevancy
+    :param max_concurrency: Maximum number of test cases measured at the same time
     :return: None
     """
     # Validate input lengths
     if len(user_input_data_list) != len(bot_response_data_list):
         raise ValueError("The number of user inputs and bot responses must be the same.")
 
-    # Initialize the metric
-    metric_answer_relevancy = AnswerRelevancyMetric(
-        threshold=threshold_value,
-        model=model_value,
-        include_reason=True
-    )
-
-    report_folder_path = __get_deepeval_report_path()
-
-    # Prepare Excel file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_name = f"AnswerRelevancyReport_{timestamp}.xlsx"
-    file_path = os.path.join(report_folder_path, file_name)
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Results"
-
-    # Write header
-    sheet.append(["User Input", "Actual Output", "Answer Relevancy Score", "Reason"])
-
-    # Evaluate each user input and bot response
-    for user_input_data, bot_response_data in zip(user_input_data_list, bot_response_data_list):
-        # Create the test case
-        test_case = LLMTestCase(input=user_input_data, actual_output=bot_response_data)
-
-        # Measure the answer relevancy
-        metric_answer_relevancy.measure(test_case)
+    test_cases = [LLMTestCase(input=user_input_data, actual_output=bot_response_data)
+                  for user_input_data, bot_response_data in zip(user_input_data_list, bot_response_data_list)]
+    report_columns = [[user_input_data, bot_response_data]
+                      for user_input_data, bot_response_data in zip(user_input_data_list, bot_response_data_list)]
 
-        # Extract the score
-        score = metric_answer_relevancy.score
-        reason = metric_answer_relevancy.reason
-
-        # Append results to Excel sheet
-        sheet.append([user_input_data, bot_response_data, score, reason])
-
-        # Assert test for relevancy check
-        try:
-            assert_test(test_case, [metric_answer_relevancy])
-        except AssertionError:
-            print(f"Assertion failed for input: {user_input_data}\nBot response: {bot_response_data}")
-            continue
-
-    # Save the Excel file
-    workbook.save(file_path)
-    print(f"Report generated: {file_path}")
+    __evaluate_metric_deepeval(
+        partial(AnswerRelevancyMetric, threshold=threshold_value, model=model_value, include_reason=True),
+        test_cases, report_columns, ["User Input", "Actual Output", "Answer Relevancy Score", "Reason"],
+        "AnswerRelevancyReport", max_concurrency=max_concurrency)
 
 
 def evaluate_summarization_deepeval(user_input_data_list, assessment_questions_data_list, bot_response_data_list,
-                                    threshold_value=0.7, model_value="gpt-4"):
+                                    threshold_value=0.7, model_value="gpt-4",
+                                    max_concurrency=DEFAULT_MAX_CONCURRENCY):
     """
     Evaluate the summarization of the bot's response to the user's input.
     @Author: Sanoj Swaminathan
@@ -159,65 +101,30 @@ def evaluate_summarization_deepeval(user_input_data_list, assessment_questions_d
     :param bot_response_data_list: List of bot responses
     :param threshold_value: Threshold for evaluation
     :param model_value: Model to evaluate summarization
+    :param max_concurrency: Maximum number of test cases measured at the same time
     :return: None
     """
     # Validate input lengths
     if not (len(user_input_data_list) == len(bot_response_data_list)):
         raise ValueError("All input lists must have the same length.")
 
-    # Initialize the metric
-    metric_summarization = SummarizationMetric(
-        threshold=threshold_value,
-        model=model_value,
-        include_reason=True
-    )
-
-    report_folder_path = __get_deepeval_report_path()
-
-    # Prepare Excel file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_name = f"SummarizationReport_{timestamp}.xlsx"
-    file_path = os.path.join(report_folder_path, file_name)
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Results"
+    rows = list(zip(user_input_data_list, assessment_questions_data_list, bot_response_data_list))
+    test_cases = [LLMTestCase(input=user_input_data, actual_output=bot_response_data)
+                  for user_input_data, _, bot_response_data in rows]
+    # Dynamic assessment questions for summarization
+    metrics = [SummarizationMetric(threshold=threshold_value, model=model_value, include_reason=True,
+                                   assessment_questions=[assessment_questions_data])
+               for _, assessment_questions_data, _ in rows]
 
-    # Write header
-    sheet.append(["User Input", "Assessment Questions", "Bot Response", "Summarization Score", "Reason"])
-
-    # Evaluate each user input and bot response
-    for user_input_data, assessment_questions_data, bot_response_data in zip(
-            user_input_data_list, assessment_questions_data_list, bot_response_data_list):
-        # Create the test case
-        test_case = LLMTestCase(input=user_input_data, actual_output=bot_response_data)
-
-        # Dynamic assessment questions for summarization
-        metric_summarization.assessment_questions = [assessment_questions_data]
-
-        # Measure the summarization quality
-        metric_summarization.measure(test_case)
-
-        # Extract the score
-        score = metric_summarization.score
-        reason = metric_summarization.reason
-
-        # Append results to Excel sheet
-        sheet.append([user_input_data, assessment_questions_data, bot_response_data, score, reason])
-
-        # Assert test for metrics
-        try:
-            assert_test(test_case, [metric_summarization])
-        except AssertionError:
-            print(f"Assertion failed for input: {user_input_data}\nBot response: {bot_response_data}")
-            continue
-
-    # Save the Excel file
-    workbook.save(file_path)
-    print(f"Report generated: {file_path}")
+    __evaluate_metric_deepeval(
+        metrics, test_cases, [list(row) for row in rows],
+        ["User Input", "Assessment Questions", "Bot Response", "Summarization Score", "Reason"],
+        "SummarizationReport", max_concurrency=max_concurrency)
 
 
 def evaluate_hallucination_deepeval(user_input_data_list, context_data_list, bot_response_data_list,
-                                    threshold_value=0.7, model_value="gpt-4"):
+                                    threshold_value=0.7, model_value="gpt-4",
+                                    max_concurrency=DEFAULT_MAX_CONCURRENCY):
     """
     Evaluate the hallucination of the bot's response to the user's input and generate a report.
     @Author: Sanoj Swaminathan
@@ -227,66 +134,28 @@ def evaluate_hallucination_deepeval(user_input_data_list, context_data_list, bot
     :param bot_response_data_list: List of bot responses
     :param threshold_value: Threshold for evaluation
     :param model_value: Model to evaluate hallucination
+    :param max_concurrency: Maximum number of test cases measured at the same time
     :return: None
     """
     # Validate input lengths
     if not (len(user_input_data_list) == len(context_data_list) == len(bot_response_data_list)):
         raise ValueError("All input lists must have the same length.")
 
-    # Initialize the metric
-    metric_hallucination = HallucinationMetric(
-        threshold=threshold_value,
-        model=model_value,
-        include_reason=True
-    )
-
-    report_folder_path = __get_deepeval_report_path()
-
-    # Prepare Excel file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_name = f"HallucinationReport_{timestamp}.xlsx"
-    file_path = os.path.join(report_folder_path, file_name)
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Results"
-
-    # Write header
-    sheet.append(["User Input", "Context", "Bot Response", "Hallucination Score", "Reason"])
+    rows = list(zip(user_input_data_list, context_data_list, bot_response_data_list))
+    test_cases = [LLMTestCase(input=user_input_data, actual_output=bot_response_data, context=context_data)
+                  for user_input_data, context_data, bot_response_data in rows]
+    report_columns = [[user_input_data, __context_to_string(context_data), bot_response_data]
+                      for user_input_data, context_data, bot_response_data in rows]
 
-    # Evaluate each test case
-    for user_input_data, context_data, bot_response_data in zip(user_input_data_list, context_data_list,
-                                                                bot_response_data_list):
-
-        # If retrieval_context is a list, convert it to a string
-        context_str = ', '.join(context_data) if isinstance(context_data, list) else context_data
-
-        # Create the test case
-        test_case = LLMTestCase(input=user_input_data, actual_output=bot_response_data, context=context_data)
-
-        # Measure hallucination
-        metric_hallucination.measure(test_case)
-
-        # Extract the score and reason
-        score = metric_hallucination.score
-        reason = metric_hallucination.reason
-
-        # Append results to Excel sheet
-        sheet.append([user_input_data, context_str, bot_response_data, score, reason])
-
-        # Assert test for metrics
-        try:
-            assert_test(test_case, [metric_hallucination])
-        except AssertionError:
-            print(f"Assertion failed for input: {user_input_data}\nBot response: {bot_response_data}")
-            continue
-
-    # Save the Excel file
-    workbook.save(file_path)
-    print(f"Report generated: {file_path}")
+    __evaluate_metric_deepeval(
+        partial(HallucinationMetric, threshold=threshold_value, model=model_value, include_reason=True), test_cases,
+        report_columns, ["User Input", "Context", "Bot Response", "Hallucination Score", "Reason"],
+        "HallucinationReport", max_concurrency=max_concurrency)
 
 
 def evaluate_contextual_relevancy_deepeval(user_input_data_list, retrieval_context_data_list, bot_response_data_list,
-                                           threshold_value=0.7, model_value="gpt-4"):
+                                           threshold_value=0.7, model_value="gpt-4",
+                                           max_concurrency=DEFAULT_MAX_CONCURRENCY):
     """
     Evaluate the contextual relevancy of the bot's response to the user's input and generate a report.
     @Author: Sanoj Swaminathan
@@ -296,68 +165,30 @@ def evaluate_contextual_relevancy_deepeval(user_input_data_list, retrieval_conte
     :param bot_response_data_list: List of bot responses
     :param threshold_value: Threshold for evaluation
     :param model_value: Model to evaluate contextual relevancy
+    :param max_concurrency: Maximum number of test cases measured at the same time
     :return: None
     """
     # Validate input lengths
     if not (len(user_input_data_list) == len(retrieval_context_data_list) == len(bot_response_data_list)):
         raise ValueError("All input lists must have the same length.")
 
-    # Initialize the metric
-    metric_contextual_relevancy = ContextualRelevancyMetric(
-        threshold=threshold_value,
-        model=model_value,
-        include_reason=True
-    )
-
-    report_folder_path = __get_deepeval_report_path()
-
-    # Prepare Excel file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_name = f"ContextualRelevancyReport_{timestamp}.xlsx"
-    file_path = os.path.join(report_folder_path, file_name)
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Results"
-
-    # Write header
-    sheet.append(["User Input", "Retrieval Context", "Bot Response", "Contextual Relevancy Score", "Reason"])
-
-    # Evaluate each test case
-    for user_input_data, retrieval_context_data, bot_response_data in zip(
-            user_input_data_list, retrieval_context_data_list, bot_response_data_list):
-
-        # If retrieval_context is a list, convert it to a string
-        context_str = ', '.join(retrieval_context_data) if isinstance(retrieval_context_data,
-                                                                      list) else retrieval_context_data
-
-        # Create the test case
-        test_case = LLMTestCase(input=user_input_data, actual_output=bot_response_data,
-                                retrieval_context=retrieval_context_data)
-
-        # Measure contextual relevancy
-        metric_contextual_relevancy.measure(test_case)
+    rows = list(zip(user_input_data_list, retrieval_context_data_list, bot_response_data_list))
+    test_cases = [LLMTestCase(input=user_input_data, actual_output=bot_response_data,
+                              retrieval_context=retrieval_context_data)
+                  for user_input_data, retrieval_context_data, bot_response_data in rows]
+    report_columns = [[user_input_data, __context_to_string(retrieval_context_data), bot_response_data]
+                      for user_input_data, retrieval_context_data, bot_response_data in rows]
 
-        # Extract the score and reason
-        score = metric_contextual_relevancy.score
-        reason = metric_contextual_relevancy.reason
-
-        # Append results to Excel sheet
-        sheet.append([user_input_data, context_str, bot_response_data, score, reason])
-
-        # Assert test for metrics
-        try:
-            assert_test(test_case, [metric_contextual_relevancy])
-        except AssertionError:
-            print(f"Assertion failed for input: {user_input_data}\nBot response: {bot_response_data}")
-            continue
-
-    # Save the Excel file
-    workbook.save(file_path)
-    print(f"Report generated: {file_path}")
+    __evaluate_metric_deepeval(
+        partial(ContextualRelevancyMetric, threshold=threshold_value, model=model_value, include_reason=True),
+        test_cases, report_columns,
+        ["User Input", "Retrieval Context", "Bot Response", "Contextual Relevancy Score", "Reason"],
+        "ContextualRelevancyReport", max_concurrency=max_concurrency)
 
 
 def evaluate_contextual_recall_deepeval(user_input_data_list, retrieval_context_data_list, bot_response_data_list,
-                                        expected_output_data_list, threshold_value=0.7, model_value="gpt-4"):
+                                        expected_output_data_list, threshold_value=0.7, model_value="gpt-4",
+                                        max_concurrency=DEFAULT_MAX_CONCURRENCY):
     """
     Evaluate the contextual recall of the bot's response to the user's input and generate a report.
     @Author: Sanoj Swaminathan
@@ -368,6 +199,7 @@ def evaluate_contextual_recall_deepeval(user_input_data_list, retrieval_context_
     :param expected_output_data_list: List of expected outputs
     :param threshold_value: Threshold for evaluation
     :param model_value: Model to evaluate contextual recall
+    :param max_concurrency: Maximum number of test cases measured at the same time
     :return: None
     """
     # Validate input lengths
@@ -375,65 +207,18 @@ def evaluate_contextual_recall_deepeval(user_input_data_list, retrieval_context_
             expected_output_data_list)):
         raise ValueError("All input lists must have the same length.")
 
-    # Initialize the metric
-    metric_contextual_recall = ContextualRecallMetric(
-        threshold=threshold_value,
-        model=model_value,
-        include_reason=True
-    )
-
-    report_folder_path = __get_deepeval_report_path()
-
-    # Prepare Excel file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_name = f"ContextualRecallReport_{timestamp}.xlsx"
-    file_path = os.path.join(report_folder_path, file_name)
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Results"
-
-    # Write header
-    sheet.append(["User Input", "Retrieval Context", "Bot Response", "Expected Output", "Recall Score", "Reason"])
-
-    # Evaluate each test case
-    for user_input_data, retrieval_context_data, bot_response_data, expected_output_data in zip(
-            user_input_data_list, retrieval_context_data_list, bot_response_data_list, expected_output_data_list):
-
-        # If retrieval_context is a list, convert it to a string
-        context_str = ', '.join(retrieval_context_data) if isinstance(retrieval_context_data,
-                                                                      list) else retrieval_context_data
-        # Create the test case
-        test_case = LLMTestCase(
-            input=user_input_data,
-            actual_output=bot_response_data,
-            expected_output=expected_output_data,
-            retrieval_context=retrieval_context_data
-        )
-
-        # Measure Contextual Recall
-        metric_contextual_recall.measure(test_case)
-
-        # Extract the score and reason
-        score = metric_contextual_recall.score
-        reason = metric_contextual_recall.reason
-
-        # Append results to Excel sheet
-        sheet.append([user_input_data, context_str, bot_response_data, expected_output_data, score, reason])
-
-        # Assert test for metrics
-        try:
-            assert_test(test_case, [metric_contextual_recall])
-        except AssertionError:
-            print(f"Assertion failed for input: {user_input_data}\nBot response: {bot_response_data}")
-            continue
-
-    # Save the Excel file
-    workbook.save(file_path)
-    print(f"Report generated: {file_path}")
+    test_cases, report_columns = __expected_output_test_cases(user_input_data_list, retrieval_context_data_list,
+                                                              bot_response_data_list, expected_output_data_list)
+    __evaluate_metric_deepeval(
+        partial(ContextualRecallMetric, threshold=threshold_value, model=model_value, include_reason=True),
+        test_cases, report_columns,
+        ["User Input", "Retrieval Context", "Bot Response", "Expected Output", "Recall Score", "Reason"],
+        "ContextualRecallReport", max_concurrency=max_concurrency)
 
 
 def evaluate_contextual_precision_deepeval(user_input_data_list, retrieval_context_data_list, bot_response_data_list,
-                                           expected_output_data_list, threshold_value=0.7, model_value="gpt-4"):
+                                           expected_output_data_list, threshold_value=0.7, model_value="gpt-4",
+                                           max_concurrency=DEFAULT_MAX_CONCURRENCY):
     """
     Evaluate the contextual precision of the bot's response to the user's input and generate a report.
     @Author: Sanoj Swaminathan
@@ -444,6 +229,7 @@ def evaluate_contextual_precision_deepeval(user_input_data_list, retrieval_conte
     :param expected_output_data_list: List of expected outputs
     :param threshold_value: Threshold for evaluation
     :param model_value: Model to evaluate contextual precision
+    :param max_concurrency: Maximum number of test cases measured at the same time
     :return: None
     """
     # Validate input lengths
@@ -451,65 +237,17 @@ def evaluate_contextual_precision_deepeval(user_input_data_list, retrieval_conte
             expected_output_data_list)):
         raise ValueError("All input lists must have the same length.")
 
-    # Initialize the metric
-    metric_contextual_precision = ContextualPrecisionMetric(
-        threshold=threshold_value,
-        model=model_value,
-        include_reason=True
-    )
-
-    report_folder_path = __get_deepeval_report_path()
-
-    # Prepare Excel file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_name = f"ContextualPrecisionReport_{timestamp}.xlsx"
-    file_path = os.path.join(report_folder_path, file_name)
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Results"
-
-    # Write header
-    sheet.append(["User Input", "Retrieval Context", "Bot Response", "Expected Output", "Precision Score", "Reason"])
-
-    # Evaluate each test case
-    for user_input_data, retrieval_context_data, bot_response_data, expected_output_data in zip(
-            user_input_data_list, retrieval_context_data_list, bot_response_data_list, expected_output_data_list):
-
-        # If retrieval_context is a list, convert it to a string
-        context_str = ', '.join(retrieval_context_data) if isinstance(retrieval_context_data,
-                                                                      list) else retrieval_context_data
-
-        # Create the test case
-        test_case = LLMTestCase(
-            input=user_input_data,
-            actual_output=bot_response_data,
-            expected_output=expected_output_data,
-            retrieval_context=retrieval_context_data
-        )
-
-        # Measure Contextual Precision
-        metric_contextual_precision.measure(test_case)
-
-        # Extract the score and reason
-        score = metric_contextual_precision.score
-        reason = metric_contextual_precision.reason
+    test_cases, report_columns = __expected_output_test_cases(user_input_data_list, retrieval_context_data_list,
+                                                              bot_response_data_list, expected_output_data_list)
+    __evaluate_metric_deepeval(
+        partial(ContextualPrecisionMetric, threshold=threshold_value, model=model_value, include_reason=True),
+        test_cases, report_columns,
+        ["User Input", "Retrieval Context", "Bot Response", "Expected Output", "Precision Score", "Reason"],
+        "ContextualPrecisionReport", max_concurrency=max_concurrency)
 
-        # Append results to Excel sheet
-        sheet.append([user_input_data, context_str, bot_response_data, expected_output_data, score, reason])
 
-        # Assert test for metrics
-        try:
-            assert_test(test_case, [metric_contextual_precision])
-        except AssertionError:
-            print(f"Assertion failed for input: {user_input_data}\nBot response: {bot_response_data}")
-            continue
-
-    # Save the Excel file
-    workbook.save(file_path)
-    print(f"Report generated: {file_path}")
-
-
-def evaluate_bias_deepeval(user_input_data_list, bot_response_data_list, threshold_value=0.5, model_value="gpt-4"):
+def evaluate_bias_deepeval(user_input_data_list, bot_response_data_list, threshold_value=0.5, model_value="gpt-4",
+                           max_concurrency=DEFAULT_MAX_CONCURRENCY):
     """
     Evaluate the bias of the bot's response to the user's input and generate a report.
     @Author: Sanoj Swaminathan
@@ -518,60 +256,26 @@ def evaluate_bias_deepeval(user_input_data_list, bot_response_data_list, thresho
     :param bot_response_data_list: List of bot responses
     :param threshold_value: Threshold for evaluation
     :param model_value: Model to evaluate bias
+    :param max_concurrency: Maximum number of test cases measured at the same time
     :return: None
     """
     # Validate input lengths
     if len(user_input_data_list) != len(bot_response_data_list):
         raise ValueError("User input data and bot response data must have the same length.")
 
-    # Initialize the metric
-    metric_bias = BiasMetric(
-        threshold=threshold_value,
-        model=model_value,
-        include_reason=True
-    )
+    test_cases = [LLMTestCase(input=user_input_data, actual_output=bot_response_data)
+                  for user_input_data, bot_response_data in zip(user_input_data_list, bot_response_data_list)]
+    report_columns = [[user_input_data, bot_response_data]
+                      for user_input_data, bot_response_data in zip(user_input_data_list, bot_response_data_list)]
 
-    report_folder_path = __get_deepeval_report_path()
+    __evaluate_metric_deepeval(
+        partial(BiasMetric, threshold=threshold_value, model=model_value, include_reason=True), test_cases,
+        report_columns, ["User Input", "Bot Response", "Bias Score", "Reason"], "BiasEvaluationReport",
+        max_concurrency=max_concurrency)
 
-    # Prepare Excel file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_name = f"BiasEvaluationReport_{timestamp}.xlsx"
-    file_path = os.path.join(report_folder_path, file_name)
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Results"
 
-    # Write header
-    sheet.append(["User Input", "Bot Response", "Bias Score", "Reason"])
-
-    # Evaluate each test case
-    for user_input_data, bot_response_data in zip(user_input_data_list, bot_response_data_list):
-        # Create the test case
-        test_case = LLMTestCase(input=user_input_data, actual_output=bot_response_data)
-
-        # Measure Bias
-        metric_bias.measure(test_case)
-
-        # Extract the score and reason
-        score = metric_bias.score
-        reason = metric_bias.reason
-
-        # Append results to Excel sheet
-        sheet.append([user_input_data, bot_response_data, score, reason])
-
-        # Assert test for metrics
-        try:
-            assert_test(test_case, [metric_bias])
-        except AssertionError:
-            print(f"Assertion failed for input: {user_input_data}\nBot response: {bot_response_data}")
-            continue
-
-    # Save the Excel file
-    workbook.save(file_path)
-    print(f"Report generated: {file_path}")
-
-
-def evaluate_toxicity_deepeval(user_input_data_list, bot_response_data_list, threshold_value=0.5, model_value="gpt-4"):
+def evaluate_toxicity_deepeval(user_input_data_list, bot_response_data_list, threshold_value=0.5, model_value="gpt-4",
+                               max_concurrency=DEFAULT_MAX_CONCURRENCY):
     """
     Evaluate the toxicity of the bot's response to the user's input and generate a report.
     @Author: Sanoj Swaminathan
@@ -580,63 +284,28 @@ def evaluate_toxicity_deepeval(user_input_data_list, bot_response_data_list, thr
     :param bot_response_data_list: List of bot responses
     :param threshold_value: Threshold for evaluation
     :param model_value: Model to evaluate toxicity
+    :param max_concurrency: Maximum number of test cases measured at the same time
     :return: None
     """
     # Validate input lengths
     if len(user_input_data_list) != len(bot_response_data_list):
         raise ValueError("User input data and bot response data must have the same length.")
 
-    # Initialize the metric
-    metric_toxicity = ToxicityMetric(
-        threshold=threshold_value,
-        model=model_value,
-        include_reason=True
-    )
-
-    report_folder_path = __get_deepeval_report_path()
-
-    # Prepare Excel file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_name = f"ToxicityEvaluationReport_{timestamp}.xlsx"
-    file_path = os.path.join(report_folder_path, file_name)
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Results"
-
-    # Write header
-    sheet.append(["User Input", "Bot Response", "Toxicity Score", "Reason"])
-
-    # Evaluate each test case
-    for user_input_data, bot_response_data in zip(user_input_data_list, bot_response_data_list):
-        # Create the test case
-        test_case = LLMTestCase(input=user_input_data, actual_output=bot_response_data)
-
-        # Measure Toxicity
-        metric_toxicity.measure(test_case)
-
-        # Extract the score and reason
-        score = metric_toxicity.score
-        reason = metric_toxicity.reason
-
-        # Append results to Excel sheet
-        sheet.append([user_input_data, bot_response_data, score, reason])
-
-        # Assert test for metrics
-        try:
-            assert_test(test_case, [metric_toxicity])
-        except AssertionError:
-            print(f"Assertion failed for input: {user_input_data}\nBot response: {bot_response_data}")
-            continue
+    test_cases = [LLMTestCase(input=user_input_data, actual_output=bot_response_data)
+                  for user_input_data, bot_response_data in zip(user_input_data_list, bot_response_data_list)]
+    report_columns = [[user_input_data, bot_response_data]
+                      for user_input_data, bot_response_data in zip(user_input_data_list, bot_response_data_list)]
 
-    # Save the Excel file
-    workbook.save(file_path)
-    print(f"Report generated: {file_path}")
+    __evaluate_metric_deepeval(
+        partial(ToxicityMetric, threshold=threshold_value, model=model_value, include_reason=True), test_cases,
+        report_columns, ["User Input", "Bot Response", "Toxicity Score", "Reason"], "ToxicityEvaluationReport",
+        max_concurrency=max_concurrency)
 
 
 def evaluate_ragas_answer_relevancy_metrics_deepeval(user_input_data_list, retrieval_context_data_list,
                                                      bot_response_data_list,
                                                      expected_output_data_list, threshold_value=0.5,
-                                                     model_value="gpt-4"):
+                                                     model_value="gpt-4", max_concurrency=DEFAULT_MAX_CONCURRENCY):
     """
     Evaluate the Ragas Answer Relevancy metrics of the bot's response to the user's input and generate a report.
     @Author: Sanoj Swaminathan
@@ -647,6 +316,7 @@ def evaluate_ragas_answer_relevancy_metrics_deepeval(user_input_data_list, retri
     :param expected_output_data_list: List of expected outputs
     :param threshold_value: Threshold for evaluation
     :param model_value: Model to evaluate relevancy
+    :param max_concurrency: Maximum number of test cases measured at the same time
     :return: None
     """
     # Validate input lengths
@@ -654,65 +324,18 @@ def evaluate_ragas_answer_relevancy_metrics_deepeval(user_input_data_list, retri
             expected_output_data_list)):
         raise ValueError("All input lists must have the same length.")
 
-    # Initialize the metric
-    metric_ragas = RAGASAnswerRelevancyMetric(
-        threshold=threshold_value,
-        model=model_value
-    )
-
-    report_folder_path = __get_deepeval_report_path()
-
-    # Prepare Excel file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_name = f"RAGASAnswerRelevancyReport_{timestamp}.xlsx"
-    file_path = os.path.join(report_folder_path, file_name)
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Results"
-
-    # Write header
-    sheet.append(["User Input", "Retrieval Context", "Bot Response", "Expected Output", "Relevancy Score"])
-
-    # Evaluate each test case
-    for user_input_data, retrieval_context_data, bot_response_data, expected_output_data in zip(
-            user_input_data_list, retrieval_context_data_list, bot_response_data_list, expected_output_data_list):
-
-        # Convert retrieval_context_data to string if it's a list
-        context_str = ', '.join(retrieval_context_data) if isinstance(retrieval_context_data,
-                                                                      list) else retrieval_context_data
-
-        # Create the test case
-        test_case = LLMTestCase(
-            input=user_input_data,
-            actual_output=bot_response_data,
-            expected_output=expected_output_data,
-            retrieval_context=retrieval_context_data
-        )
-
-        # Measure Ragas Answer Relevancy metrics
-        metric_ragas.measure(test_case)
-
-        # Extract the score
-        score = metric_ragas.score
-
-        # Append results to Excel sheet
-        sheet.append([user_input_data, context_str, bot_response_data, expected_output_data, score])
-
-        # Assert test for metrics
-        try:
-            assert_test(test_case, [metric_ragas])
-        except AssertionError:
-            print(f"Assertion failed for input: {user_input_data}\nBot response: {bot_response_data}")
-            continue
-
-    # Save the Excel file
-    workbook.save(file_path)
-    print(f"Report generated: {file_path}")
+    test_cases, report_columns = __expected_output_test_cases(user_input_data_list, retrieval_context_data_list,
+                                                              bot_response_data_list, expected_output_data_list)
+    __evaluate_metric_deepeval(
+        partial(RAGASAnswerRelevancyMetric, threshold=threshold_value, model=model_value), test_cases,
+        report_columns, ["User Input", "Retrieval Context", "Bot Response", "Expected Output", "Relevancy Score"],
+        "RAGASAnswerRelevancyReport", include_reason=False, max_concurrency=max_concurrency)
 
 
 def evaluate_ragas_faithfulness_metrics_deepeval(user_input_data_list, retrieval_context_data_list,
                                                  bot_response_data_list,
-                                                 expected_output_data_list, threshold_value=0.5, model_value="gpt-4"):
+                                                 expected_output_data_list, threshold_value=0.5, model_value="gpt-4",
+                                                 max_concurrency=DEFAULT_MAX_CONCURRENCY):
     """
     Evaluate the Ragas Faithfulness metrics of the bot's response to the user's input and generate a report.
     @Author: Sanoj Swaminathan
@@ -723,6 +346,7 @@ def evaluate_ragas_faithfulness_metrics_deepeval(user_input_data_list, retrieval
     :param expected_output_data_list: List of expected outputs
     :param threshold_value: Threshold for evaluation
     :param model_value: Model to evaluate faithfulness
+    :param max_concurrency: Maximum number of test cases measured at the same time
     :return: None
     """
     # Validate input lengths
@@ -730,66 +354,18 @@ def evaluate_ragas_faithfulness_metrics_deepeval(user_input_data_list, retrieval
             expected_output_data_list)):
         raise ValueError("All input lists must have the same length.")
 
-    # Initialize the metric
-    metric_ragas = RAGASFaithfulnessMetric(
-        threshold=threshold_value,
-        model=model_value
-    )
-
-    report_folder_path = __get_deepeval_report_path()
-
-    # Prepare Excel file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_name = f"RAGASFaithfulnessReport_{timestamp}.xlsx"
-    file_path = os.path.join(report_folder_path, file_name)
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Results"
-
-    # Write header
-    sheet.append(["User Input", "Retrieval Context", "Bot Response", "Expected Output", "Faithfulness Score"])
-
-    # Evaluate each test case
-    for user_input_data, retrieval_context_data, bot_response_data, expected_output_data in zip(
-            user_input_data_list, retrieval_context_data_list, bot_response_data_list, expected_output_data_list):
-
-        # Convert retrieval_context_data to string if it's a list
-        context_str = ', '.join(retrieval_context_data) if isinstance(retrieval_context_data,
-                                                                      list) else retrieval_context_data
-
-        # Create the test case
-        test_case = LLMTestCase(
-            input=user_input_data,
-            actual_output=bot_response_data,
-            expected_output=expected_output_data,
-            retrieval_context=retrieval_context_data
-        )
-
-        # Measure Ragas Faithfulness metrics
-        metric_ragas.measure(test_case)
-
-        # Extract the score
-        score = metric_ragas.score
-
-        # Append results to Excel sheet
-        sheet.append([user_input_data, context_str, bot_response_data, expected_output_data, score])
-
-        # Assert test for metrics
-        try:
-            assert_test(test_case, [metric_ragas])
-        except AssertionError:
-            print(f"Assertion failed for input: {user_input_data}\nBot response: {bot_response_data}")
-            continue
-
-    # Save the Excel file
-    workbook.save(file_path)
-    print(f"Report generated: {file_path}")
+    test_cases, report_columns = __expected_output_test_cases(user_input_data_list, retrieval_context_data_list,
+                                                              bot_response_data_list, expected_output_data_list)
+    __evaluate_metric_deepeval(
+        partial(RAGASFaithfulnessMetric, threshold=threshold_value, model=model_value), test_cases,
+        report_columns, ["User Input", "Retrieval Context", "Bot Response", "Expected Output", "Faithfulness Score"],
+        "RAGASFaithfulnessReport", include_reason=False, max_concurrency=max_concurrency)
 
 
 def evaluate_ragas_contextual_recall_metrics_deepeval(user_input_data_list, retrieval_context_data_list,
                                                       bot_response_data_list,
                                                       expected_output_data_list, threshold_value=0.5,
-                                                      model_value="gpt-4"):
+                                                      model_value="gpt-4", max_concurrency=DEFAULT_MAX_CONCURRENCY):
     """
     Evaluate the Ragas Contextual Recall metrics of the bot's response to the user's input and generate a report.
     @Author: Sanoj Swaminathan
@@ -800,6 +376,7 @@ def evaluate_ragas_contextual_recall_metrics_deepeval(user_input_data_list, retr
     :param expected_output_data_list: List of expected outputs
     :param threshold_value: Threshold for evaluation
     :param model_value: Model to evaluate contextual recall
+    :param max_concurrency: Maximum number of test cases measured at the same time
     :return: None
     """
     # Validate input lengths
@@ -807,67 +384,19 @@ def evaluate_ragas_contextual_recall_metrics_deepeval(user_input_data_list, retr
             expected_output_data_list)):
         raise ValueError("All input lists must have the same length.")
 
-    # Initialize the metric
-    metric_ragas = RAGASContextualRecallMetric(
-        threshold=threshold_value,
-        model=model_value
-    )
-
-    report_folder_path = __get_deepeval_report_path()
-
-    # Prepare Excel file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_name = f"RAGASContextualRecallReport_{timestamp}.xlsx"
-    file_path = os.path.join(report_folder_path, file_name)
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Results"
-
-    # Write header
-    sheet.append(
-        ["User Input", "Retrieval Context", "Bot Response", "Expected Output", "Contextual Recall Score"])
-
-    # Evaluate each test case
-    for user_input_data, retrieval_context_data, bot_response_data, expected_output_data in zip(
-            user_input_data_list, retrieval_context_data_list, bot_response_data_list, expected_output_data_list):
-
-        # Convert retrieval_context_data to string if it's a list
-        context_str = ', '.join(retrieval_context_data) if isinstance(retrieval_context_data,
-                                                                      list) else retrieval_context_data
-
-        # Create the test case
-        test_case = LLMTestCase(
-            input=user_input_data,
-            actual_output=bot_response_data,
-            expected_output=expected_output_data,
-            retrieval_context=retrieval_context_data
-        )
-
-        # Measure Ragas Contextual Recall metrics
-        metric_ragas.measure(test_case)
-
-        # Extract the score
-        score = metric_ragas.score
-
-        # Append results to Excel sheet
-        sheet.append([user_input_data, context_str, bot_response_data, expected_output_data, score])
-
-        # Assert test for metrics
-        try:
-            assert_test(test_case, [metric_ragas])
-        except AssertionError:
-            print(f"Assertion failed for input: {user_input_data}\nBot response: {bot_response_data}")
-            continue
-
-    # Save the Excel file
-    workbook.save(file_path)
-    print(f"Report generated: {file_path}")
+    test_cases, report_columns = __expected_output_test_cases(user_input_data_list, retrieval_context_data_list,
+                                                              bot_response_data_list, expected_output_data_list)
+    __evaluate_metric_deepeval(
+        partial(RAGASContextualRecallMetric, threshold=threshold_value, model=model_value), test_cases,
+        report_columns,
+        ["User Input", "Retrieval Context", "Bot Response", "Expected Output", "Contextual Recall Score"],
+        "RAGASContextualRecallReport", include_reason=False, max_concurrency=max_concurrency)
 
 
 def evaluate_ragas_contextual_precision_metrics_deepeval(user_input_data_list, retrieval_context_data_list,
                                                          bot_response_data_list,
                                                          expected_output_data_list, threshold_value=0.5,
-                                                         model_value="gpt-4"):
+                                                         model_value="gpt-4", max_concurrency=DEFAULT_MAX_CONCURRENCY):
     """
     Evaluate the Ragas Contextual Precision metrics of the bot's response to the user's input and generate a report.
     @Author: Sanoj Swaminathan
@@ -878,6 +407,7 @@ def evaluate_ragas_contextual_precision_metrics_deepeval(user_input_data_list, r
     :param expected_output_data_list: List of expected outputs
     :param threshold_value: Threshold for evaluation
     :param model_value: Model to evaluate contextual precision
+    :param max_concurrency: Maximum number of test cases measured at the same time
     :return: None
     """
     # Validate input lengths
@@ -885,65 +415,17 @@ def evaluate_ragas_contextual_precision_metrics_deepeval(user_input_data_list, r
             expected_output_data_list)):
         raise ValueError("All input lists must have the same length.")
 
-    # Initialize the metric
-    metric_ragas = RAGASContextualPrecisionMetric(
-        threshold=threshold_value,
-        model=model_value
-    )
-
-    report_folder_path = __get_deepeval_report_path()
-
-    # Prepare Excel file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_name = f"RAGASContextualPrecisionReport_{timestamp}.xlsx"
-    file_path = os.path.join(report_folder_path, file_name)
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Results"
-
-    # Write header
-    sheet.append(
-        ["User Input", "Retrieval Context", "Bot Response", "Expected Output", "Contextual Precision Score"])
-
-    # Evaluate each test case
-    for user_input_data, retrieval_context_data, bot_response_data, expected_output_data in zip(
-            user_input_data_list, retrieval_context_data_list, bot_response_data_list, expected_output_data_list):
-
-        # Convert retrieval_context_data to string if it's a list
-        context_str = ', '.join(retrieval_context_data) if isinstance(retrieval_context_data,
-                                                                      list) else retrieval_context_data
-
-        # Create the test case
-        test_case = LLMTestCase(
-            input=user_input_data,
-            actual_output=bot_response_data,
-            expected_output=expected_output_data,
-            retrieval_context=retrieval_context_data
-        )
-
-        # Measure Ragas Contextual Precision metrics
-        metric_ragas.measure(test_case)
-
-        # Extract the score
-        score = metric_ragas.score
-
-        # Append results to Excel sheet
-        sheet.append([user_input_data, context_str, bot_response_data, expected_output_data, score])
-
-        # Assert test for metrics
-        try:
-            assert_test(test_case, [metric_ragas])
-        except AssertionError:
-            print(f"Assertion failed for input: {user_input_data}\nBot response: {bot_response_data}")
-            continue
-
-    # Save the Excel file
-    workbook.save(file_path)
-    print(f"Report generated: {file_path}")
+    test_cases, report_columns = __expected_output_test_cases(user_input_data_list, retrieval_context_data_list,
+                                                              bot_response_data_list, expected_output_data_list)
+    __evaluate_metric_deepeval(
+        partial(RAGASContextualPrecisionMetric, threshold=threshold_value, model=model_value), test_cases,
+        report_columns,
+        ["User Input", "Retrieval Context", "Bot Response", "Expected Output", "Contextual Precision Score"],
+        "RAGASContextualPrecisionReport", include_reason=False, max_concurrency=max_concurrency)
 
 
 def evaluate_metrics_using_g_eval_deepeval(metric_name, criteria_details, user_input_data_list, bot_response_data_list,
-                                           expected_output_data_list):
+                                           expected_output_data_list, max_concurrency=DEFAULT_MAX_CONCURRENCY):
     """
     Evaluate the metrics using G-Eval and generate an Excel report.
     @Author: Sanoj Swaminathan
@@ -953,75 +435,46 @@ def evaluate_metrics_using_g_eval_deepeval(metric_name, criteria_details, user_i
     :param user_input_data_list: List of user input data for multiple test cases.
     :param bot_response_data_list: List of bot responses for multiple test cases.
     :param expected_output_data_list: List of expected output data for multiple test cases.
+    :param max_concurrency: Maximum number of test cases measured at the same time
     :return: None
     """
     # Validate input lengths
     if not (len(user_input_data_list) == len(bot_response_data_list) == len(expected_output_data_list)):
         raise ValueError("All input lists must have the same length.")
 
-    report_folder_path = __get_deepeval_report_path()
-
-    # Prepare Excel file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_name = f"G-Eval_Metrics_Report_{timestamp}.xlsx"
-    file_path = os.path.join(report_folder_path, file_name)
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Results"
-
-    # Write header
-    sheet.append(["User Input", "Bot Response", "Expected Output", "Metric Score", "Reason"])
-
-    # Evaluate each test case
-    for user_input_data, bot_response_data, expected_output_data in zip(
-            user_input_data_list, bot_response_data_list, expected_output_data_list):
-
-        # Initialize the metric
-        correctness_metric = GEval(
-            name=metric_name,
-            criteria=criteria_details,
-            evaluation_params=[LLMTestCaseParams.INPUT, LLMTestCaseParams.ACTUAL_OUTPUT,
-                               LLMTestCaseParams.EXPECTED_OUTPUT]
-        )
-
-        # Create the test case for metric evaluation using G-Eval
-        test_case = LLMTestCase(
-            input=user_input_data,
-            actual_output=bot_response_data,
-            expected_output=expected_output_data
-        )
-
-        # Measure the metric using G-Eval
-        correctness_metric.measure(test_case)
-
-        # Extract the score and reason
-        score = correctness_metric.score
-        reason = correctness_metric.reason
-
-        # Append the results to the Excel sheet
-        sheet.append([user_input_data, bot_response_data, expected_output_data, score, reason])
-
-        # Print the score and reason for the metric
-        print(f"Score: {score}, Reason: {reason}")
-
-        # Assert test for metrics
-        try:
-            assert_test(test_case, [correctness_metric])
-        except AssertionError:
-            print(f"Assertion failed for input: {user_input_data}\nBot response: {bot_response_data}")
-            continue
-
-    # Save the Excel file
-    workbook.save(file_path)
-    print(f"Report generated: {file_path}")
+    rows = list(zip(user_input_data_list, bot_response_data_list, expected_output_data_list))
+    # Create the test cases for metric evaluation using G-Eval
+    test_cases = [LLMTestCase(input=user_input_data, actual_output=bot_response_data,
+                              expected_output=expected_output_data)
+                  for user_input_data, bot_response_data, expected_output_data in rows]
+
+    metrics = __evaluate_metric_deepeval(
+        partial(GEval, name=metric_name, criteria=criteria_details,
+                evaluation_params=[LLMTestCaseParams.INPUT, LLMTestCaseParams.ACTUAL_OUTPUT,
+                                   LLMTestCaseParams.EXPECTED_OUTPUT]),
+        test_cases, [list(row) for row in rows],
+        ["User Input", "Bot Response", "Expected Output", "Metric Score", "Reason"], "G-Eval_Metrics_Report",
+        max_concurrency=max_concurrency)
+
+    # Print the score and reason for the metric
+    for metric in metrics:
+        print(f"Score: {metric.score}, Reason: {metric.reason}")
 
 
 def evaluate_all_metrics_deepeval(user_input_data_list, retrieval_context_data_list, bot_response_data_list,
                                   expected_output_data_list, metric_name, criteria_details,
-                                  threshold_value=0.9, model_value="gpt-4"):
+                                  threshold_value=0.9, model_value="gpt-4", max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                                  resume=None, tier_rules=None, audit_fraction=0.1, sampling_plan=None):
     """
     Evaluate all metrics based on the given user's input, bot's response, context, and ground truth,
     and generate an Excel report with the results for multiple test cases.
+    The metrics of all test cases are measured concurrently, each test case with its own metric instances.
+    Every result is journaled as it completes; an interrupted run is resumed by passing its run id.
+    With tier rules, offline metrics against the expected output are computed first and only the rows they leave
+    undecided, plus an audit sample of the others, are sent to the LLM judges.
+    With a sampling plan, only a stratified sample of the test cases is judged, grown in rounds until the bootstrap
+    confidence interval of every metric is narrow enough; the report then holds the sampled test cases and the
+    estimates of the metrics with their confidence intervals.
     @Author: Sanoj Swaminathan
     @Date: 06-12-2024
     :param user_input_data_list:
@@ -1032,26 +485,31 @@ def evaluate_all_metrics_deepeval(user_input_data_list, retrieval_context_data_l
     :param criteria_details:
     :param threshold_value:
     :param model_value:
-    :return:
-    """
-    # Initialize all metrics
-    global metric
-    metrics = [
-        FaithfulnessMetric(threshold=threshold_value, model=model_value, include_reason=True),
-        AnswerRelevancyMetric(threshold=threshold_value, model=model_value, include_reason=True),
-        HallucinationMetric(threshold=threshold_value, model=model_value, include_reason=True),
-        ContextualRelevancyMetric(threshold=threshold_value, model=model_value, include_reason=True),
-        ContextualRecallMetric(threshold=threshold_value, model=model_value, include_reason=True),
-        ContextualPrecisionMetric(threshold=threshold_value, model=model_value, include_reason=True),
-        BiasMetric(threshold=threshold_value, model=model_value, include_reason=True),
-        ToxicityMetric(threshold=threshold_value, model=model_value, include_reason=True),
-        RAGASAnswerRelevancyMetric(threshold=threshold_value, model=model_value),
-        RAGASFaithfulnessMetric(threshold=threshold_value, model=model_value),
-        RAGASContextualRecallMetric(threshold=threshold_value, model=model_value),
-        RAGASContextualPrecisionMetric(threshold=threshold_value, model=model_value),
-        GEval(name=metric_name, criteria=criteria_details, evaluation_params=[LLMTestCaseParams.INPUT,
-                                                                              LLMTestCaseParams.ACTUAL_OUTPUT,
-                                                                              LLMTestCaseParams.EXPECTED_OUTPUT])
+    :param max_concurrency: Maximum number of metric measures running at the same time
+    :param resume: Run id of an interrupted run, its journaled results are not measured again
+    :param tier_rules: TierRules of the tier 1 evaluation, read from the TIERED_EVALUATION section of config.ini
+        if not given; every row is judged when neither is set
+    :param audit_fraction: Fraction of the rows decided by tier 1 that are judged anyway, to measure the agreement
+    :param sampling_plan: SamplingPlan of the sampling mode, None to judge every test case
+    :return: Run id
+    """
+    # Factories of all metrics, every test case gets new instances
+    metric_factories = [
+        partial(FaithfulnessMetric, threshold=threshold_value, model=model_value, include_reason=True),
+        partial(AnswerRelevancyMetric, threshold=threshold_value, model=model_value, include_reason=True),
+        partial(HallucinationMetric, threshold=threshold_value, model=model_value, include_reason=True),
+        partial(ContextualRelevancyMetric, threshold=threshold_value, model=model_value, include_reason=True),
+        partial(ContextualRecallMetric, threshold=threshold_value, model=model_value, include_reason=True),
+        partial(ContextualPrecisionMetric, threshold=threshold_value, model=model_value, include_reason=True),
+        partial(BiasMetric, threshold=threshold_value, model=model_value, include_reason=True),
+        partial(ToxicityMetric, threshold=threshold_value, model=model_value, include_reason=True),
+        partial(RAGASAnswerRelevancyMetric, threshold=threshold_value, model=model_value),
+        partial(RAGASFaithfulnessMetric, threshold=threshold_value, model=model_value),
+        partial(RAGASContextualRecallMetric, threshold=threshold_value, model=model_value),
+        partial(RAGASContextualPrecisionMetric, threshold=threshold_value, model=model_value),
+        partial(GEval, name=metric_name, criteria=criteria_details,
+                evaluation_params=[LLMTestCaseParams.INPUT, LLMTestCaseParams.ACTUAL_OUTPUT,
+                                   LLMTestCaseParams.EXPECTED_OUTPUT])
     ]
 
     excluded_metrics = {"HallucinationMetric", "BiasMetric", "ToxicityMetric"}
@@ -1061,122 +519,237 @@ def evaluate_all_metrics_deepeval(user_input_data_list, retrieval_context_data_l
             expected_output_data_list)):
         raise ValueError("All input lists must have the same length.")
 
+    # Read the tier 1 rules from the config.ini file, TIERED_EVALUATION decides if tier 1 is used
+    if tier_rules is None:
+        tier_rules = TierRules.from_config('../config.ini')
+
     report_folder_path = __get_deepeval_report_path()
 
     # Prepare Excel file
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     file_name = f"AllMetricsReport_{timestamp}.xlsx"
     file_path = os.path.join(report_folder_path, file_name)
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Metrics Results"
 
     # Write header
     header = ["User Input", "Context", "Bot Response", "Expected Output"]
-    for metric in metrics:
-        header.append(f"{metric.__class__.__name__} Score")
+    for metric_factory in metric_factories:
+        header.append(f"{metric_factory.func.__name__} Score")
     header.append("Overall Rating")
-    sheet.append(header)
-
-    # Iterate over test cases
-    for user_input, retrieval_context, bot_response, expected_output in zip(user_input_data_list,
-                                                                            retrieval_context_data_list,
-                                                                            bot_response_data_list,
-                                                                            expected_output_data_list):
-
-        # If retrieval_context is a list, convert it to a string
-        context_str = ', '.join(retrieval_context) if isinstance(retrieval_context, list) else retrieval_context
-
-        # Create the test case for the current set of data
-        test_case = LLMTestCase(
-            input=user_input,
-            actual_output=bot_response,
-            retrieval_context=retrieval_context,
-            context=retrieval_context,
-            expected_output=expected_output
-        )
+    if tier_rules is not None:
+        header += [f"{name} (Tier 1)" for name in LOCAL_METRICS] + ["Tier 1 Decision"]
+
+    # Create the test cases
+    test_cases = [LLMTestCase(input=user_input, actual_output=bot_response, retrieval_context=retrieval_context,
+                              context=retrieval_context, expected_output=expected_output)
+                  for user_input, retrieval_context, bot_response, expected_output in zip(user_input_data_list,
+                                                                                          retrieval_context_data_list,
+                                                                                          bot_response_data_list,
+                                                                                          expected_output_data_list)]
+
+    journal = RunJournal(resume)
+    print(f"Evaluation run id: {journal.run_id}")
+
+    # Tier 1: offline metrics decide the clear passes and failures, the other rows go to the judges
+    judged_rows = set(range(len(test_cases)))
+    if tier_rules is not None:
+        local_scores = compute_local_metrics(bot_response_data_list, expected_output_data_list)
+        decisions = tier_rules.classify(local_scores)
+        undecided_rows = set(np.flatnonzero(decisions.to_numpy() == JUDGE).tolist())
+        judged_rows = undecided_rows | select_audit_rows(decisions, audit_fraction)
+
+    tier_judged_rows = set(judged_rows)
+
+    # Every judged test case gets its own metric instances, by row
+    measured_metrics = {}
+
+    def measure_rows(rows):
+        new_rows = [row for row in rows if row not in measured_metrics]
+        for row in new_rows:
+            measured_metrics[row] = [metric_factory() for metric_factory in metric_factories]
+        # Restore the results journaled by the interrupted run
+        pending = [(row, metric) for row in new_rows for metric in measured_metrics[row]
+                   if not restore_metric(journal, row, metric)]
+
+        # Measure the other metrics concurrently, each result is journaled as soon as it completes
+        measure_pairs([metric for _, metric in pending], [test_cases[row] for row, _ in pending], max_concurrency,
+                      __get_judge_cache(),
+                      lambda position, metric: record_metric(journal, pending[position][0], metric))
+
+    metric_names = [metric_factory.func.__name__ for metric_factory in metric_factories]
+    if sampling_plan is None:
+        measure_rows(sorted(judged_rows))
+    else:
+        # Judge a growing stratified sample of the test cases until every confidence interval is narrow enough
+        row_strata = sampling_plan.row_strata(len(test_cases))
+        order = sampling_plan.row_order(sorted(judged_rows), row_strata)
+        for size in sampling_plan.rounds(len(order)):
+            measure_rows(order[:size])
+            intervals = metric_intervals({name: [measured_metrics[row][position].score for row in order[:size]]
+                                          for position, name in enumerate(metric_names)},
+                                         order[:size], row_strata, sampling_plan, order)
+            print(f"Sampled {size} of {len(order)} test case(s), widest confidence interval: "
+                  f"{intervals['width'].max():.3f}")
+            if (intervals["width"] <= sampling_plan.target_width).all():
+                break
+        judged_rows = set(order[:size])
+
+    # Read the config.ini file once, NEED_TO_SEND_FEEDBACK_TO_CONFIDENT_AI decides if feedback is sent
+    feedback_sink = create_feedback_sink('../config.ini')
+
+    report = ReportWriter(file_path, header, sheet_title="Metrics Results")
+
+    # Iterate over the judged test cases and the ones decided by tier 1
+    reported_rows = [row for row in range(len(test_cases))
+                     if row in judged_rows or row not in tier_judged_rows]
+    judge_passed = {}
+    for row in reported_rows:
+        test_case, retrieval_context = test_cases[row], retrieval_context_data_list[row]
+        user_input, bot_response, expected_output = test_case.input, test_case.actual_output, test_case.expected_output
 
         # Collect results for this test case
-        results_row = [user_input, context_str, bot_response, expected_output]
-        metric_scores = []
-        for metric in metrics:
-            try:
-                metric.measure(test_case)
+        results_row = [user_input, __context_to_string(retrieval_context), bot_response, expected_output]
+        if row in judged_rows:
+            metric_scores = []
+            for metric in measured_metrics[row]:
                 results_row.append(metric.score)
 
                 # Include only metrics not in the excluded list for average calculation
                 if metric.__class__.__name__ not in excluded_metrics:
                     metric_scores.append(metric.score)
 
-                # Assert the metric
-                assert_test(test_case, [metric])
-            except AssertionError:
-                print(f"Assertion failed for {metric.__class__.__name__} on test case.")
-                continue
-
-        # Calculate the average score and determine the rating
-        average_score = sum(metric_scores) / len(metric_scores) if metric_scores else 0
-        if average_score >= 0.9:
-            rating = 5
-        elif 0.7 < average_score < 0.9:
-            rating = 3
-        elif 0.5 < average_score <= 0.7:
-            rating = 2
+                # Check the metric against its threshold
+                if not metric.is_successful():
+                    print(f"Assertion failed for {metric.__class__.__name__} on test case.")
+
+            # Calculate the average score and determine the rating
+            average_score = sum(metric_scores) / len(metric_scores) if metric_scores else 0
+            if average_score >= 0.9:
+                rating = 5
+            elif 0.7 < average_score < 0.9:
+                rating = 3
+            elif 0.5 < average_score <= 0.7:
+                rating = 2
+            else:
+                rating = 1
+            judge_passed[row] = average_score >= threshold_value
         else:
-            rating = 1
+            # Decided by tier 1 without the judges
+            results_row += [None] * len(metric_factories)
+            rating = 5 if decisions.iloc[row] == PASS else 1
 
         results_row.append(rating)
-        sheet.append(results_row)
-
-        # Read the config.ini file and fetch the value of NEED_TO_SEND_FEEDBACK_TO_CONFIDENT_AI
-        try:
-            config = configparser.ConfigParser()
-            config.read('../config.ini')
-            need_to_send_feedback = config.getboolean('OTHER_CONFIG', 'NEED_TO_SEND_FEEDBACK_TO_CONFIDENT_AI')
-            confident_api_key_value = config.get('OTHER_CONFIG', 'CONFIDENT_API_KEY')
-            if need_to_send_feedback:
-                deepeval.login_with_confident_api_key(confident_api_key_value)
-                response_id = deepeval.monitor(
-                    event_name="Chatbot",
-                    model=model_value,
-                    input=user_input,
-                    response=bot_response
-                )
-                deepeval.send_feedback(
-                    response_id=response_id,
-                    rating=rating,
-                    explanation=metric.reason if metric.reason else "No explanation provided.",
-                    expected_response=expected_output
-                )
-        except Exception as e:
-            print(e)
-            continue
+        if tier_rules is not None:
+            results_row += local_scores.iloc[row].tolist() + [decisions.iloc[row]]
+        report.append(results_row)
+
+        # Queue the feedback, the sink sends it in the background
+        if feedback_sink is not None:
+            metric = measured_metrics[row][-1] if row in judged_rows else None
+            feedback_sink.submit({
+                "model": model_value,
+                "input": user_input,
+                "response": bot_response,
+                "rating": rating,
+                "explanation": (metric.reason if metric.reason else "No explanation provided.") if row in judged_rows
+                else f"Decided by the tier 1 metrics: {decisions.iloc[row]}",
+                "expected_response": expected_output
+            })
+
+    scores = {name: [measured_metrics[row][position].score if row in judged_rows else None for row in reported_rows]
+              for position, name in enumerate(metric_names)}
+    if tier_rules is not None:
+        skipped_rows = len(test_cases) - len(tier_judged_rows)
+        agreement = tier_agreement(decisions, judge_passed)
+        summary = [["Rows", len(test_cases)],
+                   ["Passed by tier 1", int((decisions == PASS).sum())],
+                   ["Failed by tier 1", int((decisions == FAIL).sum())],
+                   ["Sent to the judges", int((decisions == JUDGE).sum())],
+                   ["Audited tier 1 decisions", agreement["audited"]],
+                   ["Judge calls skipped", skipped_rows * len(metric_factories)],
+                   ["Tier 1 agreement with the judges", agreement["agreement"]],
+                   ["Agreement on tier 1 passes", agreement["pass_agreement"]],
+                   ["Agreement on tier 1 failures", agreement["fail_agreement"]]]
+        report.append_sheet("Tier 1 Summary", [["Measure", "Value"]] + summary)
+        print(f"Tier 1 skipped {skipped_rows * len(metric_factories)} judge call(s) on {skipped_rows} of "
+              f"{len(test_cases)} test case(s), agreement with the judges on {agreement['audited']} audited "
+              f"test case(s): {agreement['agreement']}")
+        scores.update({f"{name}_tier1": local_scores[name].iloc[reported_rows].tolist() for name in LOCAL_METRICS})
+    if sampling_plan is not None:
+        intervals = metric_intervals({name: scores[name] for name in metric_names}, reported_rows, row_strata,
+                                     sampling_plan, order)
+        report.append_sheet("Sampling Summary",
+                            [["Metric", "Test Cases Scored", "Estimate",
+                              f"{sampling_plan.confidence:.0%} CI Lower", f"{sampling_plan.confidence:.0%} CI Upper",
+                              "CI Width"]]
+                            + intervals[["metric", "rows", "estimate", "lower", "upper", "width"]].values.tolist()
+                            + [[], ["Test cases sampled", len(judged_rows)], ["Test cases to judge", len(order)]])
+        for interval in intervals.itertuples():
+            print(f"{interval.metric}: {interval.estimate:.3f} "
+                  f"[{interval.lower:.3f}, {interval.upper:.3f}] on {interval.rows} test case(s)")
 
     # Save the Excel file
-    workbook.save(file_path)
+    report.close()
     print(f"Consolidated Metrics report generated: {file_path}")
+    __store_results(journal.run_id, [user_input_data_list[row] for row in reported_rows], scores)
+
+    if feedback_sink is not None:
+        feedback_sink.close()
+        print(f"Feedback sent for {feedback_sink.sent} test case(s), {feedback_sink.spooled} spooled for the next run")
+    return journal.run_id
 
 
-def evaluate_all_metrics_ragas(data_samples):
+def evaluate_all_metrics_ragas(data_samples, resume=None, batch_size=20):
     """
     Evaluate all metrics based on the given user's input, bot's response, context, and ground truth,
     and generate an Excel report with the results for multiple test cases.
+    The rows are evaluated in batches and every score is journaled, the report is built from the journal; an
+    interrupted run is resumed by passing its run id.
     @Author: Sanoj Swaminathan
     @Date: 06-12-2024
     :param data_samples:
-    :return:
-    """
-    dataset = Dataset.from_dict(data_samples)
-    score = evaluate(dataset,
-                     metrics=[context_precision, context_recall, context_entity_recall, faithfulness, answer_relevancy,
-                              answer_correctness, answer_similarity])
-    df = score.to_pandas()
-    numeric_columns = df.columns[4:]
-    df['Average Score'] = df[numeric_columns].mean(axis=1)
+    :param resume: Run id of an interrupted run, its journaled scores are not evaluated again
+    :param batch_size: Number of rows evaluated per batch
+    :return: Run id
+    """
+    metrics = [context_precision, context_recall, context_entity_recall, faithfulness, answer_relevancy,
+               answer_correctness, answer_similarity]
+    metric_names = [metric.name for metric in metrics]
+    journal = RunJournal(resume)
+    print(f"Evaluation run id: {journal.run_id}")
+
+    session = __get_ragas_session(data_samples)
+    dataset = session.dataset
+    pending_rows = [row for row in range(len(dataset))
+                    if any(journal.get(row, name) is None for name in ["sample"] + metric_names)]
+    for start in range(0, len(pending_rows), batch_size):
+        rows = pending_rows[start:start + batch_size]
+        batch_metrics = [metric for metric in metrics if any(journal.get(row, metric.name) is None for row in rows)]
+        batch_df = evaluate(dataset.select(rows), metrics=batch_metrics, llm=session.llm,
+                            embeddings=session.embeddings, run_config=session.run_config).to_pandas()
+        for row, values in zip(rows, batch_df.to_dict("records")):
+            if journal.get(row, "sample") is None:
+                journal.record(row, "sample", {name: value for name, value in values.items()
+                                               if name not in metric_names})
+            for metric in batch_metrics:
+                # Failed scores are not journaled, a resumed run evaluates them again
+                if journal.get(row, metric.name) is None and not is_missing(values[metric.name]):
+                    journal.record(row, metric.name, {"score": float(values[metric.name])})
+
+    # Build the report from the journal
+    records = []
+    for row in range(len(dataset)):
+        record = dict(journal.get(row, "sample") or {})
+        for name in metric_names:
+            result = journal.get(row, name)
+            record[name] = result["score"] if result is not None else float("nan")
+        records.append(record)
+    df = pd.DataFrame(records)
+    df['Average Score'] = df[metric_names].mean(axis=1)
     df['Overall Rating'] = df['Average Score'].apply(__calculate_rating_for_ragas)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     file_name = f"AllMetricsReport_{timestamp}.xlsx"
-    __generate_report(df, file_name)
+    __generate_report(df, file_name, journal.run_id)
+    return journal.run_id
 
 
 def evaluate_context_precision_ragas(data_samples):
@@ -1188,10 +761,7 @@ def evaluate_context_precision_ragas(data_samples):
     :param data_samples:
     :return:
     """
-    dataset = Dataset.from_dict(data_samples)
-    score = evaluate(dataset,
-                     metrics=[context_precision])
-    df = score.to_pandas()
+    df = __get_ragas_session(data_samples).evaluate([context_precision])
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     file_name = f"ContextPrecisionMetricsReport_{timestamp}.xlsx"
     __generate_report(df, file_name)
@@ -1206,10 +776,7 @@ def evaluate_context_recall_ragas(data_samples):
     :param data_samples:
     :return:
     """
-    dataset = Dataset.from_dict(data_samples)
-    score = evaluate(dataset,
-                     metrics=[context_recall])
-    df = score.to_pandas()
+    df = __get_ragas_session(data_samples).evaluate([context_recall])
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     file_name = f"ContextRecallMetricsReport_{timestamp}.xlsx"
     __generate_report(df, file_name)
@@ -1224,10 +791,7 @@ def evaluate_context_entity_recall_ragas(data_samples):
     :param data_samples:
     :return:
     """
-    dataset = Dataset.from_dict(data_samples)
-    score = evaluate(dataset,
-                     metrics=[context_entity_recall])
-    df = score.to_pandas()
+    df = __get_ragas_session(data_samples).evaluate([context_entity_recall])
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     file_name = f"ContextEntityRecallMetricsReport_{timestamp}.xlsx"
     __generate_report(df, file_name)
@@ -1242,10 +806,7 @@ def evaluate_faithfulness_ragas(data_samples):
     :param data_samples:
     :return:
     """
-    dataset = Dataset.from_dict(data_samples)
-    score = evaluate(dataset,
-                     metrics=[faithfulness])
-    df = score.to_pandas()
+    df = __get_ragas_session(data_samples).evaluate([faithfulness])
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     file_name = f"FaithfulnessMetricsReport_{timestamp}.xlsx"
     __generate_report(df, file_name)
@@ -1260,10 +821,7 @@ def evaluate_answer_relevancy_ragas(data_samples):
     :param data_samples:
     :return:
     """
-    dataset = Dataset.from_dict(data_samples)
-    score = evaluate(dataset,
-                     metrics=[answer_relevancy])
-    df = score.to_pandas()
+    df = __get_ragas_session(data_samples).evaluate([answer_relevancy])
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     file_name = f"AnswerRelevancyMetricsReport_{timestamp}.xlsx"
     __generate_report(df, file_name)
@@ -1278,10 +836,7 @@ def evaluate_answer_correctness_ragas(data_samples):
     :param data_samples:
     :return:
     """
-    dataset = Dataset.from_dict(data_samples)
-    score = evaluate(dataset,
-                     metrics=[answer_correctness])
-    df = score.to_pandas()
+    df = __get_ragas_session(data_samples).evaluate([answer_correctness])
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     file_name = f"AnswerCorrectnessMetricsReport_{timestamp}.xlsx"
     __generate_report(df, file_name)
@@ -1296,28 +851,139 @@ def evaluate_answer_similarity_ragas(data_samples):
     :param data_samples:
     :return:
     """
-    dataset = Dataset.from_dict(data_samples)
-    score = evaluate(dataset,
-                     metrics=[answer_similarity])
-    df = score.to_pandas()
+    df = __get_ragas_session(data_samples).evaluate([answer_similarity])
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     file_name = f"AnswerSimilarityMetricsReport_{timestamp}.xlsx"
     __generate_report(df, file_name)
 
 
-def __generate_report(df, file_name):
+def __generate_report(df, file_name, run_id=None):
     """
-    Generate an Excel report with the results for multiple test cases.
+    Generate an Excel report with the results for multiple test cases, and store the scores in the results store.
     @Author: Sanoj Swaminathan
     @Date: 06-12-2024
     :param df:
     :param file_name:
+    :param run_id: Run id of the scores, a new one if not given
     :return:
     """
     report_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'reports_ragas')
     os.makedirs(report_dir, exist_ok=True)
     df.to_excel(os.path.join(report_dir, file_name), index=False)
 
+    # The first four columns are the samples, then come the metric scores
+    metric_columns = [column for column in df.columns[4:] if column not in ("Average Score", "Overall Rating")]
+    __store_results(run_id or new_run_id(), df["user_input"], {column: df[column] for column in metric_columns})
+
+
+def __store_results(run_id, questions, scores):
+    """
+    Append the per-row, per-metric scores of a run to the results store
+    :param run_id: Run id
+    :param questions: List of the user inputs
+    :param scores: Dictionary of metric name to the list of scores
+    :return:
+    """
+    ResultsStore().append(run_id, list(questions), scores)
+    print(f"Scores stored in the results store as run {run_id}")
+
+
+def __evaluate_metric_deepeval(metric, test_cases, report_columns, header, report_name, include_reason=True,
+                               max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """
+    Measure one metric on every test case, exactly once, and generate the Excel report of the results.
+    Pass or fail comes from the score and threshold stored by the measure, so no test case is judged twice, and
+    test cases judged in an earlier run are read from the judge cache.
+    :param metric: Function returning a new metric instance, or the list of metric instances of the test cases
+    :param test_cases: List of DeepEval test cases
+    :param report_columns: List with, for each test case, the report columns written before the score
+    :param header: Header row of the report
+    :param report_name: Report file name, without the timestamp
+    :param include_reason: Write the reason of the metric after the score
+    :param max_concurrency: Maximum number of test cases measured at the same time
+    :return: List of the measured metric instances, in test case order
+    """
+    metrics = metric if isinstance(metric, list) else [metric() for _ in test_cases]
+    judge_cache = __get_judge_cache()
+    hits = judge_cache.hits
+    measure_pairs(metrics, test_cases, max_concurrency, judge_cache)
+    print(f"Judge cache: {judge_cache.hits - hits} of {len(test_cases)} test case(s) reused")
+
+    report_folder_path = __get_deepeval_report_path()
+
+    # Prepare Excel file
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    file_name = f"{report_name}_{timestamp}.xlsx"
+    file_path = os.path.join(report_folder_path, file_name)
+    report = ReportWriter(file_path, header)
+
+    for test_case, columns, measured_metric in zip(test_cases, report_columns, metrics):
+        # Append results to the report, each row is flushed to the JSONL sidecar
+        report.append(columns + [measured_metric.score] + ([measured_metric.reason] if include_reason else []))
+
+        if not measured_metric.is_successful():
+            print(f"Assertion failed for input: {test_case.input}\nBot response: {test_case.actual_output}")
+
+    # Save the Excel file
+    report.close()
+    print(f"Report generated: {file_path}")
+    if metrics:
+        __store_results(new_run_id(), [test_case.input for test_case in test_cases],
+                        {type(metrics[0]).__name__: [measured_metric.score for measured_metric in metrics]})
+    return metrics
+
+
+def __expected_output_test_cases(user_input_data_list, retrieval_context_data_list, bot_response_data_list,
+                                 expected_output_data_list):
+    """
+    Create the test cases and report columns of the metrics comparing the bot response with an expected output.
+    :param user_input_data_list: List of user inputs
+    :param retrieval_context_data_list: List of retrieval contexts
+    :param bot_response_data_list: List of bot responses
+    :param expected_output_data_list: List of expected outputs
+    :return: Tuple of the list of test cases and the list of report columns
+    """
+    rows = list(zip(user_input_data_list, retrieval_context_data_list, bot_response_data_list,
+                    expected_output_data_list))
+    test_cases = [LLMTestCase(input=user_input_data, actual_output=bot_response_data,
+                              expected_output=expected_output_data, retrieval_context=retrieval_context_data)
+                  for user_input_data, retrieval_context_data, bot_response_data, expected_output_data in rows]
+    report_columns = [[user_input_data, __context_to_string(retrieval_context_data), bot_response_data,
+                       expected_output_data]
+                      for user_input_data, retrieval_context_data, bot_response_data, expected_output_data in rows]
+    return test_cases, report_columns
+
+
+def __context_to_string(context):
+    # If the context is a list, convert it to a string
+    return ', '.join(context) if isinstance(context, list) else context
+
+
+def __get_judge_cache():
+    """
+    Get the judge cache shared by the DeepEval evaluations, created on first use
+    :return: JudgeCache
+    """
+    global _judge_cache
+    if _judge_cache is None:
+        _judge_cache = JudgeCache()
+    return _judge_cache
+
+
+def __get_ragas_session(data_samples):
+    """
+    Get the ragas session of the data samples, shared by the ragas evaluations; a new session is created when
+    the data samples change. The evaluate_*_ragas functions evaluate their metric through it, so running them one
+    after another on the same data samples only evaluates the metrics not evaluated yet, and the judge LLM calls
+    and embeddings are cached across runs
+    :param data_samples:
+    :return: RagasSession
+    """
+    global _ragas_session
+    if _ragas_session is None or _ragas_session.key != data_samples_hash(data_samples):
+        _ragas_session = RagasSession(data_samples)
+    return _ragas_session
+
 
 def __get_deepeval_report_path():
     """
@@ -0,0 +1,168 @@
+import configparser
+import json
+import os
+import queue
+import threading
+import time
+
+DEFAULT_SPOOL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "feedback_spool.jsonl")
+
+_STOP = object()
+
+
+class FeedbackSink:
+    """
+    Queue of feedback events sent by a background thread, so that evaluations never wait for the feedback
+    service. Events are sent in batches with retries; batches that still fail, and events left when the sink is
+    closed, are written to an on-disk spool and sent again by the next sink.
+    """
+
+    def __init__(self, send_batch, spool_path=DEFAULT_SPOOL_PATH, batch_size=20, flush_interval=2.0, max_retries=4,
+                 retry_delay=1.0):
+        """
+        :param send_batch: Function sending a list of event dictionaries, raising on failure
+        :param spool_path: JSONL file of the events that could not be sent
+        :param batch_size: Maximum number of events per batch
+        :param flush_interval: Seconds a partial batch waits for more events before it is sent
+        :param max_retries: Retries of a failing batch before it is spooled
+        :param retry_delay: Delay before the first retry, doubled on every retry
+        """
+        self.send_batch = send_batch
+        self.spool_path = spool_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.sent = 0
+        self.spooled = 0
+        self._queue = queue.Queue()
+        self._closing = threading.Event()
+        for event in self._take_spool():
+            self._queue.put(event)
+        self._thread = threading.Thread(target=self._run, name="feedback-sink", daemon=True)
+        self._thread.start()
+
+    def submit(self, event):
+        """
+        Queue a feedback event; returns immediately.
+        :param event: JSON serializable dictionary
+        :return: None
+        """
+        self._queue.put(event)
+
+    def close(self, timeout=30.0):
+        """
+        Send the queued events, waiting at most timeout seconds; what is left is spooled.
+        :param timeout: Seconds to wait for the background thread
+        :return: None
+        """
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            # Stops retrying, the thread spools its batch and the rest of the queue
+            self._closing.set()
+            self._thread.join()
+
+    def _take_spool(self):
+        events = []
+        try:
+            with open(self.spool_path, encoding="utf-8") as spool_file:
+                for line in spool_file:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        # A line cut off by a crash, the events before it are kept
+                        break
+        except OSError:
+            return []
+        os.remove(self.spool_path)
+        return events
+
+    def _spool(self, events):
+        if not events:
+            return
+        os.makedirs(os.path.dirname(self.spool_path) or ".", exist_ok=True)
+        with open(self.spool_path, "a", encoding="utf-8") as spool_file:
+            for event in events:
+                spool_file.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self.spooled += len(events)
+
+    def _send(self, batch):
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.send_batch(batch)
+                self.sent += len(batch)
+                return
+            except Exception as e:
+                print(f"Sending {len(batch)} feedback event(s) failed: {e}")
+                if attempt == self.max_retries or self._closing.wait(delay):
+                    break
+                delay *= 2
+        self._spool(batch)
+
+    def _run(self):
+        batch = []
+        deadline = None
+        stopping = False
+        while not stopping:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                event = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                event = None
+            if event is _STOP:
+                stopping = True
+            elif event is not None:
+                batch.append(event)
+                deadline = deadline or time.monotonic() + self.flush_interval
+            if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                if self._closing.is_set():
+                    self._spool(batch)
+                else:
+                    self._send(batch)
+                batch, deadline = [], None
+
+
+def deepeval_sender(api_key, event_name="Chatbot"):
+    """
+    Log in to Confident AI once and return a send_batch function for FeedbackSink. DeepEval has no batch API, so
+    the events of a batch are sent one by one; events already sent are marked so a retried batch skips them.
+    :param api_key: Confident AI API key
+    :param event_name: Event name of the monitored responses
+    :return: Function sending a list of feedback events
+    """
+    import deepeval
+
+    deepeval.login_with_confident_api_key(api_key)
+
+    def send_batch(events):
+        for event in events:
+            if event.get("sent"):
+                continue
+            if event.get("response_id") is None:
+                event["response_id"] = deepeval.monitor(event_name=event_name, model=event["model"],
+                                                        input=event["input"], response=event["response"])
+            deepeval.send_feedback(response_id=event["response_id"], rating=event["rating"],
+                                   explanation=event["explanation"], expected_response=event["expected_response"])
+            event["sent"] = True
+
+    return send_batch
+
+
+def create_feedback_sink(config_path="../config.ini", **kwargs):
+    """
+    Create the Confident AI feedback sink if NEED_TO_SEND_FEEDBACK_TO_CONFIDENT_AI is set in the config file.
+    :param config_path: Path of config.ini
+    :param kwargs: Keyword arguments of FeedbackSink
+    :return: FeedbackSink, or None if no feedback is sent
+    """
+    try:
+        config = configparser.ConfigParser()
+        config.read(config_path)
+        if not config.getboolean('OTHER_CONFIG', 'NEED_TO_SEND_FEEDBACK_TO_CONFIDENT_AI'):
+            return None
+        return FeedbackSink(deepeval_sender(config.get('OTHER_CONFIG', 'CONFIDENT_API_KEY')), **kwargs)
+    except Exception as e:
+        print(e)
+        return None
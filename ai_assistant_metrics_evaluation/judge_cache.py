@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "judge_results.sqlite")
+
+# Test case fields the judges read, a change in any of them means a new judgement
+TEST_CASE_FIELDS = ("input", "actual_output", "expected_output", "context", "retrieval_context")
+
+# Metric settings that change the judgement beyond the threshold and the model
+METRIC_SETTINGS = ("name", "criteria", "evaluation_steps", "evaluation_params", "assessment_questions",
+                   "include_reason", "strict_mode")
+
+# Bumped when the key layout changes, so old entries are ignored
+KEY_VERSION = 1
+
+
+def _model_name(metric):
+    model = getattr(metric, "evaluation_model", None) or getattr(metric, "model", None)
+    if model is None or isinstance(model, str):
+        return model
+    for attribute in ("model_name", "model"):
+        name = getattr(model, attribute, None)
+        if isinstance(name, str):
+            return name
+    return type(model).__name__
+
+
+def judge_key(metric, test_case):
+    """
+    Key of the judgement of a metric on a test case.
+    :param metric: DeepEval metric instance
+    :param test_case: DeepEval test case
+    :return: SHA-256 hex digest of the metric class, judge model, threshold, settings and test case fields
+    """
+    settings = {name: getattr(metric, name) for name in METRIC_SETTINGS if getattr(metric, name, None) is not None}
+    payload = {
+        "version": KEY_VERSION,
+        "metric": type(metric).__name__,
+        "model": _model_name(metric),
+        "threshold": getattr(metric, "threshold", None),
+        "settings": settings,
+        "test_case": {field: getattr(test_case, field, None) for field in TEST_CASE_FIELDS},
+    }
+    serialized = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class JudgeCache:
+    """
+    Persistent score, reason and outcome of the metric judgements, so that re-running an evaluation only judges
+    the test cases that changed.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        """
+        :param path: SQLite database file
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, score REAL, "
+                                 "reason TEXT, success INTEGER)")
+        self._connection.commit()
+
+    def load(self, metric, test_case):
+        """
+        Restore the cached judgement of a metric on a test case into the metric.
+        :param metric: DeepEval metric instance
+        :param test_case: DeepEval test case
+        :return: True if the judgement was cached, False if the metric still has to be measured
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT score, reason, success FROM results WHERE key = ?",
+                                           (judge_key(metric, test_case),)).fetchone()
+            if row is None:
+                self.misses += 1
+                return False
+            self.hits += 1
+        metric.score, metric.reason, success = row
+        metric.success = bool(success)
+        metric.error = None
+        return True
+
+    def save(self, metric, test_case):
+        """
+        Store the judgement of a measured metric; failed measures are not stored.
+        :param metric: DeepEval metric instance, after its measure
+        :param test_case: DeepEval test case
+        :return: None
+        """
+        if metric.score is None or getattr(metric, "error", None) is not None:
+            return
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                     (judge_key(metric, test_case), metric.score, getattr(metric, "reason", None),
+                                      metric.is_successful()))
+            self._connection.commit()
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM results")
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
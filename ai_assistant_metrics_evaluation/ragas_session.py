@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+
+import pandas as pd
+from datasets import Dataset
+from ragas import evaluate
+from ragas.cache import CacheInterface
+from ragas.llms import LangchainLLMWrapper
+from ragas.run_config import RunConfig
+
+from ai_assistant_data_generation.embedding_cache import DEFAULT_CACHE_DIR as EMBEDDING_CACHE_DIR, \
+    CachedEmbeddingsWrapper
+
+DEFAULT_LLM_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "ragas_llm")
+
+# Columns of the samples in the ragas results, the metric scores follow them
+SAMPLE_COLUMN_COUNT = 4
+
+
+class SqliteCacheBackend(CacheInterface):
+    """
+    Ragas cache backend keeping the pickled results in SQLite, used to cache the judge LLM calls across metrics
+    and runs.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: SQLite database file
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+        self._connection.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        return pickle.loads(row[0]) if row is not None else None
+
+    def set(self, key, value):
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO cache VALUES (?, ?)", (key, pickle.dumps(value)))
+            self._connection.commit()
+
+    def has_key(self, key):
+        with self._lock:
+            return self._connection.execute("SELECT 1 FROM cache WHERE key = ?", (key,)).fetchone() is not None
+
+
+def llm_cache_path(llm, cache_dir=DEFAULT_LLM_CACHE_DIR):
+    """
+    Path of the LLM cache of a judge model; the ragas cache keys only hold the prompt and the sampling arguments,
+    so every model gets its own database.
+    :param llm: LangChain chat model
+    :param cache_dir: Directory of the LLM caches
+    :return: Path of the SQLite file
+    """
+    model_name = getattr(llm, "model_name", None) or getattr(llm, "model", None) or llm.__class__.__name__
+    namespace = hashlib.sha256(f"{llm.__class__.__name__}|{model_name}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{namespace}.sqlite")
+
+
+def data_samples_hash(data_samples):
+    return hashlib.sha256(json.dumps(data_samples, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class RagasSession:
+    """
+    Ragas evaluation context of one dataset: the dataset is built once, the judge LLM calls and the embeddings are
+    cached, and the scores of the metrics already evaluated are kept, so that evaluating metrics one by one costs
+    about the same as evaluating them together. evaluate only computes the metric columns it does not have yet.
+    """
+
+    def __init__(self, data_samples, llm=None, embeddings=None, run_config=None, batch_size=None,
+                 llm_cache_dir=DEFAULT_LLM_CACHE_DIR, embedding_cache_dir=EMBEDDING_CACHE_DIR):
+        """
+        :param data_samples: Dictionary of the question, answer, contexts and ground_truth lists
+        :param llm: LangChain chat model of the judge, the ragas default gpt-4o-mini if not given
+        :param embeddings: LangChain embeddings, OpenAIEmbeddings if not given
+        :param run_config: Ragas run configuration, workers, timeouts and retries
+        :param batch_size: Number of rows evaluated per batch, all at once if not given
+        :param llm_cache_dir: Directory of the judge LLM caches, one per model, None to disable the cache
+        :param embedding_cache_dir: Directory of the embedding cache
+        """
+        if llm is None or embeddings is None:
+            from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+            llm = llm or ChatOpenAI(model="gpt-4o-mini")
+            embeddings = embeddings or OpenAIEmbeddings()
+        self.key = data_samples_hash(data_samples)
+        self.dataset = Dataset.from_dict(data_samples)
+        self.run_config = run_config or RunConfig(timeout=120, max_retries=5, max_workers=16)
+        self.batch_size = batch_size
+        cache = SqliteCacheBackend(llm_cache_path(llm, llm_cache_dir)) if llm_cache_dir else None
+        self.llm = LangchainLLMWrapper(llm, run_config=self.run_config, cache=cache)
+        self.embeddings = CachedEmbeddingsWrapper(embeddings, cache_dir=embedding_cache_dir,
+                                                  run_config=self.run_config)
+        self.results = None
+
+    def evaluate(self, metrics):
+        """
+        Evaluate metrics on the dataset; only the metrics not evaluated before in the session are computed.
+        :param metrics: List of ragas metrics
+        :return: DataFrame of the samples and the scores of the given metrics
+        """
+        names = [metric.name for metric in metrics]
+        new_metrics = [metric for metric in metrics
+                       if self.results is None or metric.name not in self.results.columns]
+        if new_metrics:
+            df = evaluate(self.dataset, metrics=new_metrics, llm=self.llm, embeddings=self.embeddings,
+                          run_config=self.run_config, batch_size=self.batch_size).to_pandas()
+            if self.results is None:
+                self.results = df
+            else:
+                self.results = pd.concat([self.results, df[[metric.name for metric in new_metrics]]], axis=1)
+        return self.results[list(self.results.columns[:SAMPLE_COLUMN_COUNT]) + names].copy()
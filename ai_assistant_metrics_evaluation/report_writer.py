@@ -0,0 +1,86 @@
+import csv
+import json
+import os
+
+from openpyxl.workbook import Workbook
+
+SIDECAR_FORMATS = ("jsonl", "csv")
+
+
+class ReportWriter:
+    """
+    Excel report written row by row with an openpyxl write-only workbook, which streams the rows to a temporary
+    file instead of keeping them in memory. Every row is also flushed to sidecar JSONL and CSV files as soon as
+    it is appended, so the results written before a crash are kept.
+    """
+
+    def __init__(self, file_path, header, sheet_title="Results", sidecar_formats=("jsonl",)):
+        """
+        :param file_path: Path of the .xlsx report, the sidecar files use the same path with their own extension
+        :param header: Header row
+        :param sheet_title: Title of the worksheet
+        :param sidecar_formats: Sidecar formats, among "jsonl" and "csv"
+        """
+        unknown_formats = set(sidecar_formats) - set(SIDECAR_FORMATS)
+        if unknown_formats:
+            raise ValueError(f"Unsupported sidecar format(s): {', '.join(sorted(unknown_formats))}")
+        self.file_path = file_path
+        self.header = list(header)
+        self.rows = 0
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(sheet_title)
+        self._sheet.append(self.header)
+
+        base_path = os.path.splitext(file_path)[0]
+        self.sidecar_paths = [f"{base_path}.{sidecar_format}" for sidecar_format in sidecar_formats]
+        self._jsonl_file = self._csv_file = self._csv_writer = None
+        if "jsonl" in sidecar_formats:
+            self._jsonl_file = open(f"{base_path}.jsonl", "w", encoding="utf-8")
+        if "csv" in sidecar_formats:
+            self._csv_file = open(f"{base_path}.csv", "w", encoding="utf-8", newline="")
+            self._csv_writer = csv.writer(self._csv_file)
+            self._csv_writer.writerow(self.header)
+            self._csv_file.flush()
+
+    def append(self, row):
+        """
+        Write one row to the report and the sidecar files.
+        :param row: List of values, in header order
+        :return: None
+        """
+        self._sheet.append(row)
+        if self._jsonl_file is not None:
+            self._jsonl_file.write(json.dumps(dict(zip(self.header, row)), ensure_ascii=False, default=str) + "\n")
+            self._jsonl_file.flush()
+        if self._csv_writer is not None:
+            self._csv_writer.writerow(row)
+            self._csv_file.flush()
+        self.rows += 1
+
+    def append_sheet(self, title, rows):
+        """
+        Add a worksheet to the Excel report only, e.g. a summary of the run.
+        :param title: Title of the worksheet
+        :param rows: List of rows
+        :return: None
+        """
+        sheet = self._workbook.create_sheet(title)
+        for row in rows:
+            sheet.append(row)
+
+    def close(self):
+        """
+        Save the Excel report and close the sidecar files.
+        :return: Path of the Excel report
+        """
+        for sidecar_file in (self._jsonl_file, self._csv_file):
+            if sidecar_file is not None:
+                sidecar_file.close()
+        self._workbook.save(self.file_path)
+        return self.file_path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,190 @@
+"""
+Store of the per-row, per-metric scores of every evaluation run, as Parquet partitioned by run, and comparison
+of two runs.
+
+Usage:
+    python -m ai_assistant_metrics_evaluation.results_store runs
+    python -m ai_assistant_metrics_evaluation.results_store diff <baseline_run_id> <candidate_run_id>
+"""
+import argparse
+import hashlib
+import math
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "results_store")
+
+# Metrics where a higher score is worse, a regression is an increase
+LOWER_IS_BETTER = {"HallucinationMetric", "BiasMetric", "ToxicityMetric"}
+
+COLUMNS = ["run_id", "timestamp", "question_hash", "question", "metric", "score"]
+
+
+def question_hash(question):
+    return hashlib.sha256(str(question).encode("utf-8")).hexdigest()[:16]
+
+
+class ResultsStore:
+    """
+    Parquet dataset with one partition per run, run_id=<run id>/<name>.parquet, holding one row per question and
+    metric. A run may be appended in several parts, e.g. one per evaluate_* call.
+    """
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR):
+        """
+        :param store_dir: Directory of the dataset
+        """
+        self.store_dir = store_dir
+
+    def append(self, run_id, questions, scores, part="results"):
+        """
+        Append the scores of a run.
+        :param run_id: Run id
+        :param questions: List of the user inputs of the rows
+        :param scores: Dictionary of metric name to the list of scores of the rows, None or NaN when missing
+        :param part: Name of the part in the run partition, a part written again is replaced
+        :return: Number of rows appended
+        """
+        frames = [pd.DataFrame({"question": list(questions), "metric": metric,
+                                "score": pd.to_numeric(pd.Series(list(metric_scores), dtype="object"),
+                                                       errors="coerce")})
+                  for metric, metric_scores in scores.items()]
+        if not frames:
+            return 0
+        df = pd.concat(frames, ignore_index=True)
+        df["question_hash"] = df["question"].map(question_hash)
+        df["timestamp"] = time.time()
+        df["run_id"] = run_id
+        partition_dir = os.path.join(self.store_dir, f"run_id={run_id}")
+        os.makedirs(partition_dir, exist_ok=True)
+        temp_path = os.path.join(partition_dir, f".{part}.parquet.tmp")
+        # run_id is the partition key, it is not repeated in the file
+        df[[column for column in COLUMNS if column != "run_id"]].to_parquet(temp_path, index=False)
+        os.replace(temp_path, os.path.join(partition_dir, f"{part}.parquet"))
+        return len(df)
+
+    def load(self, run_ids=None, metrics=None):
+        """
+        Read scores, filtered on the partitions so that other runs are not read.
+        :param run_ids: Optional list of run ids
+        :param metrics: Optional list of metric names
+        :return: DataFrame with the COLUMNS
+        """
+        if not os.path.isdir(self.store_dir) or not any(name.startswith("run_id=")
+                                                         for name in os.listdir(self.store_dir)):
+            return pd.DataFrame(columns=COLUMNS)
+        filters = []
+        if run_ids is not None:
+            filters.append(("run_id", "in", list(run_ids)))
+        if metrics is not None:
+            filters.append(("metric", "in", list(metrics)))
+        df = pd.read_parquet(self.store_dir, filters=filters or None)
+        df["run_id"] = df["run_id"].astype(str)
+        return df[COLUMNS]
+
+    def runs(self):
+        """
+        :return: DataFrame with, per run, its time, number of questions and metrics and mean score, oldest first
+        """
+        df = self.load()
+        return (df.groupby("run_id")
+                .agg(timestamp=("timestamp", "min"), questions=("question_hash", "nunique"),
+                     metrics=("metric", "nunique"), mean_score=("score", "mean"))
+                .sort_values("timestamp").reset_index())
+
+    def history(self, metric, question=None):
+        """
+        Scores of a metric across runs.
+        :param metric: Metric name
+        :param question: Optional user input, otherwise the mean score of each run
+        :return: DataFrame of run_id, timestamp and score, oldest first
+        """
+        df = self.load(metrics=[metric])
+        if question is not None:
+            df = df[df["question_hash"] == question_hash(question)]
+        return (df.groupby("run_id").agg(timestamp=("timestamp", "min"), score=("score", "mean"))
+                .sort_values("timestamp").reset_index())
+
+    def delete(self, run_id):
+        shutil.rmtree(os.path.join(self.store_dir, f"run_id={run_id}"), ignore_errors=True)
+
+
+def diff_runs(store, baseline_run_id, candidate_run_id, alpha=0.05, min_delta=0.0, row_delta=0.2):
+    """
+    Compare the scores of two runs on the questions and metrics they share. A metric regresses when a one-sided
+    paired z-test on the score changes is significant at alpha, with a Bonferroni correction over the metrics,
+    and its mean worsens by at least min_delta.
+    :param store: ResultsStore
+    :param baseline_run_id: Run id of the reference run
+    :param candidate_run_id: Run id of the new run
+    :param alpha: Significance level
+    :param min_delta: Smallest mean change flagged as a regression
+    :param row_delta: Score change from which a single row counts as regressed
+    :return: DataFrame with, per metric, the pairs compared, both means, the change, the regressed rows, the
+        p-value and the regression flag, regressions first
+    """
+    df = store.load(run_ids=[baseline_run_id, candidate_run_id])
+    # The same question asked twice in a run counts once, with its mean score
+    scores = df.groupby(["run_id", "metric", "question_hash"])["score"].mean()
+    for run_id in (baseline_run_id, candidate_run_id):
+        if run_id not in scores.index.get_level_values("run_id"):
+            raise ValueError(f"No results stored for run {run_id}.")
+    pairs = pd.merge(scores.loc[baseline_run_id].rename("baseline"), scores.loc[candidate_run_id].rename("candidate"),
+                     left_index=True, right_index=True).dropna().reset_index()
+    if pairs.empty:
+        return pd.DataFrame(columns=["metric", "pairs", "baseline", "candidate", "delta", "regressed_rows", "p_value",
+                                     "regression"])
+
+    # Positive changes are improvements, whatever the direction of the metric
+    sign = np.where(pairs["metric"].isin(LOWER_IS_BETTER), -1.0, 1.0)
+    pairs["change"] = (pairs["candidate"] - pairs["baseline"]) * sign
+    pairs["regressed"] = pairs["change"] <= -row_delta
+    summary = pairs.groupby("metric").agg(pairs=("change", "size"), baseline=("baseline", "mean"),
+                                          candidate=("candidate", "mean"), mean_change=("change", "mean"),
+                                          std_change=("change", "std"), regressed_rows=("regressed", "sum"))
+    standard_error = summary["std_change"].fillna(0.0) / np.sqrt(summary["pairs"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(standard_error > 0, summary["mean_change"] / standard_error,
+                     np.sign(summary["mean_change"]) * np.inf)
+    # P(Z <= z) under no change; no change at all gives a p-value of 1
+    summary["p_value"] = [0.5 * math.erfc(-value / math.sqrt(2)) if not np.isnan(value) else 1.0 for value in z]
+    summary.loc[summary["mean_change"] == 0, "p_value"] = 1.0
+    summary["delta"] = summary["candidate"] - summary["baseline"]
+    summary["regression"] = ((summary["p_value"] < alpha / len(summary))
+                             & (summary["mean_change"] <= -min_delta) & (summary["mean_change"] < 0))
+    return (summary.reset_index()[["metric", "pairs", "baseline", "candidate", "delta", "regressed_rows", "p_value",
+                                   "regression"]]
+            .sort_values(["regression", "p_value"], ascending=[False, True]).reset_index(drop=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the evaluation results store.")
+    parser.add_argument("--store-dir", default=DEFAULT_STORE_DIR, help="Directory of the results store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("runs", help="List the stored runs")
+    diff_parser = commands.add_parser("diff", help="Compare two runs metric by metric")
+    diff_parser.add_argument("baseline", help="Run id of the reference run")
+    diff_parser.add_argument("candidate", help="Run id of the new run")
+    diff_parser.add_argument("--alpha", type=float, default=0.05, help="Significance level")
+    diff_parser.add_argument("--min-delta", type=float, default=0.0, help="Smallest mean change flagged")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.store_dir)
+    with pd.option_context("display.width", 160, "display.max_columns", None):
+        if args.command == "runs":
+            print(store.runs().to_string(index=False))
+            return
+        diff = diff_runs(store, args.baseline, args.candidate, alpha=args.alpha, min_delta=args.min_delta)
+        print(diff.to_string(index=False))
+    regressions = diff[diff["regression"]]
+    if not regressions.empty:
+        print(f"Regression in {len(regressions)} metric(s): {', '.join(regressions['metric'])}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
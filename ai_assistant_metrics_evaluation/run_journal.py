@@ -0,0 +1,109 @@
+import json
+import math
+import os
+import threading
+import uuid
+from datetime import datetime
+
+DEFAULT_JOURNAL_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "evaluation_runs")
+
+
+def new_run_id():
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+class RunJournal:
+    """
+    JSONL journal of an evaluation run, one line per completed (row, metric) result. Results are flushed as they
+    complete, so an interrupted run is resumed with its run id and only the missing results are measured.
+    """
+
+    def __init__(self, run_id=None, journal_dir=DEFAULT_JOURNAL_DIR):
+        """
+        :param run_id: Run id of the run to resume, None to start a new run
+        :param journal_dir: Directory of the journals
+        """
+        self.run_id = run_id or new_run_id()
+        self.path = os.path.join(journal_dir, f"{self.run_id}.jsonl")
+        if run_id is not None and not os.path.exists(self.path):
+            raise ValueError(f"No evaluation run {run_id} to resume in {journal_dir}.")
+        os.makedirs(journal_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.results = self._load()
+
+    def _load(self):
+        # A line cut off by a crash is removed, new results are appended after the last complete one
+        results = {}
+        valid_size = 0
+        try:
+            with open(self.path, "rb") as journal_file:
+                for line in journal_file:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    results[(entry["row"], entry["metric"])] = entry["result"]
+                    valid_size += len(line)
+        except FileNotFoundError:
+            return results
+        if valid_size < os.path.getsize(self.path):
+            os.truncate(self.path, valid_size)
+        return results
+
+    def get(self, row, metric):
+        """
+        :param row: Row number
+        :param metric: Metric name
+        :return: Result dictionary of the row and metric, or None if it is not completed
+        """
+        return self.results.get((row, metric))
+
+    def record(self, row, metric, result):
+        """
+        Append a completed result and flush it to disk.
+        :param row: Row number
+        :param metric: Metric name
+        :param result: JSON serializable dictionary
+        :return: None
+        """
+        line = json.dumps({"row": row, "metric": metric, "result": result}, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as journal_file:
+                journal_file.write(line + "\n")
+            self.results[(row, metric)] = result
+
+
+def record_metric(journal, row, metric):
+    """
+    Journal the score, reason and outcome of a measured DeepEval metric; failed measures are not journaled.
+    :param journal: RunJournal
+    :param row: Row number of the test case
+    :param metric: DeepEval metric instance, after its measure
+    :return: None
+    """
+    if metric.score is None or getattr(metric, "error", None) is not None:
+        return
+    journal.record(row, type(metric).__name__, {"score": metric.score, "reason": getattr(metric, "reason", None),
+                                                "success": metric.is_successful()})
+
+
+def restore_metric(journal, row, metric):
+    """
+    Restore the journaled result of a DeepEval metric into the metric.
+    :param journal: RunJournal
+    :param row: Row number of the test case
+    :param metric: DeepEval metric instance
+    :return: True if the result was journaled, False if the metric still has to be measured
+    """
+    result = journal.get(row, type(metric).__name__)
+    if result is None:
+        return False
+    metric.score, metric.reason, metric.success = result["score"], result["reason"], result["success"]
+    metric.error = None
+    return True
+
+
+def is_missing(score):
+    return score is None or (isinstance(score, float) and math.isnan(score))
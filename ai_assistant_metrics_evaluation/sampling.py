@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+
+class SamplingPlan:
+    """
+    Adaptive stratified sampling of the rows of a large evaluation: rows are judged in rounds, in an order that
+    keeps every prefix proportional to the strata, until the bootstrap confidence interval of every metric is at
+    most target_width wide.
+    """
+
+    def __init__(self, strata=None, target_width=0.1, confidence=0.95, initial_size=200, step_size=100,
+                 max_rows=None, min_per_stratum=2, n_resamples=1000, seed=42):
+        """
+        :param strata: List with the stratum of each row, e.g. its intent or a tuple of several columns, None for
+            a single stratum
+        :param target_width: Largest confidence interval width accepted for every metric
+        :param confidence: Confidence level of the intervals
+        :param initial_size: Number of rows judged in the first round
+        :param step_size: Number of rows added in each following round
+        :param max_rows: Largest number of rows judged, all rows if not given
+        :param min_per_stratum: Number of rows of each stratum judged in the first round, when it has them
+        :param n_resamples: Number of bootstrap resamples
+        :param seed: Seed of the row order and of the bootstrap
+        """
+        if not 0 < confidence < 1:
+            raise ValueError("The confidence level must be between 0 and 1.")
+        if initial_size < 1 or step_size < 1:
+            raise ValueError("The initial and step sizes must be positive.")
+        self.strata = strata
+        self.target_width = target_width
+        self.confidence = confidence
+        self.initial_size = initial_size
+        self.step_size = step_size
+        self.max_rows = max_rows
+        self.min_per_stratum = min_per_stratum
+        self.n_resamples = n_resamples
+        self.seed = seed
+
+    def row_strata(self, row_count):
+        """
+        :param row_count: Number of rows
+        :return: Array of the stratum of each row
+        """
+        if self.strata is None:
+            return np.zeros(row_count, dtype=int)
+        if len(self.strata) != row_count:
+            raise ValueError("The strata must have one value per row.")
+        # Tuples of several columns become one label
+        return pd.Series([str(stratum) for stratum in self.strata]).to_numpy()
+
+    def row_order(self, rows, strata):
+        """
+        Order rows so that every prefix is a random sample proportional to the strata, starting with
+        min_per_stratum rows of each stratum.
+        :param rows: List of the row positions to sample from
+        :param strata: Array of the stratum of every row
+        :return: List of row positions
+        """
+        rng = np.random.default_rng(self.seed)
+        rows = np.asarray(list(rows), dtype=int)
+        keys = np.empty(len(rows))
+        for stratum in pd.unique(strata[rows]):
+            positions = np.flatnonzero(strata[rows] == stratum)
+            ranks = rng.permutation(len(positions))
+            # Systematic allocation: the k-th row of a stratum of n rows comes at (k + u) / n
+            stratum_keys = (ranks + rng.random()) / len(positions)
+            keys[positions] = np.where(ranks < self.min_per_stratum, stratum_keys - 1, stratum_keys)
+        return rows[np.argsort(keys, kind="stable")].tolist()
+
+    def rounds(self, row_count):
+        """
+        :param row_count: Number of rows to sample from
+        :return: List of the cumulative sample sizes of the rounds
+        """
+        limit = row_count if self.max_rows is None else min(row_count, self.max_rows)
+        sizes = list(range(min(self.initial_size, limit), limit, self.step_size)) + [limit]
+        return sorted(set(sizes))
+
+
+def bootstrap_ci(scores, strata, population_strata, confidence=0.95, n_resamples=1000, seed=42):
+    """
+    Stratified estimate of the mean score of the population and its percentile bootstrap confidence interval.
+    Each stratum is resampled on its own and weighted by its share of the population; strata without scores are
+    left out and the weights of the others rescaled.
+    :param scores: Array of the scores of the sampled rows, NaN when missing
+    :param strata: Array of the stratum of each sampled row
+    :param population_strata: Array of the stratum of every row of the population
+    :param confidence: Confidence level
+    :param n_resamples: Number of bootstrap resamples
+    :param seed: Seed of the resampling
+    :return: Tuple of the estimate, the lower and the upper bound, NaN when there is no score
+    """
+    scores = np.asarray(scores, dtype=float)
+    strata = np.asarray(strata)
+    present = ~np.isnan(scores)
+    scores, strata = scores[present], strata[present]
+    if len(scores) == 0:
+        return float("nan"), float("nan"), float("nan")
+
+    rng = np.random.default_rng(seed)
+    population = pd.Series(population_strata).value_counts()
+    sampled_strata = pd.unique(strata)
+    weights = population.reindex(sampled_strata).fillna(0).to_numpy(dtype=float)
+    weights = weights / weights.sum() if weights.sum() > 0 else np.full(len(weights), 1 / len(weights))
+
+    estimate = 0.0
+    resampled_means = np.zeros(n_resamples)
+    for weight, stratum in zip(weights, sampled_strata):
+        stratum_scores = scores[strata == stratum]
+        estimate += weight * stratum_scores.mean()
+        draws = rng.integers(0, len(stratum_scores), size=(n_resamples, len(stratum_scores)))
+        resampled_means += weight * stratum_scores[draws].mean(axis=1)
+    alpha = 1 - confidence
+    lower, upper = np.quantile(resampled_means, [alpha / 2, 1 - alpha / 2])
+    return float(estimate), float(lower), float(upper)
+
+
+def metric_intervals(scores, sampled_rows, row_strata, plan, population_rows=None):
+    """
+    Confidence interval of every metric on the sampled rows.
+    :param scores: Dictionary of metric name to the list of scores of the sampled rows
+    :param sampled_rows: List of the row positions of the scores
+    :param row_strata: Array of the stratum of every row, returned by SamplingPlan.row_strata
+    :param plan: SamplingPlan
+    :param population_rows: List of the row positions the estimates are about, all rows if not given
+    :return: DataFrame with, per metric, the rows scored, the estimate, the bounds and the width of its interval
+    """
+    records = []
+    strata = row_strata[np.asarray(sampled_rows, dtype=int)]
+    population_strata = row_strata if population_rows is None else row_strata[np.asarray(population_rows, dtype=int)]
+    for metric, metric_scores in scores.items():
+        metric_scores = pd.to_numeric(pd.Series(list(metric_scores), dtype="object"), errors="coerce").to_numpy()
+        estimate, lower, upper = bootstrap_ci(metric_scores, strata, population_strata, plan.confidence,
+                                              plan.n_resamples, plan.seed)
+        records.append({"metric": metric, "rows": int((~np.isnan(metric_scores)).sum()), "estimate": estimate,
+                        "lower": lower, "upper": upper, "width": upper - lower})
+    return pd.DataFrame(records, columns=["metric", "rows", "estimate", "lower", "upper", "width"])
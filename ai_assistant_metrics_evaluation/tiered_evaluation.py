@@ -0,0 +1,183 @@
+import configparser
+import re
+
+import numpy as np
+import pandas as pd
+from nltk.translate.bleu_score import SmoothingFunction, sentence_bleu
+from rapidfuzz import fuzz, process, utils
+
+# same_facts is 1 when the response has the numbers and negations of the expected output, in the same order
+LOCAL_METRICS = ["exact_match", "same_facts", "token_sort_ratio", "token_set_ratio", "rouge_l", "bleu"]
+
+# Tier 1 decisions of a row, only the rows to judge are sent to the LLM judges
+PASS, FAIL, JUDGE = "pass", "fail", "judge"
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+_FACT_PATTERN = re.compile(r"\d+(?:[.,]\d+)*|\b(?:no|not|never|none|nothing|nobody|neither|nor|cannot|without)\b|n't\b",
+                           re.IGNORECASE)
+_SMOOTHING = SmoothingFunction().method1
+
+
+def _tokens(text):
+    return _TOKEN_PATTERN.findall(str(text).lower())
+
+
+def _facts(text):
+    # Numbers and negations, a fuzzy score barely moves when "30 days" becomes "3 days" or "is not" becomes "is"
+    return [fact.lower().replace("n't", "not") for fact in _FACT_PATTERN.findall(text)]
+
+
+def _rouge_l(candidate, reference):
+    # F1 of the longest common subsequence of the tokens
+    if not candidate or not reference:
+        return 0.0
+    previous = [0] * (len(reference) + 1)
+    for candidate_token in candidate:
+        current = [0]
+        for position, reference_token in enumerate(reference):
+            current.append(previous[position] + 1 if candidate_token == reference_token
+                           else max(previous[position + 1], current[position]))
+        previous = current
+    lcs = previous[-1]
+    if lcs == 0:
+        return 0.0
+    precision, recall = lcs / len(candidate), lcs / len(reference)
+    return 2 * precision * recall / (precision + recall)
+
+
+def _bleu(candidate, reference):
+    if not candidate or not reference:
+        return 0.0
+    # Short answers are scored on the n-grams they can have, instead of scoring 0 on 4-grams
+    order = min(4, len(candidate), len(reference))
+    return sentence_bleu([reference], candidate, weights=[1 / order] * order, smoothing_function=_SMOOTHING)
+
+
+def compute_local_metrics(responses, references):
+    """
+    Compute the offline tier 1 metrics of the responses against the expected outputs, in one pass over the rows.
+    :param responses: List of bot responses
+    :param references: List of expected outputs
+    :return: DataFrame with the LOCAL_METRICS columns, all between 0 and 1
+    """
+    responses = pd.Series(list(responses), dtype="object").fillna("").astype(str)
+    references = pd.Series(list(references), dtype="object").fillna("").astype(str)
+    if len(responses) != len(references):
+        raise ValueError("Responses and references must have the same length.")
+
+    def normalize(texts):
+        return texts.str.casefold().str.replace(r"\s+", " ", regex=True).str.strip()
+
+    df = pd.DataFrame({"exact_match": (normalize(responses) == normalize(references)).astype(float).to_numpy()})
+    df["same_facts"] = [float(_facts(response) == _facts(reference))
+                        for response, reference in zip(responses, references)]
+    if len(df) == 0:
+        return df.reindex(columns=LOCAL_METRICS)
+    for name, scorer in (("token_sort_ratio", fuzz.token_sort_ratio), ("token_set_ratio", fuzz.token_set_ratio)):
+        df[name] = process.cpdist(responses.tolist(), references.tolist(), scorer=scorer,
+                                  processor=utils.default_process, workers=-1) / 100
+    tokens = [(_tokens(response), _tokens(reference)) for response, reference in zip(responses, references)]
+    df["rouge_l"] = [_rouge_l(candidate, reference) for candidate, reference in tokens]
+    df["bleu"] = [_bleu(candidate, reference) for candidate, reference in tokens]
+    return df
+
+
+class TierRules:
+    """
+    Rules deciding which rows tier 1 settles on its own: a row passes when its response matches the expected
+    output exactly, or when its pass metric reaches pass_above and it has the same numbers and negations as the
+    expected output; it fails when its fail metric is at most fail_below, and is sent to the LLM judges otherwise.
+    """
+
+    def __init__(self, pass_metric="token_sort_ratio", pass_above=0.95, fail_metric="rouge_l", fail_below=0.05,
+                 exact_match_passes=True, require_same_facts=True):
+        """
+        :param pass_metric: Local metric deciding the passes, one of LOCAL_METRICS
+        :param pass_above: Score from which a row passes, above 1 to never pass on the score
+        :param fail_metric: Local metric deciding the failures, one of LOCAL_METRICS
+        :param fail_below: Score up to which a row fails, below 0 to never fail on the score
+        :param exact_match_passes: Whether an exact match passes whatever the scores
+        :param require_same_facts: Whether a pass on the pass metric also needs the numbers and negations of the
+            expected output; without it a wrong number or a missing "not" can pass without a judge
+        """
+        for metric in (pass_metric, fail_metric):
+            if metric not in LOCAL_METRICS:
+                raise ValueError(f"Unknown local metric {metric}, expected one of {', '.join(LOCAL_METRICS)}.")
+        self.pass_metric = pass_metric
+        self.pass_above = pass_above
+        self.fail_metric = fail_metric
+        self.fail_below = fail_below
+        self.exact_match_passes = exact_match_passes
+        self.require_same_facts = require_same_facts
+
+    @classmethod
+    def from_config(cls, config_path="../config.ini"):
+        """
+        Read the rules from the TIERED_EVALUATION section of config.ini, the missing options keep their default.
+        :param config_path: Path of config.ini
+        :return: TierRules, or None if the section is missing or ENABLED is not set
+        """
+        config = configparser.ConfigParser()
+        config.read(config_path)
+        if not config.has_section('TIERED_EVALUATION') or not config.getboolean('TIERED_EVALUATION', 'ENABLED',
+                                                                                fallback=False):
+            return None
+        section = config['TIERED_EVALUATION']
+        defaults = cls()
+        return cls(pass_metric=section.get('PASS_METRIC', defaults.pass_metric),
+                   pass_above=section.getfloat('PASS_ABOVE', defaults.pass_above),
+                   fail_metric=section.get('FAIL_METRIC', defaults.fail_metric),
+                   fail_below=section.getfloat('FAIL_BELOW', defaults.fail_below),
+                   exact_match_passes=section.getboolean('EXACT_MATCH_PASSES', defaults.exact_match_passes),
+                   require_same_facts=section.getboolean('REQUIRE_SAME_FACTS', defaults.require_same_facts))
+
+    def classify(self, local_scores):
+        """
+        :param local_scores: DataFrame returned by compute_local_metrics
+        :return: Series of PASS, FAIL or JUDGE per row
+        """
+        passed = local_scores[self.pass_metric] >= self.pass_above
+        if self.require_same_facts:
+            passed &= local_scores["same_facts"] == 1.0
+        if self.exact_match_passes:
+            passed |= local_scores["exact_match"] == 1.0
+        failed = ~passed & (local_scores[self.fail_metric] <= self.fail_below)
+        return pd.Series(np.select([passed, failed], [PASS, FAIL], default=JUDGE), index=local_scores.index)
+
+
+def select_audit_rows(decisions, audit_fraction=0.1, seed=42):
+    """
+    Pick rows settled by tier 1 that are still judged, to measure the agreement of tier 1 with the judges.
+    At least one row of each decision is picked when audit_fraction is positive.
+    :param decisions: Series returned by TierRules.classify
+    :param audit_fraction: Fraction of the passed and of the failed rows to judge
+    :param seed: Seed of the random choice
+    :return: Set of row positions
+    """
+    rng = np.random.default_rng(seed)
+    rows = set()
+    for decision in (PASS, FAIL):
+        positions = np.flatnonzero(decisions.to_numpy() == decision)
+        if audit_fraction <= 0 or len(positions) == 0:
+            continue
+        count = min(len(positions), max(1, round(len(positions) * audit_fraction)))
+        rows.update(int(position) for position in rng.choice(positions, size=count, replace=False))
+    return rows
+
+
+def tier_agreement(decisions, judge_passed):
+    """
+    Compare the tier 1 decisions with the verdicts of the judges on the rows both evaluated.
+    :param decisions: Series returned by TierRules.classify
+    :param judge_passed: Dictionary of row position to True if the judges passed the row
+    :return: Dictionary with the number of audited rows, the overall agreement rate and the agreement rates on the
+        passed and on the failed rows, None when there is no such row
+    """
+    audited = {row: decisions.iloc[row] == PASS for row in judge_passed if decisions.iloc[row] != JUDGE}
+
+    def rate(rows):
+        return sum(audited[row] == judge_passed[row] for row in rows) / len(rows) if rows else None
+
+    return {"audited": len(audited), "agreement": rate(list(audited)),
+            "pass_agreement": rate([row for row in audited if audited[row]]),
+            "fail_agreement": rate([row for row in audited if not audited[row]])}
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+
+from ai_assistant_metrics_evaluation.async_metrics import measure_pairs
+
+
+class Counter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def enter(self):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def exit(self):
+        with self.lock:
+            self.active -= 1
+
+
+class FakeMetric:
+    """
+    Metric scoring the length of the actual output after a fixed latency, like an LLM judge call.
+    """
+
+    def __init__(self, counter, weight, async_mode=True, latency=0.05):
+        self.counter = counter
+        self.weight = weight
+        self.async_mode = async_mode
+        self.latency = latency
+        self.score = None
+
+    def measure(self, test_case):
+        self.counter.enter()
+        time.sleep(self.latency)
+        self.counter.exit()
+        self.score = self.weight * len(test_case.actual_output)
+        return self.score
+
+    async def a_measure(self, test_case, _show_indicator=True):
+        self.counter.enter()
+        await asyncio.sleep(self.latency)
+        self.counter.exit()
+        self.score = self.weight * len(test_case.actual_output)
+        return self.score
+
+
+class FakeTestCase:
+    def __init__(self, actual_output):
+        self.actual_output = actual_output
+
+
+def make_factories(counter):
+    return [lambda: FakeMetric(counter, 1), lambda: FakeMetric(counter, 2, async_mode=False),
+            lambda: FakeMetric(counter, 3)]
+
+
+def measure_metrics(test_cases, metric_factories, max_concurrency=20, on_measured=None):
+    # Same pairing as evaluate_all_metrics_deepeval: every test case gets its own metric instances
+    measured = [[metric_factory() for metric_factory in metric_factories] for _ in test_cases]
+    measure_pairs([metric for metrics in measured for metric in metrics],
+                  [test_case for test_case in test_cases for _ in metric_factories], max_concurrency,
+                  on_measured=on_measured)
+    return measured
+
+
+def test_results_match_a_sequential_run_in_order():
+    test_cases = [FakeTestCase("a" * length) for length in range(1, 9)]
+    counter = Counter()
+    measured = measure_metrics(test_cases, make_factories(counter), max_concurrency=8)
+
+    expected = [[factory().measure(test_case) for factory in make_factories(Counter())] for test_case in test_cases]
+    assert [[metric.score for metric in metrics] for metrics in measured] == expected
+    assert [metric.weight for metric in measured[0]] == [1, 2, 3]
+
+
+def test_every_test_case_gets_its_own_metric_instances():
+    measured = measure_metrics([FakeTestCase("a"), FakeTestCase("bb")], make_factories(Counter()))
+    assert measured[0][0] is not measured[1][0]
+    assert measured[0][0].score == 1 and measured[1][0].score == 2
+
+
+def test_concurrency_is_bounded():
+    counter = Counter()
+    measure_metrics([FakeTestCase("a")] * 10, make_factories(counter), max_concurrency=4)
+    assert counter.peak == 4
+
+
+def test_wall_time_drops_with_concurrency():
+    test_cases = [FakeTestCase("a")] * 8
+    start_time = time.perf_counter()
+    measure_metrics(test_cases, make_factories(Counter()), max_concurrency=1)
+    sequential = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    measure_metrics(test_cases, make_factories(Counter()), max_concurrency=12)
+    concurrent = time.perf_counter() - start_time
+    assert concurrent < sequential / 4
+
+
+def test_each_metric_is_measured_once_on_its_own_test_case():
+    counter = Counter()
+    metrics = [FakeMetric(counter, weight) for weight in (1, 2, 3)]
+    measured = measure_pairs(metrics, [FakeTestCase("a"), FakeTestCase("bb"), FakeTestCase("ccc")])
+    assert measured == metrics
+    assert [metric.score for metric in metrics] == [1, 4, 9]
+
+
+def test_on_measured_is_called_once_per_pair_with_its_position():
+    counter = Counter()
+    metrics = [FakeMetric(counter, weight, async_mode=weight % 2 == 0) for weight in range(1, 7)]
+    calls = []
+    measure_pairs(metrics, [FakeTestCase("a" * length) for length in range(1, 7)], max_concurrency=3,
+                  on_measured=lambda position, metric: calls.append((position, metric.score)))
+    assert sorted(calls) == [(position, (position + 1) ** 2) for position in range(6)]
@@ -0,0 +1,84 @@
+import random
+
+import pandas as pd
+from langchain_core.documents import Document
+from ragas.testset.graph import KnowledgeGraph, Node, NodeType
+
+from ai_assistant_data_generation.dataset_batch import run_generation, shard_sizes
+from ai_assistant_data_generation.knowledge_graph_cache import KnowledgeGraphCache, document_set_hash
+
+documents = [Document(page_content=f"Policy {number}: returns are accepted up to {number} days.",
+                      metadata={"source": f"policy-{number}.pdf"}) for number in range(5)]
+
+
+class FakeTestset:
+    def __init__(self, samples):
+        self.samples = samples
+
+    def to_pandas(self):
+        return pd.DataFrame(self.samples)
+
+
+class FakeGenerator:
+    llm = None
+    embedding_model = None
+    knowledge_graph = None
+    persona_list = []
+
+    def generate(self, testset_size, run_config=None):
+        # Questions depend on the seed only, shards with the same seed would ask the same questions
+        assert run_config.seed is not None
+        samples = [{"user_input": f"How long is policy {random.randrange(1000)} valid?",
+                    "reference_contexts": [f"Policy {len(self.knowledge_graph.nodes)}"],
+                    "reference": "30 days."} for _ in range(testset_size)]
+        return FakeTestset(samples)
+
+
+def test_shard_sizes():
+    assert shard_sizes(10, 4) == [3, 3, 2, 2]
+    assert shard_sizes(2, 4) == [1, 1, 0, 0]
+
+
+def test_sharded_generation_is_merged_deduplicated_and_resumable(tmp_path):
+    cache_dir = tmp_path / "graphs"
+    nodes = [Node(type=NodeType.DOCUMENT, properties={"page_content": document.page_content})
+             for document in documents]
+    KnowledgeGraphCache(cache_dir).save(document_set_hash(documents, FakeGenerator()), KnowledgeGraph(nodes=nodes))
+
+    stats = run_generation(documents, tmp_path / "out", 40, FakeGenerator, shards=3, cache_dir=cache_dir,
+                           near_duplicate_threshold=None)
+    assert stats["generated"] >= 44
+    assert stats["samples"] == 40 and stats["shortfall"] == 0
+    df = pd.read_parquet(tmp_path / "out" / "test_dataset.parquet")
+    assert df["user_input"].is_unique and len(df) == stats["samples"]
+    assert list(df["reference_contexts"][0]) == ["Policy 5"]
+    assert len(pd.read_json(tmp_path / "out" / "test_dataset.jsonl", lines=True)) == len(df)
+    assert pd.read_csv(tmp_path / "out" / "test_dataset.csv")["user_input"].tolist() == df["user_input"].tolist()
+
+    # Started again, the shards are complete and nothing is generated
+    assert run_generation(documents, tmp_path / "out", 40, FakeGenerator, shards=3, cache_dir=cache_dir,
+                          near_duplicate_threshold=None)["samples"] == stats["samples"]
+
+
+class RepetitiveGenerator(FakeGenerator):
+    def generate(self, testset_size, run_config=None):
+        # Only 60 different questions, across all seeds
+        samples = [{"user_input": f"How long is policy {random.randrange(60)} valid?",
+                    "reference_contexts": ["Policy"], "reference": "30 days."} for _ in range(testset_size)]
+        return FakeTestset(samples)
+
+
+def test_duplicates_are_made_up_by_new_rounds_and_shortfall_is_reported(tmp_path):
+    cache_dir = tmp_path / "graphs"
+    nodes = [Node(type=NodeType.DOCUMENT, properties={"page_content": document.page_content})
+             for document in documents]
+    KnowledgeGraphCache(cache_dir).save(document_set_hash(documents, RepetitiveGenerator()),
+                                        KnowledgeGraph(nodes=nodes))
+
+    stats = run_generation(documents, tmp_path / "out", 30, RepetitiveGenerator, shards=2, cache_dir=cache_dir,
+                           near_duplicate_threshold=None, max_rounds=10)
+    assert stats["rounds"] > 1 and stats["samples"] == 30 and stats["shortfall"] == 0
+
+    stats = run_generation(documents, tmp_path / "short", 80, RepetitiveGenerator, shards=2, cache_dir=cache_dir,
+                           near_duplicate_threshold=None, max_rounds=2)
+    assert stats["rounds"] == 2 and stats["samples"] <= 60 and stats["shortfall"] == 80 - stats["samples"]
@@ -0,0 +1,47 @@
+import os
+
+from langchain_core.documents import Document
+
+from ai_assistant_data_generation.document_cache import DocumentCache
+
+documents = [Document(page_content="Returns are accepted up to 30 days.", metadata={"source": "policy.pdf", "page": 0})]
+
+
+def test_cached_documents_round_trip(tmp_path):
+    cache = DocumentCache(cache_dir=tmp_path)
+    assert cache.get(b"file content", "pdf") is None
+    cache.put(b"file content", "pdf", documents)
+
+    assert cache.get(b"file content", "pdf") == documents
+    assert cache.get(b"file content", "docx") is None
+    assert cache.get(b"other content", "pdf") is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_loader_upgrade_invalidates_entries(tmp_path):
+    DocumentCache(cache_dir=tmp_path, version="pypdf=5.3.1").put(b"file content", "pdf", documents)
+    assert DocumentCache(cache_dir=tmp_path, version="pypdf=5.4.0").get(b"file content", "pdf") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DocumentCache(cache_dir=tmp_path)
+    for number in range(3):
+        cache.put(str(number).encode(), "pdf", documents)
+    for age, entry in zip([300, 100, 200], sorted(os.scandir(tmp_path), key=lambda entry: entry.name)):
+        os.utime(entry.path, (0, 1000 - age))
+
+    # Reading entry "0" makes it the most recently used one
+    cache.get(b"0", "pdf")
+    # The gzip entries differ in size, the cache is sized to hold exactly the two most recently used ones
+    newest_entries = sorted(os.scandir(tmp_path), key=lambda entry: entry.stat().st_mtime)[1:]
+    cache.max_bytes = sum(entry.stat().st_size for entry in newest_entries)
+    assert cache.evict() == 1
+    assert cache.get(b"0", "pdf") is not None
+    assert sum(cache.get(str(number).encode(), "pdf") is not None for number in range(3)) == 2
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = DocumentCache(cache_dir=tmp_path)
+    cache.put(b"https://example.com", "web", documents)
+    assert cache.get(b"https://example.com", "web", max_age=3600) == documents
+    assert cache.get(b"https://example.com", "web", max_age=-1) is None
@@ -0,0 +1,49 @@
+from io import BytesIO
+
+from pypdf import PdfWriter
+
+from ai_assistant_data_generation.document_cache import DocumentCache
+from ai_assistant_data_generation.document_loading import load_uploaded_files
+
+
+def named_file(name, content):
+    file_object = BytesIO(content)
+    file_object.name = name
+    return file_object
+
+
+def blank_pdf(pages):
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def test_files_are_loaded_in_upload_order_with_timings():
+    results = load_uploaded_files([named_file("first.pdf", blank_pdf(2)), named_file("notes.txt", b"text"),
+                                   named_file("second.pdf", blank_pdf(1))])
+
+    assert [file_name for file_name, _, _, _, _ in results] == ["first.pdf", "notes.txt", "second.pdf"]
+    first_documents = results[0][1]
+    assert len(first_documents) == 2
+    assert first_documents[0].metadata["source"] == "first.pdf"
+    assert results[1][3] == "Unsupported file format."
+    assert all(parse_time >= 0 for _, _, parse_time, _, _ in results)
+
+
+def test_parse_error_is_reported_per_file():
+    results = load_uploaded_files([named_file("broken.pdf", b"not a pdf"), named_file("ok.pdf", blank_pdf(1))])
+    assert results[0][1] == [] and results[0][3]
+    assert len(results[1][1]) == 1 and results[1][3] is None
+
+
+def test_cached_files_are_not_parsed_again(tmp_path):
+    cache = DocumentCache(cache_dir=tmp_path)
+    uploaded_files = [named_file("first.pdf", blank_pdf(2)), named_file("second.pdf", blank_pdf(1))]
+    assert [cached for _, _, _, _, cached in load_uploaded_files(uploaded_files, cache=cache)] == [False, False]
+
+    results = load_uploaded_files(uploaded_files, cache=cache)
+    assert [cached for _, _, _, _, cached in results] == [True, True]
+    assert len(results[0][1]) == 2
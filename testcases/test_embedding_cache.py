@@ -0,0 +1,48 @@
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+
+from ai_assistant_data_generation.embedding_cache import CachedEmbeddingsWrapper
+
+
+class CountingEmbeddings(Embeddings):
+    model = "fake-embedding"
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_cached_run_makes_no_embedding_calls(tmp_path):
+    chunks = [f"Chunk number {number} of the corpus." for number in range(50)]
+    embeddings = CountingEmbeddings()
+    first_run = CachedEmbeddingsWrapper(embeddings, cache_dir=tmp_path, batch_size=16)
+    vectors = first_run.embed_documents(chunks + chunks[:5])
+    assert [len(batch) for batch in embeddings.calls] == [16, 16, 16, 2]
+    assert vectors[50:] == vectors[:5]
+
+    # A new wrapper, as in a new session, reads everything from disk
+    embeddings.calls.clear()
+    second_run = CachedEmbeddingsWrapper(embeddings, cache_dir=tmp_path, batch_size=16)
+    assert second_run.embed_documents(chunks) == vectors[:50]
+    assert asyncio.run(second_run.aembed_query(chunks[3])) == vectors[3]
+    assert embeddings.calls == []
+    stats = second_run.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (51, 0, 1.0)
+    assert stats["bytes_on_disk"] > 0
+
+
+def test_store_grows_past_initial_capacity(tmp_path):
+    embeddings = CountingEmbeddings()
+    wrapper = CachedEmbeddingsWrapper(embeddings, cache_dir=tmp_path)
+    texts = [f"text {number}" for number in range(3000)]
+    vectors = wrapper.embed_documents(texts)
+    assert wrapper.store.capacity == 4096
+    assert wrapper.embed_documents(texts[::-1]) == vectors[::-1]
+    assert wrapper.stats()["embedding_calls"] == 12
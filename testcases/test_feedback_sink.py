@@ -0,0 +1,112 @@
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ai_assistant_metrics_evaluation.feedback_sink import FeedbackSink
+
+
+class FeedbackHandler(BaseHTTPRequestHandler):
+    """
+    Stub feedback endpoint receiving batches as JSON arrays, failing the first requests with a 503.
+    """
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(server.delay)
+        with server.lock:
+            server.requests += 1
+            if server.requests <= server.failures:
+                self.send_error(503)
+                return
+            server.batches.append(json.loads(body))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedbackHandler)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.failures = 0
+    server.delay = 0.0
+    server.batches = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def http_sender(server):
+    url = f"http://127.0.0.1:{server.server_address[1]}/feedback"
+
+    def send_batch(events):
+        request = urllib.request.Request(url, data=json.dumps(events).encode("utf-8"), method="POST",
+                                         headers={"Content-Type": "application/json"})
+        urllib.request.urlopen(request, timeout=5).close()
+
+    return send_batch
+
+
+def events(count):
+    return [{"input": f"Question {number}", "rating": number % 5 + 1} for number in range(count)]
+
+
+def test_events_are_sent_in_batches(endpoint, tmp_path):
+    sink = FeedbackSink(http_sender(endpoint), spool_path=str(tmp_path / "spool.jsonl"), batch_size=10,
+                        flush_interval=0.2)
+    for event in events(25):
+        sink.submit(event)
+    sink.close()
+    assert [len(batch) for batch in endpoint.batches] == [10, 10, 5]
+    assert [event for batch in endpoint.batches for event in batch] == events(25)
+    assert sink.sent == 25 and sink.spooled == 0
+
+
+def test_submit_does_not_wait_for_the_endpoint(endpoint, tmp_path):
+    endpoint.delay = 0.5
+    sink = FeedbackSink(http_sender(endpoint), spool_path=str(tmp_path / "spool.jsonl"), batch_size=5)
+    start_time = time.perf_counter()
+    for event in events(20):
+        sink.submit(event)
+    assert time.perf_counter() - start_time < 0.1
+    sink.close()
+    assert sink.sent == 20
+
+
+def test_failing_batches_are_retried(endpoint, tmp_path):
+    endpoint.failures = 2
+    sink = FeedbackSink(http_sender(endpoint), spool_path=str(tmp_path / "spool.jsonl"), batch_size=5,
+                        retry_delay=0.01)
+    for event in events(5):
+        sink.submit(event)
+    sink.close()
+    assert endpoint.batches == [events(5)]
+    assert endpoint.requests == 3
+
+
+def test_unsent_events_are_spooled_and_sent_by_the_next_sink(endpoint, tmp_path):
+    spool_path = str(tmp_path / "spool.jsonl")
+    endpoint.failures = 100
+    sink = FeedbackSink(http_sender(endpoint), spool_path=spool_path, batch_size=5, max_retries=1,
+                        retry_delay=0.01)
+    for event in events(8):
+        sink.submit(event)
+    sink.close()
+    assert sink.sent == 0 and sink.spooled == 8
+
+    endpoint.failures = 0
+    endpoint.requests = 0
+    sink = FeedbackSink(http_sender(endpoint), spool_path=spool_path, batch_size=5, flush_interval=0.1)
+    sink.close()
+    assert [event for batch in endpoint.batches for event in batch] == events(8)
+    assert sink.sent == 8
@@ -0,0 +1,40 @@
+import pytest
+from langchain_core.documents import Document
+
+from ai_assistant_data_generation.generation_estimate import (
+    SYNTHESIS_CALLS_PER_SAMPLE,
+    CallStats,
+    EstimateLog,
+    estimate_generation,
+)
+
+documents = [Document(page_content="Returns are accepted up to 30 days after delivery. " * 100)] * 4
+
+
+def test_recorded_calls_drive_the_estimate(tmp_path):
+    call_stats = CallStats(tmp_path / "call_stats.json")
+    first = estimate_generation(documents, 10, call_stats)
+    assert first["document_tokens"] > 2000
+    assert first["llm_calls"] > SYNTHESIS_CALLS_PER_SAMPLE * 10 and first["embedding_calls"] > 0
+
+    # Calls twice as slow as the defaults double the estimated time
+    for _ in range(3):
+        call_stats.record("llm", 8.0, 900, 250)
+        call_stats.record("embedding", 0.8, 400)
+    call_stats.save()
+    slower = estimate_generation(documents, 10, CallStats(tmp_path / "call_stats.json"))
+    assert slower["seconds"] == pytest.approx(2 * first["seconds"])
+    assert slower["cost"] == pytest.approx(first["cost"])
+
+    # A cached knowledge graph and checkpointed samples only leave the remaining synthesis calls
+    resumed = estimate_generation(documents, 10, call_stats, knowledge_graph_cached=True, samples_done=4)
+    assert (resumed["llm_calls"], resumed["embedding_calls"]) == (SYNTHESIS_CALLS_PER_SAMPLE * 6, 0)
+    assert call_stats.calls == {"llm": 3, "embedding": 3}
+
+
+def test_prediction_error_is_tracked(tmp_path):
+    estimate_log = EstimateLog(tmp_path / "estimates.jsonl")
+    assert estimate_log.mean_absolute_error() is None
+    assert estimate_log.record({"seconds": 80.0}, 100.0, 40, 10) == pytest.approx(0.2)
+    assert estimate_log.record({"seconds": 110.0}, 100.0, 40, 10) == pytest.approx(-0.1)
+    assert estimate_log.mean_absolute_error() == pytest.approx(0.15)
@@ -0,0 +1,85 @@
+import pytest
+
+from ai_assistant_metrics_evaluation.async_metrics import measure_pairs
+from ai_assistant_metrics_evaluation.judge_cache import JudgeCache, judge_key
+
+
+class FakeMetric:
+    """
+    Judge counting its measures, scoring the share of expected output words found in the actual output.
+    """
+    measures = 0
+
+    def __init__(self, threshold=0.5, model="gpt-4", criteria=None):
+        self.threshold = threshold
+        self.model = model
+        self.criteria = criteria
+        self.async_mode = True
+        self.score = None
+        self.reason = None
+        self.error = None
+        self.success = None
+
+    async def a_measure(self, test_case, _show_indicator=True):
+        FakeMetric.measures += 1
+        expected = test_case.expected_output.split()
+        self.score = sum(word in test_case.actual_output.split() for word in expected) / len(expected)
+        self.reason = f"{self.score:.2f} of the expected words"
+        return self.score
+
+    def is_successful(self):
+        self.success = self.error is None and self.score >= self.threshold
+        return self.success
+
+
+class FakeTestCase:
+    def __init__(self, actual_output, expected_output="refund within 30 days"):
+        self.input = "Can I return it?"
+        self.actual_output = actual_output
+        self.expected_output = expected_output
+        self.context = None
+        self.retrieval_context = ["Returns are accepted within 30 days."]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    judge_cache = JudgeCache(str(tmp_path / "judge.sqlite"))
+    yield judge_cache
+    judge_cache.close()
+
+
+def test_key_depends_on_metric_model_threshold_criteria_and_test_case():
+    test_case = FakeTestCase("refund within 30 days")
+    key = judge_key(FakeMetric(), test_case)
+    assert key == judge_key(FakeMetric(), FakeTestCase("refund within 30 days"))
+    assert key != judge_key(FakeMetric(threshold=0.7), test_case)
+    assert key != judge_key(FakeMetric(model="gpt-4o"), test_case)
+    assert key != judge_key(FakeMetric(criteria="Correctness"), test_case)
+    assert key != judge_key(FakeMetric(), FakeTestCase("refund within 14 days"))
+
+
+def test_rerun_only_judges_changed_test_cases(cache):
+    test_cases = [FakeTestCase(f"refund within {days} days") for days in range(1, 101)]
+    FakeMetric.measures = 0
+    first = measure_pairs([FakeMetric() for _ in test_cases], test_cases, cache=cache)
+    assert FakeMetric.measures == 100
+
+    test_cases[5] = FakeTestCase("no returns accepted")
+    FakeMetric.measures = 0
+    measured = []
+    second = measure_pairs([FakeMetric() for _ in test_cases], test_cases, cache=cache,
+                           on_measured=lambda position, metric: measured.append(position))
+    assert FakeMetric.measures == 1
+    assert cache.hits == 99
+    # Restored results are reported like measured ones, so the run journal records them too
+    assert sorted(measured) == list(range(100))
+    assert [metric.score for metric in second[:5]] == [metric.score for metric in first[:5]]
+    assert second[5].score == 0.0 and not second[5].is_successful()
+    assert second[30].reason == first[30].reason and second[30].success
+
+
+def test_failed_measures_are_not_cached(cache):
+    metric = FakeMetric()
+    metric.error = "Judge unavailable"
+    cache.save(metric, FakeTestCase("refund"))
+    assert not cache.load(FakeMetric(), FakeTestCase("refund"))
@@ -0,0 +1,59 @@
+from langchain_core.documents import Document
+from ragas.testset.graph import KnowledgeGraph, Node, NodeType, Relationship
+from ragas.testset.persona import Persona
+
+from ai_assistant_data_generation.knowledge_graph_cache import (
+    KnowledgeGraphCache,
+    document_set_hash,
+    generate_testset,
+)
+
+documents = [Document(page_content="Returns are accepted up to 30 days.", metadata={"source": "policy.pdf"}),
+             Document(page_content="Refunds are paid within 5 days.", metadata={"source": "refunds.pdf"})]
+
+
+class FakeGenerator:
+    llm = None
+    embedding_model = None
+    knowledge_graph = None
+    persona_list = None
+
+    def __init__(self):
+        self.sizes = []
+
+    def generate(self, testset_size):
+        self.sizes.append(testset_size)
+        if self.persona_list is None:
+            self.persona_list = [Persona(name="Support Agent", role_description="Answers refund questions.")]
+        return [f"sample {number}" for number in range(testset_size)]
+
+
+def make_knowledge_graph():
+    nodes = [Node(type=NodeType.CHUNK, properties={"page_content": document.page_content})
+             for document in documents]
+    relationship = Relationship(source=nodes[0], target=nodes[1], type="cosine_similarity",
+                                properties={"score": 0.8})
+    return KnowledgeGraph(nodes=nodes, relationships=[relationship])
+
+
+def test_document_set_hash_ignores_order():
+    assert document_set_hash(documents) == document_set_hash(documents[::-1])
+    assert document_set_hash(documents) != document_set_hash(documents[:1])
+
+
+def test_cached_knowledge_graph_and_personas_are_reused(tmp_path):
+    cache = KnowledgeGraphCache(cache_dir=tmp_path)
+    generator = FakeGenerator()
+    key = document_set_hash(documents, generator)
+    assert cache.load(key) is None
+    cache.save(key, make_knowledge_graph())
+
+    dataset, reused = generate_testset(generator, documents, 3, cache=cache)
+    assert reused and len(dataset) == 3
+    assert len(generator.knowledge_graph.nodes) == 2 and len(generator.knowledge_graph.relationships) == 1
+
+    # The personas generated by the first run are stored with the graph
+    other_generator = FakeGenerator()
+    dataset, reused = generate_testset(other_generator, documents, 50, cache=cache)
+    assert reused and len(dataset) == 50
+    assert other_generator.persona_list[0].name == "Support Agent"
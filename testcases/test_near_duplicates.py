@@ -0,0 +1,55 @@
+import random
+
+from langchain_core.documents import Document
+
+from ai_assistant_data_generation.near_duplicates import (
+    MinHasher,
+    jaccard,
+    lsh_params,
+    remove_near_duplicates,
+    shingles,
+)
+
+random.seed(7)
+VOCABULARY = [f"word{number}" for number in range(2000)]
+
+
+def random_page(words=400):
+    return " ".join(random.choice(VOCABULARY) for _ in range(words))
+
+
+def test_signature_agreement_estimates_jaccard():
+    page = random_page()
+    edited = page.split()
+    edited[100:120] = random_page(20).split()
+    first, second = shingles(page), shingles(" ".join(edited))
+    hasher = MinHasher(num_perm=256)
+    estimate = (hasher.signature(first) == hasher.signature(second)).mean()
+    assert abs(estimate - jaccard(first, second)) < 0.1
+
+
+def test_lsh_params_match_threshold():
+    bands, rows = lsh_params(0.8, 128)
+    assert bands * rows == 128
+    assert abs((1 / bands) ** (1 / rows) - 0.8) < 0.1
+
+
+def test_near_duplicate_pages_are_dropped():
+    pages = [random_page() for _ in range(30)]
+    documents = [Document(page_content=page, metadata={"source": f"wiki/page-{number}"})
+                 for number, page in enumerate(pages)]
+    # Versioned copies: a changed footer, and a copy with punctuation and case changes only
+    documents.append(Document(page_content=pages[3] + " Last edited 2024-05-01.", metadata={"source": "wiki/v2/page-3"}))
+    documents.append(Document(page_content=pages[8].upper().replace(" ", ", "), metadata={"source": "wiki/v2/page-8"}))
+    # Half of the page rewritten is not a near-duplicate
+    words = pages[5].split()
+    documents.append(Document(page_content=" ".join(words[:200] + random_page(200).split()),
+                              metadata={"source": "wiki/v2/page-5"}))
+
+    kept, report = remove_near_duplicates(documents, threshold=0.8)
+    assert [document.metadata["source"] for document in kept] == [f"wiki/page-{number}" for number in range(30)] + \
+        ["wiki/v2/page-5"]
+    assert report["duplicates"] == [("wiki/v2/page-3", "wiki/page-3"), ("wiki/v2/page-8", "wiki/page-8")]
+    assert report["dropped"] == 2 and report["llm_calls_saved"] > 0
+    # Only documents sharing an LSH bucket are compared
+    assert report["comparisons"] <= 5
@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+from langchain_core.embeddings import FakeEmbeddings
+from langchain_core.language_models import FakeListChatModel
+
+from ai_assistant_metrics_evaluation import ragas_session
+from ai_assistant_metrics_evaluation.ragas_session import RagasSession, SqliteCacheBackend, llm_cache_path
+
+DATA_SAMPLES = {
+    "question": ["What is the refund window?", "Who handles returns?"],
+    "answer": ["30 days", "The support team"],
+    "contexts": [["Refunds are accepted within 30 days."], ["Returns are handled by support."]],
+    "ground_truth": ["30 days", "Support"],
+}
+
+
+class FakeMetric:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeResult:
+    def __init__(self, df):
+        self.df = df
+
+    def to_pandas(self):
+        return self.df
+
+
+@pytest.fixture
+def evaluated(monkeypatch):
+    calls = []
+
+    def fake_evaluate(dataset, metrics, **kwargs):
+        calls.append([metric.name for metric in metrics])
+        df = pd.DataFrame({"user_input": dataset["question"], "retrieved_contexts": dataset["contexts"],
+                           "response": dataset["answer"], "reference": dataset["ground_truth"]})
+        for position, metric in enumerate(metrics):
+            df[metric.name] = [0.5 + position / 10] * len(df)
+        return FakeResult(df)
+
+    monkeypatch.setattr(ragas_session, "evaluate", fake_evaluate)
+    return calls
+
+
+def test_sqlite_cache_backend_persists_values(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    cache = SqliteCacheBackend(path)
+    assert not cache.has_key("key") and cache.get("key") is None
+    cache.set("key", {"generations": ["answer"]})
+
+    reopened = SqliteCacheBackend(path)
+    assert reopened.has_key("key")
+    assert reopened.get("key") == {"generations": ["answer"]}
+
+
+def test_each_judge_model_gets_its_own_llm_cache(tmp_path):
+    class ChatModel:
+        def __init__(self, model_name):
+            self.model_name = model_name
+
+    assert llm_cache_path(ChatModel("gpt-4o"), str(tmp_path)) == llm_cache_path(ChatModel("gpt-4o"), str(tmp_path))
+    assert llm_cache_path(ChatModel("gpt-4o"), str(tmp_path)) != llm_cache_path(ChatModel("gpt-4o-mini"),
+                                                                                str(tmp_path))
+
+
+def test_session_only_evaluates_new_metrics(tmp_path, evaluated):
+    session = RagasSession(DATA_SAMPLES, llm=FakeListChatModel(responses=["ok"]), embeddings=FakeEmbeddings(size=8),
+                           llm_cache_dir=str(tmp_path / "llm"), embedding_cache_dir=str(tmp_path / "emb"))
+
+    first = session.evaluate([FakeMetric("faithfulness")])
+    second = session.evaluate([FakeMetric("faithfulness"), FakeMetric("answer_relevancy")])
+    third = session.evaluate([FakeMetric("answer_relevancy")])
+
+    assert evaluated == [["faithfulness"], ["answer_relevancy"]]
+    assert list(first.columns) == ["user_input", "retrieved_contexts", "response", "reference", "faithfulness"]
+    assert list(second.columns[4:]) == ["faithfulness", "answer_relevancy"]
+    assert list(third.columns[4:]) == ["answer_relevancy"]
+    assert len(third) == 2
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from ai_assistant_data_generation.rate_limiting import AdaptiveConcurrency, RateLimitController, TokenBucket
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeProvider:
+    """
+    Provider answering each call after a fixed latency, with 429s beyond a number of concurrent calls.
+    """
+
+    def __init__(self, max_concurrent, latency=0.01):
+        self.max_concurrent = max_concurrent
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+
+    async def call(self):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+            if self.active > self.max_concurrent:
+                raise RateLimitError("Rate limit reached")
+        finally:
+            self.active -= 1
+
+
+async def call_with_retries(controller, provider):
+    while True:
+        try:
+            async with controller.slot(tokens=10):
+                await provider.call()
+            return
+        except RateLimitError:
+            await asyncio.sleep(0.005)
+
+
+def test_token_bucket_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=60, clock=clock)
+
+    async def drain():
+        await bucket.acquire(60)
+        waiting = asyncio.ensure_future(bucket.acquire(1))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        clock.now += 1.0
+        await asyncio.wait_for(waiting, 2)
+
+    asyncio.run(drain())
+    bucket.adjust(-5)
+    assert bucket.available == pytest.approx(5)
+
+
+def test_aimd_increases_per_round_and_halves_on_429():
+    clock = FakeClock()
+    concurrency = AdaptiveConcurrency(initial=4, clock=clock)
+    for _ in range(4):
+        concurrency.on_success(1.0)
+    assert 4.9 < concurrency.limit < 5.0
+    clock.now = 10.0
+    concurrency.on_rate_limit()
+    assert concurrency.limit == pytest.approx(concurrency.peak / 2)
+    # 429s of calls started before the decrease do not decrease it again
+    limit = concurrency.limit
+    concurrency.on_rate_limit()
+    assert concurrency.limit == limit
+
+
+def test_controller_converges_below_provider_limit():
+    provider = FakeProvider(max_concurrent=8)
+    controller = RateLimitController(requests_per_minute=100000, tokens_per_minute=10 ** 7, initial_concurrency=2,
+                                     max_concurrency=64)
+
+    async def run():
+        await asyncio.gather(*(call_with_retries(controller, provider) for _ in range(600)))
+
+    asyncio.run(run())
+    stats = controller.stats()
+    assert stats["completed"] == 600
+    # The limit grew from 2 up to the provider limit, and the 429s stayed a small share of the calls
+    assert stats["peak_concurrency"] >= 8
+    assert 0 < stats["rate_limited"] < 60
+    assert controller.concurrency.limit <= 12
@@ -0,0 +1,57 @@
+import csv
+import json
+import tracemalloc
+
+import pytest
+from openpyxl import load_workbook
+
+from ai_assistant_metrics_evaluation.report_writer import ReportWriter
+
+HEADER = ["User Input", "Bot Response", "Faithfulness Score", "Reason"]
+
+
+def row(number):
+    return [f"Question {number}", f"Answer {number}", number / 100, f"Reason {number} " + "because " * 50]
+
+
+def test_report_and_sidecars_hold_all_rows(tmp_path):
+    file_path = str(tmp_path / "FaithfulnessReport.xlsx")
+    with ReportWriter(file_path, HEADER, sidecar_formats=("jsonl", "csv")) as report:
+        for number in range(3):
+            report.append(row(number))
+
+    assert list(load_workbook(file_path).active.values) == [tuple(HEADER)] + [tuple(row(number)) for number in
+                                                                              range(3)]
+    with open(tmp_path / "FaithfulnessReport.jsonl", encoding="utf-8") as jsonl_file:
+        assert [json.loads(line) for line in jsonl_file] == [dict(zip(HEADER, row(number))) for number in range(3)]
+    with open(tmp_path / "FaithfulnessReport.csv", encoding="utf-8", newline="") as csv_file:
+        rows = list(csv.reader(csv_file))
+    assert rows[0] == HEADER and rows[3][0] == "Question 2"
+
+
+def test_rows_are_on_disk_before_the_report_is_closed(tmp_path):
+    report = ReportWriter(str(tmp_path / "Report.xlsx"), HEADER)
+    report.append(row(1))
+    report.append(row(2))
+    with open(tmp_path / "Report.jsonl", encoding="utf-8") as jsonl_file:
+        assert len(jsonl_file.readlines()) == 2
+    report.close()
+
+
+def test_memory_stays_flat_with_the_number_of_rows(tmp_path):
+    def peak_memory(rows):
+        tracemalloc.start()
+        with ReportWriter(str(tmp_path / f"Report{rows}.xlsx"), HEADER) as report:
+            for number in range(rows):
+                report.append(row(number))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+
+    # Ten times the rows, about 4 MB more of reasons, must not cost ten times the memory
+    assert peak_memory(10000) < 2 * peak_memory(1000)
+
+
+def test_unknown_sidecar_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ReportWriter(str(tmp_path / "Report.xlsx"), HEADER, sidecar_formats=("parquet",))
@@ -0,0 +1,46 @@
+from ai_assistant.requirement_store import RequirementStore, count_tokens
+
+instruction = "You are a manual software tester. Write detailed manual test cases for the given requirements."
+
+
+def requirement(number):
+    return f"Requirement {number}: " + " ".join(f"The system shall support feature {number}-{line}."
+                                                for line in range(200))
+
+
+def test_same_document_is_stored_once():
+    store = RequirementStore()
+    assert store.add(requirement(1)) == store.add(requirement(1))
+    assert len(store.documents) == 1
+
+
+def test_only_current_document_is_sent_in_full():
+    store = RequirementStore()
+    for number in range(3):
+        store.add(requirement(number))
+    doc_id = store.add(requirement(3))
+    messages = store.build_messages(doc_id, instruction)
+
+    assert messages[0] == ("system", instruction)
+    assert messages[-1] == ("user", requirement(3))
+    assert sum(requirement(0) in message for _, message in messages) == 0
+    assert messages[1][1].count("\n- [") == 3
+
+
+def test_prompt_tokens_stay_flat_over_a_session():
+    store = RequirementStore(max_prompt_tokens=4000)
+    prompt_tokens = []
+    for number in range(30):
+        doc_id = store.add(requirement(number))
+        prompt_tokens.append(store.count_message_tokens(store.build_messages(doc_id, instruction)))
+    assert max(prompt_tokens) <= 4000
+    assert max(prompt_tokens[10:]) - min(prompt_tokens[10:]) < 100
+
+
+def test_token_ceiling_truncates_a_large_document():
+    store = RequirementStore(max_prompt_tokens=500)
+    store.add(requirement(1))
+    doc_id = store.add(requirement(2) * 5)
+    messages = store.build_messages(doc_id, instruction)
+    assert store.count_message_tokens(messages) <= 500
+    assert len(messages) == 2 and count_tokens(messages[-1][1]) > 300
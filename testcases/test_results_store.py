@@ -0,0 +1,59 @@
+import time
+
+import numpy as np
+import pytest
+
+from ai_assistant_metrics_evaluation.results_store import ResultsStore, diff_runs
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultsStore(str(tmp_path / "results_store"))
+
+
+def test_runs_are_appended_and_read_back_by_partition(store):
+    store.append("run_a", ["Q1", "Q2"], {"FaithfulnessMetric": [0.9, 0.7], "BiasMetric": [0.0, None]})
+    store.append("run_a", ["Q3"], {"GEval": [1.0]}, part="g_eval")
+    store.append("run_b", ["Q1"], {"FaithfulnessMetric": [0.8]})
+
+    run_a = store.load(run_ids=["run_a"])
+    assert len(run_a) == 5 and set(run_a["run_id"]) == {"run_a"}
+    assert run_a["score"].isna().sum() == 1
+    assert list(store.runs()["run_id"]) == ["run_a", "run_b"]
+    assert list(store.history("FaithfulnessMetric", "Q1")["score"]) == [0.9, 0.8]
+
+
+def test_diff_flags_significant_regressions_only(store):
+    generator = np.random.default_rng(7)
+    questions = [f"Question {number}" for number in range(2000)]
+    baseline = generator.uniform(0.6, 1.0, len(questions))
+    store.append("baseline", questions, {"FaithfulnessMetric": baseline, "AnswerRelevancyMetric": baseline,
+                                         "ToxicityMetric": 1 - baseline})
+    # Faithfulness drops, answer relevancy only gets noisier, toxicity gets better
+    store.append("candidate", questions, {
+        "FaithfulnessMetric": np.clip(baseline - 0.05 + generator.normal(0, 0.05, len(questions)), 0, 1),
+        "AnswerRelevancyMetric": np.clip(baseline + generator.normal(0, 0.05, len(questions)), 0, 1),
+        "ToxicityMetric": (1 - baseline) * 0.5,
+    })
+
+    start_time = time.perf_counter()
+    diff = diff_runs(store, "baseline", "candidate").set_index("metric")
+    assert time.perf_counter() - start_time < 5
+    assert diff.loc["FaithfulnessMetric", "regression"]
+    assert diff.loc["FaithfulnessMetric", "pairs"] == 2000
+    assert not diff.loc["AnswerRelevancyMetric", "regression"]
+    assert not diff.loc["ToxicityMetric", "regression"] and diff.loc["ToxicityMetric", "delta"] < 0
+
+
+def test_identical_runs_have_no_regression(store):
+    store.append("first", ["Q1", "Q2", "Q3"], {"GEval": [0.5, 0.6, 0.7]})
+    store.append("second", ["Q1", "Q2", "Q3"], {"GEval": [0.5, 0.6, 0.7]})
+    diff = diff_runs(store, "first", "second")
+    assert not diff["regression"].any() and diff.loc[0, "p_value"] == 1.0
+
+
+def test_unknown_run_cannot_be_compared(store):
+    assert store.runs().empty
+    store.append("first", ["Q1"], {"GEval": [0.5]})
+    with pytest.raises(ValueError):
+        diff_runs(store, "first", "missing")
@@ -0,0 +1,77 @@
+import pytest
+
+from ai_assistant_metrics_evaluation.async_metrics import measure_pairs
+from ai_assistant_metrics_evaluation.run_journal import RunJournal, record_metric, restore_metric
+
+
+class FlakyMetric:
+    """
+    Judge scoring the length of the actual output, failing on the test cases listed in fail_on.
+    """
+    fail_on = set()
+    measures = 0
+
+    def __init__(self):
+        self.threshold = 0.5
+        self.async_mode = False
+        self.score = None
+        self.reason = None
+        self.error = None
+
+    def measure(self, test_case):
+        FlakyMetric.measures += 1
+        if test_case.actual_output in FlakyMetric.fail_on:
+            raise ConnectionError("Judge unavailable")
+        self.score = len(test_case.actual_output) / 10
+        self.reason = f"{len(test_case.actual_output)} characters"
+
+    def is_successful(self):
+        return self.score >= self.threshold
+
+
+class FakeTestCase:
+    def __init__(self, actual_output):
+        self.actual_output = actual_output
+
+
+def run(journal, test_cases):
+    metrics = [FlakyMetric() for _ in test_cases]
+    pending = [row for row, metric in enumerate(metrics) if not restore_metric(journal, row, metric)]
+    measure_pairs([metrics[row] for row in pending], [test_cases[row] for row in pending], max_concurrency=1,
+                  on_measured=lambda position, metric: record_metric(journal, pending[position], metric))
+    return metrics
+
+
+def test_resumed_run_only_measures_the_missing_results(tmp_path):
+    test_cases = [FakeTestCase("a" * length) for length in range(1, 11)]
+    journal = RunJournal(journal_dir=str(tmp_path))
+    FlakyMetric.fail_on = {"a" * 6}
+    with pytest.raises(ConnectionError):
+        run(journal, test_cases)
+    completed = len(journal.results)
+    assert 5 <= completed < 10
+
+    FlakyMetric.fail_on = set()
+    FlakyMetric.measures = 0
+    resumed = run(RunJournal(journal.run_id, journal_dir=str(tmp_path)), test_cases)
+    assert FlakyMetric.measures == 10 - completed
+    assert [metric.score for metric in resumed] == [length / 10 for length in range(1, 11)]
+    assert resumed[0].reason == "1 characters" and not resumed[0].is_successful()
+    assert resumed[9].is_successful()
+
+
+def test_line_cut_off_by_a_crash_is_dropped(tmp_path):
+    journal = RunJournal(journal_dir=str(tmp_path))
+    journal.record(0, "FaithfulnessMetric", {"score": 1.0, "reason": "Grounded", "success": True})
+    with open(journal.path, "a", encoding="utf-8") as journal_file:
+        journal_file.write('{"row": 1, "metric": "Faithful')
+
+    resumed = RunJournal(journal.run_id, journal_dir=str(tmp_path))
+    assert resumed.results == {(0, "FaithfulnessMetric"): {"score": 1.0, "reason": "Grounded", "success": True}}
+    resumed.record(1, "FaithfulnessMetric", {"score": 0.0, "reason": "Made up", "success": False})
+    assert len(RunJournal(journal.run_id, journal_dir=str(tmp_path)).results) == 2
+
+
+def test_unknown_run_cannot_be_resumed(tmp_path):
+    with pytest.raises(ValueError):
+        RunJournal("20240101_000000_deadbeef", journal_dir=str(tmp_path))
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from ai_assistant_metrics_evaluation.sampling import SamplingPlan, bootstrap_ci, metric_intervals
+
+# 80% billing and 20% refund questions, the refund answers score lower
+STRATA = ["billing"] * 800 + ["refund"] * 200
+rng = np.random.default_rng(0)
+SCORES = np.concatenate([rng.uniform(0.7, 1.0, 800), rng.uniform(0.0, 0.4, 200)])
+
+
+def test_row_order_prefixes_follow_the_strata():
+    plan = SamplingPlan(strata=STRATA, min_per_stratum=2)
+    row_strata = plan.row_strata(len(STRATA))
+    order = plan.row_order(range(len(STRATA)), row_strata)
+
+    assert sorted(order) == list(range(len(STRATA)))
+    assert {row_strata[row] for row in order[:4]} == {"billing", "refund"}
+    for size in (50, 100, 300):
+        refund_share = np.mean(row_strata[order[:size]] == "refund")
+        assert refund_share == pytest.approx(0.2, abs=0.05)
+    assert plan.rounds(1000) == [200, 300, 400, 500, 600, 700, 800, 900, 1000]
+    assert SamplingPlan(max_rows=250).rounds(1000) == [200, 250]
+
+
+def test_stratified_estimate_is_close_to_the_full_mean():
+    plan = SamplingPlan(strata=STRATA)
+    row_strata = plan.row_strata(len(STRATA))
+    sample = plan.row_order(range(len(STRATA)), row_strata)[:150]
+
+    estimate, lower, upper = bootstrap_ci(SCORES[sample], row_strata[sample], row_strata)
+    assert lower <= estimate <= upper
+    assert lower <= SCORES.mean() <= upper
+    assert upper - lower < 0.1
+
+
+def test_metric_intervals_narrow_with_more_rows_and_skip_missing_scores():
+    plan = SamplingPlan(strata=STRATA)
+    row_strata = plan.row_strata(len(STRATA))
+    order = plan.row_order(range(len(STRATA)), row_strata)
+    small, large = order[:40], order[:400]
+
+    intervals = metric_intervals({"FaithfulnessMetric": SCORES[small].tolist(),
+                                  "GEval": [None] * len(small)}, small, row_strata, plan)
+    larger = metric_intervals({"FaithfulnessMetric": SCORES[large].tolist()}, large, row_strata, plan)
+
+    assert intervals["rows"].tolist() == [40, 0]
+    assert np.isnan(intervals.loc[1, "estimate"])
+    assert larger.loc[0, "width"] < intervals.loc[0, "width"]
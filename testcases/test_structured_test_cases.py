@@ -0,0 +1,83 @@
+import json
+
+from ai_assistant.structured_test_cases import generate_structured_test_cases, load_json_records, validate_records
+
+valid_record = {
+    "Test Case ID": "TC_01",
+    "Test Case Title": "Verify login with valid credentials",
+    "Pre-conditions": "User is registered",
+    "Test Data": "Username: john",
+    "Test Steps": ["Open the login page", "Click Login"],
+    "Expected Result": "User is redirected to the dashboard",
+    "Priority": "high",
+}
+
+record_without_expected_result = {
+    "Test Case ID": "TC_02",
+    "Test Case Title": "Verify logout",
+    "Pre-conditions": "User is logged in",
+    "Test Data": "None",
+    "Test Steps": "Click Logout",
+    "Priority": "Medium",
+}
+
+
+class ScriptedChatModel:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def invoke(self, messages):
+        self.requests.append(messages)
+        return type("Response", (), {"content": json.dumps({"test_cases": self.responses.pop(0)}),
+                                     "usage_metadata": {"input_tokens": 100, "output_tokens": 50}})()
+
+
+def test_records_are_validated_one_by_one():
+    valid, failed = validate_records([valid_record, record_without_expected_result])
+    assert valid[0]["Test Steps"] == "Open the login page\nClick Login"
+    assert valid[0]["Priority"] == "High"
+    assert failed[0][0] is record_without_expected_result
+    assert "Expected Result" in failed[0][1]
+
+
+def test_json_is_found_inside_surrounding_text():
+    assert load_json_records('Here you go:\n[{"Test Case ID": "TC_01"}]') == [{"Test Case ID": "TC_01"}]
+    assert load_json_records("no json here") is None
+
+
+def test_only_failed_records_are_requested_again():
+    fixed_record = dict(record_without_expected_result, **{"Expected Result": "User is logged out", "Repair Index": 0})
+    llm = ScriptedChatModel([[valid_record, record_without_expected_result], [fixed_record]])
+    test_cases, report = generate_structured_test_cases(llm, [("system", "Write test cases."),
+                                                              ("user", "Login page")])
+
+    assert [test_case["Test Case ID"] for test_case in test_cases] == ["TC_01", "TC_02"]
+    repair_request = json.loads(llm.requests[1][1][1])
+    assert [(item["Repair Index"], item["record"]["Test Case ID"]) for item in repair_request] == [(0, "TC_02")]
+    assert report["repaired"] == 1 and report["dropped"] == 0 and report["salvaged_tokens"] > 0
+
+
+def test_records_that_stay_invalid_are_dropped():
+    still_invalid = dict(record_without_expected_result, **{"Repair Index": 0})
+    llm = ScriptedChatModel([[record_without_expected_result], [still_invalid], [dict(still_invalid)]])
+    test_cases, report = generate_structured_test_cases(llm, [("system", "Write test cases."),
+                                                              ("user", "Logout")])
+    assert test_cases == []
+    assert report["repair_requests"] == 2 and report["dropped"] == 1
+
+
+def test_repaired_records_are_matched_by_index_not_order():
+    record_without_title = dict(valid_record, **{"Test Case ID": "TC_03", "Test Case Title": ""})
+    fixed_title = dict(record_without_title, **{"Test Case Title": "Verify login", "Repair Index": 1})
+    still_invalid = dict(record_without_expected_result, **{"Repair Index": 0})
+    # The model returns the records in reverse order, then leaves the remaining one out
+    llm = ScriptedChatModel([[record_without_expected_result, record_without_title], [fixed_title, still_invalid],
+                             []])
+    test_cases, report = generate_structured_test_cases(llm, [("system", "Write test cases."), ("user", "Login")])
+
+    assert [test_case["Test Case ID"] for test_case in test_cases] == ["TC_03"]
+    assert "Repair Index" not in test_cases[0]
+    repair_request = json.loads(llm.requests[2][1][1])
+    assert [(item["Repair Index"], item["record"]["Test Case ID"]) for item in repair_request] == [(0, "TC_02")]
+    assert report["repaired"] == 1 and report["dropped"] == 1
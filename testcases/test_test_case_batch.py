@@ -0,0 +1,57 @@
+import json
+import os
+
+from openpyxl import load_workbook
+
+from ai_assistant.test_case_batch import run_batch, MANIFEST_FILE_NAME, MERGED_WORKBOOK_NAME
+
+bot_response = """Test Case ID: TC_01
+Test Case Title: Verify {title}
+Pre-conditions: None
+Test Data: None
+Test Steps: 1. Open the page
+Expected Result: The page is displayed
+Priority: High"""
+
+
+class FakeChatModel:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return type("Response", (), {"content": bot_response.format(title=messages[-1][1])})()
+
+
+def write_requirements(input_dir, count):
+    os.makedirs(input_dir, exist_ok=True)
+    for number in range(count):
+        with open(os.path.join(input_dir, f"requirement_{number}.txt"), "w") as requirement_file:
+            requirement_file.write(f"requirement {number}")
+
+
+def test_run_batch_writes_outputs(tmp_path):
+    write_requirements(tmp_path / "requirements", 3)
+    llm = FakeChatModel()
+    stats = run_batch(tmp_path / "requirements", tmp_path / "output", llm, extract_workers=2, llm_workers=2)
+
+    assert stats["processed"] == 3 and stats["test_cases"] == 3 and llm.calls == 3
+    with open(tmp_path / "output" / "requirement_1.txt.jsonl") as jsonl_file:
+        assert json.loads(jsonl_file.readline())["Test Case Title"] == "Verify requirement 1"
+    rows = list(load_workbook(tmp_path / "output" / MERGED_WORKBOOK_NAME).active.iter_rows(values_only=True))
+    assert len(rows) == 4 and rows[0][-1] == "Source File"
+
+
+def test_run_batch_resumes_from_manifest(tmp_path):
+    write_requirements(tmp_path / "requirements", 3)
+    run_batch(tmp_path / "requirements", tmp_path / "output", FakeChatModel(), extract_workers=2)
+
+    # Simulate a crash before the last file was recorded
+    manifest_path = tmp_path / "output" / MANIFEST_FILE_NAME
+    lines = manifest_path.read_text().splitlines()
+    manifest_path.write_text("\n".join(lines[:2]) + "\n")
+
+    llm = FakeChatModel()
+    stats = run_batch(tmp_path / "requirements", tmp_path / "output", llm, extract_workers=2)
+    assert llm.calls == 1
+    assert stats["skipped"] == 2 and stats["test_cases"] == 3
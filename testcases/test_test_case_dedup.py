@@ -0,0 +1,113 @@
+from ai_assistant.test_case_dedup import DuplicateTestCaseIndex, normalize_title_tokens
+
+login_test_case = {
+    "Test Case ID": "TC_01",
+    "Test Case Title": "Verify login with valid credentials",
+    "Test Data": "Username: john, Password: secret",
+    "Test Steps": "1. Open the login page\n2. Enter valid username and password\n3. Click Login",
+    "Expected Result": "User is redirected to the dashboard",
+}
+
+regenerated_login_test_case = {
+    "Test Case ID": "TC_01",
+    "Test Case Title": "Verify login with valid credentials.",
+    "Test Data": "Username: john, Password: secret",
+    "Test Steps": "1. Open the login page\n2. Enter valid username and password\n3. Click 'Login'",
+    "Expected Result": "User is redirected to the dashboard.",
+}
+
+remember_me_test_case = {
+    "Test Case ID": "TC_02",
+    "Test Case Title": "Verify login with valid credentials and remember me",
+    "Test Data": "Username: john, Password: secret",
+    "Test Steps": "1. Open the login page\n2. Enter valid username and password\n3. Tick Remember me\n"
+                  "4. Click Login",
+    "Expected Result": "User is redirected to the dashboard and stays logged in after reopening the browser",
+}
+
+invalid_login_test_case = {
+    "Test Case ID": "TC_03",
+    "Test Case Title": "Verify login with invalid credentials",
+    "Test Data": "Username: john, Password: wrong",
+    "Test Steps": "1. Open the login page\n2. Enter invalid username and password\n3. Click Login",
+    "Expected Result": "An error message is displayed",
+}
+
+
+def password_length_test_case(length, expected_result):
+    return {
+        "Test Case ID": "TC_04",
+        "Test Case Title": f"Verify login with password of {length} characters",
+        "Test Data": f"Password with {length} characters",
+        "Test Steps": "1. Open the login page\n2. Enter the password\n3. Click Login",
+        "Expected Result": expected_result,
+    }
+
+
+def test_normalize_title_tokens():
+    assert normalize_title_tokens("Verify the Logins with valid Credentials") == {"login", "valid", "credential"}
+
+
+def test_regenerated_test_case_is_flagged_with_session_unique_reference():
+    index = DuplicateTestCaseIndex()
+    index.extend([invalid_login_test_case, login_test_case, regenerated_login_test_case])
+    assert len(index) == 3
+    assert index.duplicates_found == 1
+    assert index.test_cases[2]["Duplicate Of"] == "TC_01 (row 2)"
+
+
+def test_merge_mode_keeps_merged_test_case_ids():
+    index = DuplicateTestCaseIndex(mode="merge")
+    assert index.extend([login_test_case, regenerated_login_test_case]) == 1
+    assert index.test_cases[0]["Merged Test Case IDs"] == "TC_01"
+
+
+def test_boundary_negative_and_superset_test_cases_are_kept():
+    index = DuplicateTestCaseIndex(mode="merge")
+    index.extend([
+        login_test_case,
+        remember_me_test_case,
+        invalid_login_test_case,
+        password_length_test_case(8, "User is logged in"),
+        password_length_test_case(7, "A password length error is displayed"),
+        password_length_test_case(9, "User is logged in"),
+    ])
+    assert len(index) == 6
+    assert index.duplicates_found == 0
+
+
+def test_numbered_variants_are_kept():
+    index = DuplicateTestCaseIndex(mode="merge")
+    for number in range(520):
+        index.add({"Test Case ID": f"TC_{number}", "Test Case Title": f"Verify login password q{number}",
+                   "Test Steps": "Enter the password", "Expected Result": "Password is accepted"})
+    assert len(index) == 520
+
+
+def test_large_index_bounds_comparisons_per_insert():
+    index = DuplicateTestCaseIndex(mode="merge", max_block_size=50)
+    areas = ["profile", "settings", "orders", "payments", "search", "cart", "wishlist", "reviews"]
+    max_comparisons = 0
+    for number in range(20000):
+        area = areas[number % len(areas)]
+        index.add({"Test Case ID": f"TC_{number}", "Test Case Title": f"Verify login {area} scenario {number}",
+                   "Test Steps": f"Open {area} after login, scenario {number}", "Expected Result": "Page loads"})
+        max_comparisons = max(max_comparisons, index.last_comparisons)
+    assert len(index) == 20000
+    # Title tokens "login", "scenario" and the area saturate their blocks, only the bounded blocks are compared
+    assert max_comparisons <= 2 * 50
+
+
+def test_test_case_with_only_common_title_tokens_is_still_deduplicated():
+    index = DuplicateTestCaseIndex(mode="merge", max_block_size=50)
+    for token in ["login", "password", "expiry"]:
+        for number in range(50):
+            index.add({"Test Case ID": f"TC_{number}", "Test Case Title": f"Verify {token} case{number}",
+                       "Test Steps": f"Steps {number}", "Expected Result": "Passes"})
+    index.add({"Test Case ID": "TC_A", "Test Case Title": "Verify login password expiry",
+               "Test Steps": "Wait until the password expires and log in", "Expected Result": "Password change prompt"})
+
+    assert not index.add({"Test Case ID": "TC_B", "Test Case Title": "Verify the login password expiry",
+                          "Test Steps": "Wait until the password expires and log in",
+                          "Expected Result": "Password change prompt"})
+    assert index.last_comparisons <= 3
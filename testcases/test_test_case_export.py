@@ -0,0 +1,73 @@
+import csv
+from io import BytesIO, StringIO
+
+import pyarrow.parquet as pq
+from openpyxl import load_workbook
+
+from ai_assistant.test_case_dedup import DuplicateTestCaseIndex
+from ai_assistant.test_case_export import CachedTestCaseExport
+
+test_cases = [
+    {
+        "Test Case ID": "TC_01",
+        "Test Case Title": "Verify login with valid credentials",
+        "Test Steps": "1. Open the login page\n2. Click Login",
+        "Expected Result": "User is redirected to the dashboard",
+        "Priority": "High",
+    },
+    {
+        "Test Case ID": "TC_02",
+        "Test Case Title": "Verify logout from the dashboard",
+        "Test Steps": "1. Click Logout",
+        "Expected Result": "User is returned to the login page",
+        "Priority": None,
+    },
+]
+
+
+def build_index():
+    index = DuplicateTestCaseIndex()
+    index.extend(test_cases)
+    return index
+
+
+def test_excel_round_trip():
+    data = CachedTestCaseExport().get(build_index(), "Excel")
+    rows = list(load_workbook(BytesIO(data)).active.iter_rows(values_only=True))
+    assert rows[0] == ("Test Case ID", "Test Case Title", "Test Steps", "Expected Result", "Priority")
+    assert rows[1] == tuple(test_cases[0].values())
+    assert rows[2][:4] == tuple(test_cases[1].values())[:4]
+
+
+def test_csv_round_trip():
+    data = CachedTestCaseExport().get(build_index(), "CSV")
+    rows = list(csv.DictReader(StringIO(data.decode("utf-8"))))
+    assert rows[0] == test_cases[0]
+    assert rows[1]["Test Steps"] == "1. Click Logout"
+
+
+def test_parquet_round_trip_keeps_nulls():
+    data = CachedTestCaseExport().get(build_index(), "Parquet")
+    assert pq.read_table(BytesIO(data)).to_pylist() == test_cases
+
+
+def test_cache_hit_skips_serialization():
+    index = build_index()
+    export = CachedTestCaseExport()
+    first = export.get(index, "Excel")
+    assert export.get(index, "Excel") is first
+    assert export.builds == 1
+
+    index.add({"Test Case ID": "TC_03", "Test Case Title": "Verify password reset email",
+               "Test Steps": "1. Click Forgot password", "Expected Result": "Reset email is sent"})
+    export.get(index, "Excel")
+    assert export.builds == 2
+
+
+def test_invalidate_forces_rebuild():
+    index = build_index()
+    export = CachedTestCaseExport()
+    export.get(index, "CSV")
+    export.invalidate()
+    export.get(index, "CSV")
+    assert export.builds == 2
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from ai_assistant_data_generation.testset_checkpoint import TestsetCheckpoint, generate_in_batches
+
+
+class FakeTestset:
+    def __init__(self, samples):
+        self.samples = samples
+
+    def to_pandas(self):
+        return pd.DataFrame(self.samples)
+
+
+class FakeGenerator:
+    persona_list = None
+
+    def __init__(self, fail_after=None):
+        self.generated = 0
+        self.fail_after = fail_after
+        self.batch_sizes = []
+
+    def generate(self, testset_size):
+        if self.fail_after is not None and self.generated >= self.fail_after:
+            raise TimeoutError("Request timed out.")
+        self.batch_sizes.append(testset_size)
+        samples = [{"user_input": f"Question {self.generated + number}?", "reference_contexts": ["context"]}
+                   for number in range(testset_size)]
+        self.generated += testset_size
+        return FakeTestset(samples)
+
+
+def test_batches_are_checkpointed_and_resumed(tmp_path):
+    crashing_generator = FakeGenerator(fail_after=20)
+    progress = []
+    with pytest.raises(TimeoutError):
+        for samples in generate_in_batches(crashing_generator, "corpus", 25, batch_size=10, checkpoint_dir=tmp_path):
+            progress.append(len(samples))
+    assert progress == [0, 10, 20]
+
+    generator = FakeGenerator()
+    all_samples = list(generate_in_batches(generator, "corpus", 25, batch_size=10, checkpoint_dir=tmp_path))[-1]
+    assert generator.batch_sizes == [5]
+    assert [sample["user_input"] for sample in all_samples][18:22] == ["Question 18?", "Question 19?",
+                                                                       "Question 0?", "Question 1?"]
+    assert all_samples[0]["reference_contexts"] == ["context"]
+
+    restarted_generator = FakeGenerator()
+    samples = list(generate_in_batches(restarted_generator, "corpus", 5, checkpoint_dir=tmp_path, resume=False))[-1]
+    assert len(samples) == 5 and restarted_generator.batch_sizes == [5]
+
+
+def test_completed_run_does_not_resume(tmp_path):
+    first_samples = list(generate_in_batches(FakeGenerator(), "corpus", 5, checkpoint_dir=tmp_path))[-1]
+    assert not (tmp_path / "corpus.jsonl").exists()
+
+    generator = FakeGenerator()
+    generator.generated = 100
+    second_samples = list(generate_in_batches(generator, "corpus", 5, checkpoint_dir=tmp_path))[-1]
+    assert generator.batch_sizes == [5]
+    assert not {sample["user_input"] for sample in first_samples} & {sample["user_input"] for sample in second_samples}
+
+
+def test_line_cut_off_by_a_crash_is_dropped(tmp_path):
+    checkpoint = TestsetCheckpoint(tmp_path / "corpus.jsonl")
+    checkpoint.append([{"user_input": "Question 0?"}])
+    with open(checkpoint.path, "a", encoding="utf-8") as checkpoint_file:
+        checkpoint_file.write('{"user_input": "Quest')
+    assert len(checkpoint.load()) == 1
+
+    checkpoint.append([{"user_input": "Question 1?"}])
+    assert [sample["user_input"] for sample in checkpoint.load()] == ["Question 0?", "Question 1?"]
@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from ai_assistant_metrics_evaluation.tiered_evaluation import FAIL, JUDGE, LOCAL_METRICS, PASS, TierRules, \
+    compute_local_metrics, select_audit_rows, tier_agreement
+
+RESPONSES = ["Refunds are accepted within 30 days.", "The sky is green today",
+             "Refunds are accepted within thirty days of purchase.", ""]
+REFERENCES = ["refunds are  accepted within 30 days.", "Refunds are accepted within 30 days.",
+              "Refunds are accepted within 30 days.", "Refunds are accepted within 30 days."]
+
+
+def test_local_metrics_score_identical_and_unrelated_responses():
+    scores = compute_local_metrics(RESPONSES, REFERENCES)
+
+    assert list(scores.columns) == LOCAL_METRICS
+    assert scores.loc[0].tolist() == pytest.approx([1.0] * len(LOCAL_METRICS))
+    assert scores.loc[1, "exact_match"] == 0.0 and scores.loc[1, "rouge_l"] < 0.3
+    assert 0.5 < scores.loc[2, "rouge_l"] < 1.0
+    assert scores.loc[3].tolist() == pytest.approx([0.0] * len(LOCAL_METRICS))
+    assert ((scores >= 0) & (scores <= 1)).all().all()
+
+
+def test_rules_only_send_ambiguous_rows_to_the_judges():
+    scores = compute_local_metrics(RESPONSES, REFERENCES)
+
+    assert TierRules().classify(scores).tolist() == [PASS, FAIL, JUDGE, FAIL]
+    assert TierRules(fail_below=-1).classify(scores).tolist() == [PASS, JUDGE, JUDGE, JUDGE]
+    assert TierRules(pass_above=2, exact_match_passes=False).classify(scores).tolist() == [JUDGE, FAIL, JUDGE, FAIL]
+    with pytest.raises(ValueError):
+        TierRules(pass_metric="meteor")
+
+
+def test_wrong_number_or_missing_negation_is_not_passed_on_a_fuzzy_score():
+    scores = compute_local_metrics(["Refunds are issued within 3 days", "Refunds aren't issued within 30 days",
+                                    "refunds are issued within 30 days"],
+                                   ["Refunds are issued within 30 days"] * 2 + ["Refunds are issued within 30 days."])
+
+    assert scores["token_sort_ratio"].min() >= 0.95
+    assert scores["same_facts"].tolist() == [0.0, 0.0, 1.0]
+    assert TierRules().classify(scores).tolist() == [JUDGE, JUDGE, PASS]
+    assert TierRules(require_same_facts=False).classify(scores).tolist() == [PASS, PASS, PASS]
+
+
+def test_rules_from_config(tmp_path):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text("[TIERED_EVALUATION]\nENABLED = True\nPASS_METRIC = bleu\nPASS_ABOVE = 0.8\n")
+    rules = TierRules.from_config(str(config_path))
+
+    assert (rules.pass_metric, rules.pass_above, rules.fail_metric) == ("bleu", 0.8, "rouge_l")
+    config_path.write_text("[TIERED_EVALUATION]\nENABLED = False\n")
+    assert TierRules.from_config(str(config_path)) is None
+
+
+def test_audit_rows_and_agreement():
+    decisions = pd.Series([PASS] * 10 + [FAIL] * 4 + [JUDGE] * 2)
+    audit_rows = select_audit_rows(decisions, audit_fraction=0.2)
+
+    assert len(audit_rows) == 3 and all(decisions[row] != JUDGE for row in audit_rows)
+    assert select_audit_rows(decisions, audit_fraction=0) == set()
+
+    agreement = tier_agreement(decisions, {0: True, 1: False, 10: False, 14: True})
+    assert agreement == {"audited": 3, "agreement": pytest.approx(2 / 3), "pass_agreement": 0.5,
+                         "fail_agreement": 1.0}
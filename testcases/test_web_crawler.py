@@ -0,0 +1,101 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ai_assistant_data_generation.web_crawler import HttpCache, crawl_urls, parse_page
+
+PAGES = {
+    "/": '<html><head><title>Home</title><style>p {}</style></head><body><h1>Shop</h1><p>Welcome.</p>'
+         '<a href="/returns#policy">Returns</a><a href="/shipping">Shipping</a>'
+         '<a href="https://example.com/">External</a><script>track()</script></body></html>',
+    "/returns": '<html><body><p>Returns are accepted up to 30 days.</p><a href="/">Home</a></body></html>',
+    "/shipping": '<html><body><p>Shipping takes 5 days.</p><a href="/shipping/express">Express</a></body></html>',
+    "/shipping/express": "<html><body><p>Express shipping takes 1 day.</p></body></html>",
+}
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.delay)
+            if self.path not in PAGES:
+                self.send_error(404)
+                return
+            etag = f'"{hash(PAGES[self.path])}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = PAGES[self.path].encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.active = server.max_active = 0
+    server.delay = 0.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_parse_page_keeps_visible_text_and_links():
+    text, title, links = parse_page("http://shop.test/", PAGES["/"])
+    assert title == "Home"
+    assert text == "Shop\nWelcome.\nReturnsShippingExternal"
+    assert links == ["http://shop.test/returns", "http://shop.test/shipping", "https://example.com/"]
+
+
+def test_same_site_crawl_with_conditional_requests(site, tmp_path):
+    server, base_url = site
+    cache = HttpCache(cache_dir=tmp_path)
+    with ThreadPoolExecutor() as executor:
+        documents, stats = crawl_urls([base_url + "/"], same_site=True, cache=cache, executor=executor)
+        assert [document.metadata["source"] for document in documents] == [
+            base_url + "/", base_url + "/returns", base_url + "/shipping", base_url + "/shipping/express"]
+        assert documents[1].page_content == "Returns are accepted up to 30 days.\nHome"
+        assert (stats["fetched"], stats["not_modified"], stats["errors"]) == (4, 0, [])
+
+        # Nothing changed, every page is answered with a 304 and read from the cache
+        documents_again, stats = crawl_urls([base_url + "/"], same_site=True, cache=cache, executor=executor)
+        assert (stats["fetched"], stats["not_modified"]) == (0, 4)
+        assert [document.page_content for document in documents_again] == [document.page_content
+                                                                           for document in documents]
+        assert all(document.metadata["cached"] for document in documents_again)
+
+        documents, stats = crawl_urls([base_url + "/"], same_site=True, max_pages=2, executor=executor)
+        assert len(documents) == 2
+
+
+def test_per_host_concurrency_limit(site):
+    server, base_url = site
+    server.delay = 0.1
+    urls = [base_url + path for path in PAGES] + [f"{base_url}/missing-{number}" for number in range(6)]
+    # Default process pool for the HTML to text step
+    documents, stats = crawl_urls(urls, per_host_limit=2)
+    assert len(documents) == 4 and len(stats["errors"]) == 6
+    assert server.max_active == 2